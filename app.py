@@ -1,10 +1,16 @@
 from email.utils import parsedate
 import os
-from datetime import datetime, timedelta
+import csv
+import io
+import time
+import click
+from functools import lru_cache
+from datetime import date, datetime, timedelta
 from dateutil.parser import parse as parse_date
-from flask import Blueprint, Flask, json, make_response, request, jsonify, session
+from flask import Blueprint, Flask, Response, json, make_response, request, jsonify, session, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import extract, func, or_
+from sqlalchemy import case, func, literal, null, or_, true, type_coerce
+from sqlalchemy.orm import joinedload
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 from flask_cors import CORS
@@ -15,7 +21,8 @@ import re
 load_dotenv()
 
 # === Extensions ===
-db = SQLAlchemy()
+from routing import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 ma = Marshmallow()
 migrate = Migrate()
 
@@ -26,7 +33,8 @@ env = os.getenv("FLASK_ENV", "development")
 app.config.from_object(config_by_name[env])
 
 # CORS Configuration (Frontend on port 3000)
-CORS(app, origins=["http://localhost:3000"], supports_credentials=True)
+CORS(app, origins=["http://localhost:3000"], supports_credentials=True,
+     expose_headers=['X-Next-Cursor', 'Server-Timing'])
 
 # Environment Configuration
 class Config:
@@ -41,10 +49,42 @@ db.init_app(app)
 ma.init_app(app)
 migrate.init_app(app, db)
 
+from sqlite_profile import init_sqlite_profile
+from instrumentation import init_instrumentation
+from metrics import init_metrics
+from routing import init_read_replica, sync_sqlite_replica
+init_sqlite_profile(app, db)
+init_read_replica(app)
+init_instrumentation(app)
+init_metrics(app, db)
+
 # === Import models after db is initialized ===
-from models import Tenants, Properties, Units, Leases, RentPayments, Expenses, MaintenanceRequests, Users
+from models import Tenants, Properties, Units, Leases, RentPayments, RentCharges, Expenses, MaintenanceRequests, Users
+from models import LeaseLedgers, MaintenanceRequestsArchive, RentPaymentsArchive
+from rollups import apply_lease_term, apply_payment, lease_term, rebuild_rollups, rollup_totals, rollup_totals_query, year_month
+from ledgers import apply_payment_to_ledger, find_ledger_drift, lease_payment_status, rebuild_ledgers
+from pagination import InvalidCursor, keyset_page, with_next_cursor
+from archival import ARCHIVE_BATCH_SIZE, archive_history, has_archived, history_page
+from search import matching_payment_ids, rebuild_search_index
+from cache import cached_admin_view, init_response_cache
+init_response_cache(app, db, [Tenants, Properties, Units, Leases, RentPayments, MaintenanceRequests])
+from etags import conditional_tenant_view, init_entity_versions
+init_entity_versions()
+from serialization import Projection, cached_http_date, dumps, json_response
+from exports import COLUMNAR_BATCH_SIZE, EXPORTS, FORMATS, export_table
+from expiry import expire_leases
+from deletion import archive_property, archive_unit, purge_archived, purge_property, purge_unit
+from charges import charge_periods, charge_upcoming_periods, drop_charges_after, generate_charges, next_due_date, next_period, regenerate_charges
+from scheduler import JOBS, init_scheduler, register_job, run_job_now, start_scheduler
+register_job('expire-leases', '*/15 * * * *', lambda: f'{expire_leases()} lease(s) ended')
+register_job('generate-charges', '10 0 * * *', lambda: f'{charge_upcoming_periods()} charge(s) created')
+register_job('rebuild-rollups', '30 2 * * *', lambda: f'{rebuild_rollups()} rollup row(s) rebuilt')
+register_job('check-ledgers', '45 2 * * *', lambda: f'{len(find_ledger_drift())} ledger(s) out of sync')
+register_job('archive-history', '0 3 * * *', lambda: f"{sum(archive_history(app.config['ARCHIVE_AFTER_DAYS']).values())} row(s) archived")
+init_scheduler(app)
 
 # === Schemas ===
+# Bookkeeping columns (updated_at for exports, deleted_at for archiving) stay out of the API
 class GenericSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         load_instance = True
@@ -56,26 +96,33 @@ class TenantSchema(GenericSchema):
 class PropertySchema(GenericSchema):
     class Meta:
         model = Properties
+        exclude = ('deleted_at',)
 
 class UnitSchema(GenericSchema):
     class Meta:
         model = Units
+        exclude = ('deleted_at',)
 
 class LeaseSchema(GenericSchema):
     class Meta:
         model = Leases
+        exclude = ('updated_at',)
 
 class RentPaymentSchema(GenericSchema):
     class Meta:
         model = RentPayments
+        exclude = ('updated_at',)
+        dump_only = ('payment_month',)
 
 class ExpenseSchema(GenericSchema):
     class Meta:
         model = Expenses
+        exclude = ('updated_at',)
 
 class MaintenanceRequestSchema(GenericSchema):
     class Meta:
         model = MaintenanceRequests
+        exclude = ('updated_at',)
 
 class UserSchema(GenericSchema):
     class Meta:
@@ -106,6 +153,24 @@ maintenances_schema = MaintenanceRequestSchema(many=True)
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 
+# Column projections for the list routes: same JSON as the schemas, built from plain rows
+tenants_projection = Projection(tenants_schema)
+properties_projection = Projection(properties_schema)
+leases_projection = Projection(leases_schema)
+expenses_projection = Projection(expenses_schema)
+maintenances_projection = Projection(maintenances_schema)
+users_projection = Projection(users_schema)
+
+# === Helpers ===
+@lru_cache(maxsize=None)
+def month_label(payment_month):
+    """'YYYY-MM' for a YYYYMM payment_month bucket"""
+    return f'{payment_month // 100:04d}-{payment_month % 100:02d}'
+
+@app.errorhandler(InvalidCursor)
+def handle_invalid_cursor(e):
+    return jsonify({'error': str(e)}), 400
+
 # === CRUD Routes for each model ===
 
 # ------- TENANTS -------
@@ -117,6 +182,7 @@ def create_tenant():
     db.session.commit()
     return tenant_schema.jsonify(tenant), 201
 @app.route('/tenant-dashboard', methods=['GET'])
+@conditional_tenant_view
 def tenant_dashboard():
     try:
         import urllib.parse
@@ -148,22 +214,26 @@ def tenant_dashboard():
 
         print(f"👤 Tenant found: {tenant.first_name} {tenant.last_name} (ID={tenant.id})")
 
-        # 3. Get lease
-        lease = Leases.query.filter_by(tenant_id=tenant.id, lease_status='active').first()
+        # 3. Get lease, with its unit, property and ledger in the same query
+        lease = Leases.query.options(
+            joinedload(Leases.unit),
+            joinedload(Leases.property),
+            joinedload(Leases.ledger)
+        ).filter_by(tenant_id=tenant.id, lease_status='active').first()
         if lease:
             print(f"📄 Active lease found: ID={lease.lease_id}, property_id={lease.property_id}, unit_id={lease.unit_id}")
         else:
             print("ℹ️ No active lease found")
 
         # 4. Get unit
-        unit = Units.query.get(lease.unit_id) if lease else None
+        unit = lease.unit if lease else None
         if unit:
             print(f"🏠 Unit: {unit.unit_name} ({unit.type}) - #{unit.unit_number}")
         else:
             print("⚠️ Unit not found or no lease")
 
         # 5. Get property
-        property = Properties.query.get(lease.property_id) if lease else None
+        property = lease.property if lease else None
         if property:
             print(f"🏢 Property: {property.property_name}, {property.address}")
         else:
@@ -181,25 +251,22 @@ def tenant_dashboard():
 
         current_month_paid = RentPayments.query.filter(
             RentPayments.tenant_id == tenant.id,
-            func.lower(RentPayments.status).in_(['paid', 'completed']),
+            RentPayments.status == 'completed',
             RentPayments.period_start <= first_next_month,
             RentPayments.period_end >= first_of_month
         ).first() is not None
 
         print(f"📆 Current month rent paid: {current_month_paid}")
 
-        # 8. Calculate next payment date
-        next_payment_date = None
-        if lease and lease.payment_due_day:
-            try:
-                next_payment_date = today.replace(day=lease.payment_due_day)
-                if next_payment_date < today:
-                    next_payment_date = (next_payment_date + timedelta(days=32)).replace(day=lease.payment_due_day)
-                print(f"📅 Next payment due on: {next_payment_date}")
-            except ValueError:
-                print("⚠️ Invalid payment_due_day in lease")
-
-        # 9. Build response
+        # 8. Next payment date from the lease's upcoming charge
+        next_payment_date = next_due_date(lease.lease_id, today) if lease else None
+        if next_payment_date:
+            print(f"📅 Next payment due on: {next_payment_date}")
+
+        # 9. Running balance from the lease ledger
+        balance = lease_payment_status(lease, lease.ledger, today) if lease else None
+
+        # 10. Build response
         response = {
             'tenant': {
                 'first_name': tenant.first_name,
@@ -239,7 +306,9 @@ def tenant_dashboard():
             'payment_status': {
                 'current_month_paid': current_month_paid,
                 'next_payment_date': next_payment_date.strftime('%Y-%m-%d') if next_payment_date else None,
-                'last_payment_date': payments[0].payment_date.strftime('%Y-%m-%d') if payments else None
+                'last_payment_date': payments[0].payment_date.strftime('%Y-%m-%d') if payments else None,
+                'total_paid': balance['total_paid'] if balance else None,
+                'balance_due': balance['balance_due'] if balance else None
             }
         }
 
@@ -250,6 +319,7 @@ def tenant_dashboard():
         print("💥 Error in /tenant-dashboard:", str(e))
         return jsonify({'error': 'Server error'}), 500
 @app.route('/tenant-leases', methods=['GET'])
+@conditional_tenant_view
 def tenant_leases():
     try:
         import urllib.parse
@@ -281,14 +351,17 @@ def tenant_leases():
         print(f"👤 Tenant: {tenant.first_name} {tenant.last_name} (ID={tenant.id})")
 
         # 3. Get all leases for tenant
-        leases = Leases.query.filter_by(tenant_id=tenant.id).order_by(Leases.start_date.desc()).all()
+        leases = Leases.query.options(
+            joinedload(Leases.unit),
+            joinedload(Leases.property)
+        ).filter_by(tenant_id=tenant.id).order_by(Leases.start_date.desc()).all()
         print(f"📄 Found {len(leases)} lease(s)")
 
         # 4. Build response
         lease_data = []
         for lease in leases:
-            unit = Units.query.get(lease.unit_id)
-            property = Properties.query.get(lease.property_id)
+            unit = lease.unit
+            property = lease.property
 
             lease_data.append({
                 'lease_id': lease.lease_id,
@@ -315,6 +388,7 @@ def tenant_leases():
         print("💥 Error in /tenant-leases:", str(e))
         return jsonify({'error': 'Server error'}), 500
 @app.route('/tenant-payments', methods=['GET'])
+@conditional_tenant_view
 def tenant_payment_history():
     try:
         import urllib.parse
@@ -335,8 +409,13 @@ def tenant_payment_history():
         if not tenant:
             return jsonify({'error': 'Tenant not found'}), 404
 
-        payments = RentPayments.query.filter_by(tenant_id=tenant.id)\
-            .order_by(RentPayments.payment_date.desc()).all()
+        payments, next_cursor = history_page(
+            RentPayments.query.filter_by(tenant_id=tenant.id),
+            RentPaymentsArchive.query.filter_by(tenant_id=tenant.id),
+            [RentPayments.payment_date, RentPayments.payment_id],
+            [RentPaymentsArchive.payment_date, RentPaymentsArchive.payment_id],
+            descending=True
+        )
 
         payment_list = [{
             'payment_id': p.payment_id,
@@ -348,8 +427,10 @@ def tenant_payment_history():
             'period_end': p.period_end.strftime('%Y-%m-%d')
         } for p in payments]
 
-        return jsonify({'payments': payment_list}), 200
+        return jsonify({'payments': payment_list, 'next_cursor': next_cursor}), 200
 
+    except InvalidCursor:
+        raise
     except Exception as e:
         print("💥 Error in /tenant-payments:", str(e))
         return jsonify({'error': 'Server error'}), 500
@@ -472,7 +553,8 @@ def change_tenant_password():
 @app.route('/tenants', methods=['GET'])
 def get_tenants():
     """Get all tenants"""
-    return tenants_schema.jsonify(Tenants.query.all())
+    tenants, next_cursor = keyset_page(tenants_projection.query(), [Tenants.id])
+    return with_next_cursor(json_response(tenants_projection.dump(tenants)), next_cursor)
 
 @app.route('/tenants/<int:id>', methods=['GET'])
 def get_tenant(id):
@@ -534,7 +616,7 @@ def create_property():
         return jsonify({'error': 'Failed to create property', 'details': str(e)}), 500@app.route('/properties/admin/<int:admin_id>', methods=['GET'])
 @app.route('/properties/admin/<int:admin_id>', methods=['GET'])
 def get_properties_by_admin(admin_id):
-    properties = Properties.query.filter_by(admin_id=admin_id).all()
+    properties = Properties.query.filter_by(admin_id=admin_id, deleted_at=None).all()
     
     if not properties:
         return jsonify({'message': 'No properties found for this admin.'}), 404
@@ -553,7 +635,10 @@ def get_properties_by_admin(admin_id):
 
 @app.route('/properties', methods=['GET'])
 def get_properties():
-    return properties_schema.jsonify(Properties.query.all())
+    properties, next_cursor = keyset_page(
+        properties_projection.query().filter(Properties.deleted_at.is_(None)), [Properties.id]
+    )
+    return with_next_cursor(json_response(properties_projection.dump(properties)), next_cursor)
 
 # Property routes (assuming you're using Flask)
 
@@ -585,42 +670,21 @@ def update_property(property_id):
 # Delete Property
 @app.route('/properties/<int:property_id>', methods=['DELETE'])
 def delete_property(property_id):
+    """Delete a property with all its history, or archive it with ?mode=soft"""
     try:
-        # Start a transaction
-        db.session.begin_nested()
-        
         property = Properties.query.get(property_id)
         if not property:
             return jsonify({'error': 'Property not found'}), 404
 
-        # Get all units in this property
-        units = Units.query.filter_by(property_id=property_id).all()
-        
-        for unit in units:
-            # Handle all leases for this unit
-            leases = Leases.query.filter_by(unit_id=unit.unit_id).all()
-            
-            for lease in leases:
-                # Option 1: Delete associated rent payments
-                RentPayments.query.filter_by(lease_id=lease.lease_id).delete()
-                
-                # Option 2: Orphan the payments (if you want to keep payment records)
-                # RentPayments.query.filter_by(lease_id=lease.lease_id).update(
-                #     {'lease_id': None}, synchronize_session=False
-                # )
-                
-                # Delete the lease
-                db.session.delete(lease)
-            
-            # Delete the unit
-            db.session.delete(unit)
-        
-        # Finally delete the property
-        db.session.delete(property)
-        db.session.commit()
-        
+        if request.args.get('mode') == 'soft':
+            if not archive_property(property):
+                return jsonify({'error': 'Property has active leases; end them before archiving'}), 409
+            return jsonify({'message': 'Property archived; its units, leases and payments are kept'}), 200
+
+        counts = purge_property(property)
         return jsonify({
-            'message': 'Property deleted successfully with all associated units, leases, and payments'
+            'message': 'Property deleted successfully with all associated units, leases, and payments',
+            'deleted': counts
         }), 200
 
     except Exception as e:
@@ -670,7 +734,7 @@ def create_unit():
 
 @app.route('/units/property/<int:property_id>', methods=['GET'])
 def get_units_by_property(property_id):
-    units = Units.query.filter_by(property_id=property_id).all()
+    units = Units.query.filter_by(property_id=property_id, deleted_at=None).all()
     return jsonify([
         {
             'unit_id': u.unit_id,
@@ -689,24 +753,17 @@ def get_units_by_property(property_id):
 @app.route('/units/<int:unit_id>', methods=['GET'])
 def get_unit(unit_id):
     try:
-        unit = Units.query.get_or_404(unit_id)
-        current_lease = Leases.query.filter_by(unit_id=unit_id, lease_status='active').first()
-
-        # Check if lease should automatically be ended
-        if current_lease and current_lease.end_date <= date.today():
-            current_lease.lease_status = 'ended'
-            unit.status = 'vacant'
-
-            tenant = Tenants.query.get(current_lease.tenant_id)
-            if tenant:
-                tenant.move_out_date = date.today()
-
-            db.session.commit()
-            current_lease = None
-            tenant = None
-
-        else:
-            tenant = Tenants.query.get(current_lease.tenant_id) if current_lease else None
+        unit = Units.query.filter_by(unit_id=unit_id, deleted_at=None).first_or_404()
+        current_lease = Leases.query.options(
+            joinedload(Leases.tenant),
+            joinedload(Leases.ledger)
+        ).filter(
+            Leases.unit_id == unit_id,
+            Leases.lease_status == 'active',
+            # Leases past their end date are ended by `flask expire-leases`; don't show them meanwhile
+            Leases.end_date > date.today()
+        ).first()
+        tenant = current_lease.tenant if current_lease else None
 
         payments = []
         if current_lease:
@@ -717,6 +774,7 @@ def get_unit(unit_id):
             'unit': unit.to_dict(),
             'current_tenant': tenant.to_dict() if tenant else None,
             'current_lease': current_lease.to_dict() if current_lease else None,
+            'payment_status': lease_payment_status(current_lease, current_lease.ledger) if current_lease else None,
             'payment_history': [p.to_dict() for p in payments]
         }), 200
 
@@ -729,7 +787,7 @@ def get_unit(unit_id):
 def assign_tenant(unit_id):
     try:
         data = request.get_json()
-        unit = Units.query.get_or_404(unit_id)
+        unit = Units.query.filter_by(unit_id=unit_id, deleted_at=None).first_or_404()
 
         # Validate required fields
         if not data.get('tenant_id') and not all(field in data for field in [
@@ -824,6 +882,9 @@ def assign_tenant(unit_id):
         )
         db.session.add(lease)
         unit.status = 'occupied'
+        apply_lease_term(lease)
+        db.session.flush()
+        generate_charges(year_month(lease_start), next_period(year_month(date.today())), [lease.lease_id])
         
         db.session.commit()
 
@@ -871,8 +932,11 @@ def record_payment(unit_id):
         if period_start > period_end:
             return jsonify({'error': 'Start date must be before end date'}), 400
 
-        # Get active lease for unit
-        lease = Leases.query.filter_by(
+        # Get active lease for unit, with the tenant, unit and property used in the response
+        lease = Leases.query.options(
+            joinedload(Leases.tenant),
+            joinedload(Leases.unit).joinedload(Units.property)
+        ).filter_by(
             unit_id=unit_id, 
             lease_status='active'
         ).first_or_404()
@@ -891,29 +955,14 @@ def record_payment(unit_id):
             admin_id=int(data['admin_id'])
         )
         db.session.add(payment)
-        db.session.commit()
+        apply_payment(payment, lease)
+        apply_payment_to_ledger(payment)
+        db.session.flush()
 
-        # Calculate payment status for lease
-        payments = RentPayments.query.filter_by(
-            lease_id=lease.lease_id,
-            status='completed'
-        ).all()
-        
-        total_paid = sum(p.amount for p in payments)
-        lease_start = lease.start_date
-        today = datetime.today().date()
-        
-        # Calculate months elapsed since lease start
-        months_elapsed = (today.year - lease_start.year) * 12 + today.month - lease_start.month
-        if today.day > lease.start_date.day:
-            months_elapsed += 1
-            
-        expected_total = months_elapsed * lease.monthly_rent
-        balance = expected_total - total_paid
-        months_paid = total_paid // lease.monthly_rent
-        months_behind = months_elapsed - months_paid
+        # Calculate payment status for lease from its running totals
+        payment_status = lease_payment_status(lease)
 
-        # Return payment with additional info
+        # Return payment with additional info (built before commit expires the loaded objects)
         payment_dict = payment.to_dict()
         payment_dict.update({
             'tenant_name': f"{lease.tenant.first_name} {lease.tenant.last_name}",
@@ -921,18 +970,13 @@ def record_payment(unit_id):
             'property_name': lease.unit.property.property_name,
             'payment_month': payment.payment_date.strftime('%Y-%m')
         })
+        db.session.commit()
 
         return jsonify({
             'success': True,
             'message': 'Payment recorded successfully',
             'payment': payment_dict,
-            'payment_status': {
-                'total_months': months_elapsed,
-                'expected_total_rent': expected_total,
-                'total_paid': total_paid,
-                'balance_due': balance,
-                'months_behind': months_behind
-            }
+            'payment_status': payment_status
         })
     except Exception as e:
         db.session.rollback()
@@ -947,10 +991,17 @@ def end_lease(unit_id):
         end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
         if end_date < lease.start_date:
             return jsonify({'error': 'End date cannot be before start date'}), 400
+        # Extending a lease is an edit (PUT /leases/<id>), which also charges the added months
+        if end_date > lease.end_date:
+            return jsonify({'error': 'End date cannot be after the lease end date'}), 400
 
         # End the lease
+        old_term = lease_term(lease)
         lease.lease_status = 'ended'
         lease.end_date = end_date
+        apply_lease_term(old_term, -1)
+        apply_lease_term(lease)
+        drop_charges_after(lease)
 
         # Update unit status
         unit = Units.query.get(unit_id)
@@ -981,14 +1032,13 @@ def delete_unit(unit_id):
     if not unit:
         return jsonify({'error': 'Unit not found'}), 404
 
-    # Check if there's an active lease for this unit
-    leases = Leases.query.filter_by(unit_id=unit_id).all()
-    for lease in leases:
-        db.session.delete(lease)  # Or you can update the lease to detach the unit_id if needed
+    if request.args.get('mode') == 'soft':
+        if not archive_unit(unit):
+            return jsonify({'error': 'Unit has an active lease; end it before archiving'}), 409
+        return jsonify({'message': 'Unit archived; its leases and payments are kept'}), 200
 
-    db.session.delete(unit)
-    db.session.commit()
-    return jsonify({'message': 'Unit and related leases deleted successfully'}), 200
+    counts = purge_unit(unit)
+    return jsonify({'message': 'Unit and related leases deleted successfully', 'deleted': counts}), 200
 
 @app.route('/units/<int:unit_id>', methods=['PATCH'])
 def update_unit(unit_id):
@@ -1015,46 +1065,39 @@ def create_lease():
 
 @app.route('/leases', methods=['GET'])
 def get_leases():
-    return leases_schema.jsonify(Leases.query.all())
+    leases, next_cursor = keyset_page(leases_projection.query(), [Leases.lease_id])
+    return with_next_cursor(json_response(leases_projection.dump(leases)), next_cursor)
 
 @app.route('/leases/<int:id>', methods=['PUT'])
 def update_lease(id):
     lease = Leases.query.get_or_404(id)
+    old_term, old_due_day = lease_term(lease), lease.payment_due_day
     for k, v in request.json.items():
+        if k in ('start_date', 'end_date') and isinstance(v, str):
+            v = date.fromisoformat(v)
         setattr(lease, k, v)
+    if lease_term(lease) != old_term:
+        apply_lease_term(old_term, -1)
+        apply_lease_term(lease)
+    if lease_term(lease) != old_term or lease.payment_due_day != old_due_day:
+        regenerate_charges(lease)
     db.session.commit()
     return lease_schema.jsonify(lease)
 
 @app.route('/leases/<int:id>', methods=['DELETE'])
 def delete_lease(id):
-    db.session.delete(Leases.query.get_or_404(id))
+    lease = Leases.query.get_or_404(id)
+    apply_lease_term(lease, -1)
+    # Charges and the ledger are derived from the lease; SQLite does not cascade the foreign keys
+    RentCharges.query.filter(RentCharges.lease_id == id).delete(synchronize_session=False)
+    LeaseLedgers.query.filter(LeaseLedgers.lease_id == id).delete(synchronize_session=False)
+    db.session.delete(lease)
     db.session.commit()
     return '', 204
-from datetime import date
 def check_and_update_leases():
     """Check all active leases and mark as ended if past end date"""
     try:
-        today = date.today()
-        active_leases = Leases.query.filter(
-            Leases.lease_status == 'active',
-            Leases.end_date <= today
-        ).all()
-
-        for lease in active_leases:
-            # Update lease status
-            lease.lease_status = 'ended'
-            
-            # Update unit status
-            unit = Units.query.get(lease.unit_id)
-            if unit:
-                unit.status = 'vacant'
-            
-            db.session.add(lease)
-            if unit:
-                db.session.add(unit)
-        
-        db.session.commit()
-        return f"Updated {len(active_leases)} leases"
+        return f"Updated {expire_leases()} leases"
     except Exception as e:
         db.session.rollback()
         return f"Error updating leases: {str(e)}"
@@ -1127,6 +1170,10 @@ def file_payment():
         period_end = parse_date(data['period_end']).date()
         payment_date = parse_date(data['payment_date']).date()
 
+        lease = db.session.get(Leases, data['lease_id'])
+        if not lease:
+            return jsonify({'error': 'Lease not found'}), 404
+
         new_payment = RentPayments(
             lease_id=data['lease_id'],
             tenant_id=data['tenant_id'],
@@ -1141,6 +1188,8 @@ def file_payment():
         )
 
         db.session.add(new_payment)
+        apply_payment(new_payment, lease)
+        apply_payment_to_ledger(new_payment)
         db.session.commit()
         print("✅ Payment record saved to database")
         return jsonify({'message': 'Payment submitted successfully'}), 201
@@ -1152,96 +1201,180 @@ def file_payment():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 @app.route('/admin/rent-payments/<int:admin_id>/months')
+@cached_admin_view
 def get_payment_months(admin_id):
     """Get distinct months for which payments exist"""
     try:
-        months = db.session.query(
-            db.func.extract('year', RentPayments.payment_date).label('year'),
-            db.func.extract('month', RentPayments.payment_date).label('month')
-        ).filter(RentPayments.admin_id == admin_id)\
-         .distinct()\
-         .order_by('year', 'month')\
-         .all()
+        months = set()
+        for model in (RentPayments, RentPaymentsArchive):
+            months.update(month for month, in db.session.query(model.payment_month)
+                          .filter(model.admin_id == admin_id)
+                          .distinct())
         
         # Format as YYYY-MM
-        month_options = [f"{int(m.year)}-{int(m.month):02d}" for m in months]
+        month_options = [f"{m // 100}-{m % 100:02d}" for m in sorted(months)]
         return jsonify({'months': month_options})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+def filtered_payments_query(admin_id, args, model=RentPayments):
+    """Payment rows (with tenant, unit and property names) for an admin, filtered by the request args
+
+    Pass model=RentPaymentsArchive for the same query over archived payments.
+    """
+    # Get all filter parameters
+    search = args.get('search')
+    tenant_name = args.get('tenant_name')
+    unit_name = args.get('unit_name')
+    property_name = args.get('property_name')
+    reference_number = args.get('reference_number')
+    status = args.get('status')
+    month = args.get('month')
+    year = args.get('year')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+
+    # Base query with joins, selecting only the columns in the response
+    query = db.session.query(
+        model.payment_id,
+        model.lease_id,
+        model.payment_date,
+        model.admin_id,
+        model.amount,
+        model.payment_method,
+        model.transaction_reference_number,
+        model.period_start,
+        model.period_end,
+        model.status,
+        model.tenant_id,
+        model.payment_month,
+        (Tenants.first_name + ' ' + Tenants.last_name).label('tenant_name'),
+        Units.unit_name,
+        Properties.property_name
+    ).join(Leases, model.lease_id == Leases.lease_id)\
+     .join(Tenants, model.tenant_id == Tenants.id)\
+     .join(Units, Leases.unit_id == Units.unit_id)\
+     .join(Properties, Units.property_id == Properties.id)\
+     .filter(model.admin_id == admin_id)
+
+    # Apply filters; text matches are resolved to payment ids through the search index
+    if search:
+        query = query.filter(model.payment_id.in_(matching_payment_ids(admin_id, search, model=model)))
+    if tenant_name:
+        query = query.filter(model.payment_id.in_(matching_payment_ids(admin_id, tenant_name, 'tenant_name', model)))
+    if unit_name:
+        query = query.filter(model.payment_id.in_(matching_payment_ids(admin_id, unit_name, 'unit_name', model)))
+    if property_name:
+        query = query.filter(model.payment_id.in_(matching_payment_ids(admin_id, property_name, 'property_name', model)))
+    if reference_number:
+        query = query.filter(model.payment_id.in_(matching_payment_ids(admin_id, reference_number, 'reference', model)))
+    if status:
+        query = query.filter(model.status == status)
+    # payment_month is YYYYMM, so a year or a month of a year is a range on (admin_id, payment_month)
+    if year:
+        first, last = (int(month), int(month)) if month else (1, 12)
+        query = query.filter(model.payment_month.between(int(year) * 100 + first, int(year) * 100 + last))
+    elif month:
+        # The same month of every year has no range; this reads all of the admin's payments
+        query = query.filter(model.payment_month % 100 == int(month))
+    if start_date:
+        query = query.filter(model.payment_date >= start_date)
+    if end_date:
+        query = query.filter(model.payment_date <= end_date)
+    return query
+
 @app.route('/admin/rent-payments/<int:admin_id>')
 def get_payments(admin_id):
     """Get payments with filtering options"""
     try:
-        # Get all filter parameters
-        search = request.args.get('search')
-        tenant_name = request.args.get('tenant_name')
-        unit_name = request.args.get('unit_name')
-        property_name = request.args.get('property_name')
-        reference_number = request.args.get('reference_number')
-        status = request.args.get('status')
-        month = request.args.get('month')
-        year = request.args.get('year')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        query = filtered_payments_query(admin_id, request.args)
+        archive_query = filtered_payments_query(admin_id, request.args, RentPaymentsArchive)
+
+        # Execute query, newest first
+        results, next_cursor = history_page(
+            query,
+            archive_query,
+            [RentPayments.payment_date, RentPayments.payment_id],
+            [RentPaymentsArchive.payment_date, RentPaymentsArchive.payment_id],
+            descending=True
+        )
 
-        # Base query with joins
-        query = db.session.query(
-            RentPayments,
-            Tenants.first_name + ' ' + Tenants.last_name.label('tenant_name'),
-            Units.unit_name,
-            Properties.property_name
-        ).join(Leases, RentPayments.lease_id == Leases.lease_id)\
-         .join(Tenants, RentPayments.tenant_id == Tenants.id)\
-         .join(Units, Leases.unit_id == Units.unit_id)\
-         .join(Properties, Units.property_id == Properties.id)\
-         .filter(RentPayments.admin_id == admin_id)
-
-        # Apply filters
-        if search:
-            query = query.filter(
-                (Tenants.first_name + ' ' + Tenants.last_name).ilike(f'%{search}%') |
-                Units.unit_name.ilike(f'%{search}%') |
-                Properties.property_name.ilike(f'%{search}%') |
-                RentPayments.transaction_reference_number.ilike(f'%{search}%')
-            )
-        if tenant_name:
-            query = query.filter((Tenants.first_name + ' ' + Tenants.last_name).ilike(f'%{tenant_name}%'))
-        if unit_name:
-            query = query.filter(Units.unit_name.ilike(f'%{unit_name}%'))
-        if property_name:
-            query = query.filter(Properties.property_name.ilike(f'%{property_name}%'))
-        if reference_number:
-            query = query.filter(RentPayments.transaction_reference_number.ilike(f'%{reference_number}%'))
-        if status:
-            query = query.filter(RentPayments.status == status)
-        if month:
-            query = query.filter(db.func.extract('month', RentPayments.payment_date) == month)
-        if year:
-            query = query.filter(db.func.extract('year', RentPayments.payment_date) == year)
-        if start_date:
-            query = query.filter(RentPayments.payment_date >= start_date)
-        if end_date:
-            query = query.filter(RentPayments.payment_date <= end_date)
-
-        # Execute query
-        results = query.order_by(RentPayments.payment_date.desc()).all()
-
-        # Format results
+        # Format results; dates keep the HTTP-date format jsonify gave them
+        keys = results[0]._fields if results else ()
         payments = []
-        for payment, tenant_name, unit_name, property_name in results:
-            payment_dict = payment.to_dict()
+        for row in results:
+            payment_dict = dict(zip(keys, row))
             payment_dict.update({
-                'tenant_name': tenant_name,
-                'unit_name': unit_name,
-                'property_name': property_name,
-                'payment_month': payment.payment_date.strftime('%Y-%m')
+                'payment_date': cached_http_date(row.payment_date),
+                'period_start': cached_http_date(row.period_start),
+                'period_end': cached_http_date(row.period_end),
+                'payment_month': month_label(row.payment_month)
             })
             payments.append(payment_dict)
 
-        return jsonify({'success': True, 'payments': payments})
+        return json_response({'success': True, 'payments': payments, 'next_cursor': next_cursor})
+    except InvalidCursor:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+EXPORT_BATCH_SIZE = 1000
+
+@app.route('/admin/rent-payments/<int:admin_id>/export')
+def export_payments(admin_id):
+    """Stream every payment matching get_payments' filters as CSV or NDJSON"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    try:
+        query = filtered_payments_query(admin_id, request.args)
+        archive_query = filtered_payments_query(admin_id, request.args, RentPaymentsArchive)
+        if has_archived(archive_query):
+            query = query.union_all(archive_query)
+        # yield_per streams rows from a server-side cursor in batches instead of loading them all
+        query = query.order_by(RentPayments.payment_date.desc(), RentPayments.payment_id.desc())\
+            .yield_per(EXPORT_BATCH_SIZE)
+        keys = [column['name'] for column in query.column_descriptions]
+        month_index = keys.index('payment_month')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def export_rows():
+        for row in query:
+            row = list(row)
+            row[month_index] = month_label(row[month_index])
+            yield row
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(keys)
+        for count, row in enumerate(export_rows(), 1):
+            writer.writerow(row)
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def generate_ndjson():
+        chunk = []
+        for row in export_rows():
+            chunk.append(dumps(dict(zip(keys, row))))
+            if len(chunk) == EXPORT_BATCH_SIZE:
+                yield b'\n'.join(chunk) + b'\n'
+                chunk = []
+        if chunk:
+            yield b'\n'.join(chunk) + b'\n'
+
+    if export_format == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=rent-payments-{admin_id}.{export_format}'
+    })
 @app.route('/admin/rent-payments/<int:admin_id>/stats', methods=['GET'])
+@cached_admin_view
 def get_rent_stats(admin_id):
     try:
         # Get filter parameters
@@ -1254,7 +1387,8 @@ def get_rent_stats(admin_id):
         print(f"Request params - month: {month}, year: {year}, start_date: {start_date}, end_date: {end_date}")
 
         # Determine date range
-        if start_date and end_date:
+        custom_range = bool(start_date and end_date)
+        if custom_range:
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         elif month and year:
@@ -1267,40 +1401,35 @@ def get_rent_stats(admin_id):
 
         print(f"Date range being used: {start_date} to {end_date}")
 
-        # Query for expected rent (unchanged)
-        expected_rent = db.session.query(
-    func.sum(Leases.monthly_rent)
-).filter(
-    Leases.admin_id == admin_id,
-    Leases.start_date <= end_date,
-    or_(
-        Leases.end_date >= start_date,
-        Leases.end_date == None
-    ),
-    Leases.lease_status == 'active'
-).scalar() or 0
+        # Whole-month ranges (including the current-month default) are read from the rollups
+        month_aligned = start_date.day == 1 and (end_date + timedelta(days=1)).day == 1
+        if month_aligned or not custom_range:
+            expected_rent, collected_rent, _, payment_count = rollup_totals(
+                admin_id, year_month(start_date), year_month(end_date)
+            )
+        else:
+            expected_rent = db.session.query(
+                func.sum(RentCharges.amount)
+            ).filter(
+                RentCharges.admin_id == admin_id,
+                RentCharges.due_date.between(start_date, end_date)
+            ).scalar() or 0
+
+            collected_rent, payment_count = 0, 0
+            for model in (RentPayments, RentPaymentsArchive):
+                collected, count = db.session.query(
+                    func.coalesce(func.sum(model.amount), 0),
+                    func.count(model.payment_id)
+                ).filter(
+                    model.admin_id == admin_id,
+                    model.payment_date >= start_date,
+                    model.payment_date <= end_date,
+                    model.status == 'completed'
+                ).one()
+                collected_rent, payment_count = collected_rent + collected, payment_count + count
 
         print(f"Expected rent calculated: {expected_rent}")
-
-        # SIMPLIFIED PAYMENT QUERY - JUST GET ALL PAYMENTS IN DATE RANGE
-        payments = db.session.query(RentPayments).join(Leases).filter(
-    RentPayments.admin_id == admin_id,
-    RentPayments.payment_date >= start_date,
-    RentPayments.payment_date <= end_date,
-    RentPayments.status == 'completed',
-    Leases.lease_status == 'active',
-    Leases.start_date <= end_date,
-    or_(
-        Leases.end_date == None,
-        Leases.end_date >= start_date
-    )
-).all()
-        # Debug output
-        print(f"Number of payments found: {len(payments)}")
-        for payment in payments:
-            print(f"Payment ID: {payment.payment_id}, Amount: {payment.amount}, Date: {payment.payment_date}")
-
-        collected_rent = sum(p.amount for p in payments) if payments else 0
+        print(f"Number of payments found: {payment_count}")
         print(f"Collected rent calculated: {collected_rent}")
 
         # Calculate percentage
@@ -1316,7 +1445,7 @@ def get_rent_stats(admin_id):
             'collected': float(collected_rent),
             'expected': float(expected_rent),
             'percentage': percentage,
-            'payment_count': len(payments),
+            'payment_count': int(payment_count),
             'date_range': f"{start_date} to {end_date}"
         }), 200
 
@@ -1343,12 +1472,17 @@ def update_payment_status(payment_id):
         if payment.status != 'pending':
             return jsonify({'success': False, 'error': 'Only pending payments can be updated'}), 400
 
+        apply_payment(payment, payment.lease, -1)
+        apply_payment_to_ledger(payment, -1)
         payment.status = new_status
+        apply_payment(payment, payment.lease)
+        apply_payment_to_ledger(payment)
         db.session.commit()
 
         return jsonify({'success': True, 'message': f'Status updated to {new_status}'}), 200
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ------- EXPENSES -------
@@ -1361,7 +1495,8 @@ def create_expense():
 
 @app.route('/expenses', methods=['GET'])
 def get_expenses():
-    return expenses_schema.jsonify(Expenses.query.all())
+    expenses, next_cursor = keyset_page(expenses_projection.query(), [Expenses.expense_id])
+    return with_next_cursor(json_response(expenses_projection.dump(expenses)), next_cursor)
 
 # ------- MAINTENANCE REQUESTS -------
 @app.route('/tenant/maintenance', methods=['POST'])
@@ -1411,6 +1546,7 @@ def schedule_maintenance():
         print("💥 Error scheduling maintenance:", str(e))
         return jsonify({'error': 'Server error'}), 500
 @app.route('/tenant/maintenance', methods=['GET'])
+@conditional_tenant_view
 def get_tenant_maintenance_requests():
     try:
         import urllib.parse
@@ -1430,7 +1566,9 @@ def get_tenant_maintenance_requests():
         if not tenant:
             return jsonify({'error': 'Tenant not found'}), 404
 
-        requests = MaintenanceRequests.query.filter_by(tenant_id=tenant.id).order_by(MaintenanceRequests.request_date.desc()).all()
+        requests = MaintenanceRequests.query.filter_by(tenant_id=tenant.id).all()\
+            + MaintenanceRequestsArchive.query.filter_by(tenant_id=tenant.id).all()
+        requests.sort(key=lambda r: r.request_date, reverse=True)
 
         return jsonify([{
             'request_id': r.request_id,
@@ -1447,9 +1585,15 @@ def get_tenant_maintenance_requests():
 @app.route('/admin/maintenance-requests/<int:admin_id>', methods=['GET'])
 def admin_get_all_requests(admin_id):
     try:
-        requests = MaintenanceRequests.query.filter_by(admin_id=admin_id).order_by(MaintenanceRequests.request_date.desc()).all()
+        requests, next_cursor = history_page(
+            MaintenanceRequests.query.filter_by(admin_id=admin_id),
+            MaintenanceRequestsArchive.query.filter_by(admin_id=admin_id),
+            [MaintenanceRequests.request_date, MaintenanceRequests.request_id],
+            [MaintenanceRequestsArchive.request_date, MaintenanceRequestsArchive.request_id],
+            descending=True
+        )
 
-        return jsonify([{
+        return with_next_cursor(jsonify([{
             'request_id': r.request_id,
             'tenant_id': r.tenant_id,
             'lease_id': r.lease_id,
@@ -1458,8 +1602,10 @@ def admin_get_all_requests(admin_id):
             'request_status': r.request_status,
             'request_priority': r.request_priority,
             'cost': r.cost
-        } for r in requests]), 200
+        } for r in requests]), next_cursor), 200
 
+    except InvalidCursor:
+        raise
     except Exception as e:
         print("💥 Error retrieving admin maintenance requests:", str(e))
         return jsonify({'error': 'Server error'}), 500
@@ -1493,7 +1639,8 @@ def create_maintenance():
 
 @app.route('/maintenance_requests', methods=['GET'])
 def get_maintenance():
-    return maintenances_schema.jsonify(MaintenanceRequests.query.all())
+    requests, next_cursor = keyset_page(maintenances_projection.query(), [MaintenanceRequests.request_id])
+    return with_next_cursor(json_response(maintenances_projection.dump(requests)), next_cursor)
 
 # ------- USERS -------
 @app.route('/users', methods=['POST'])
@@ -1505,7 +1652,8 @@ def create_user():
 
 @app.route('/users', methods=['GET'])
 def get_users():
-    return users_schema.jsonify(Users.query.all())
+    users, next_cursor = keyset_page(users_projection.query(), [Users.user_id])
+    return with_next_cursor(json_response(users_projection.dump(users)), next_cursor)
 
 from flask import request, jsonify, session
 from werkzeug.security import generate_password_hash
@@ -1692,141 +1840,113 @@ def recover_password():
 
     return jsonify({'message': 'Password updated successfully'}), 200
 @app.route('/admin/stats/<int:admin_id>', methods=['GET'])
+@cached_admin_view
 def get_admin_stats(admin_id):
     try:
-        # Validate admin exists
-        admin = Admin.query.get(admin_id)
-        if not admin:
-            return jsonify({'error': 'Admin not found'}), 404
-
-        # Count properties
-        property_count = db.session.query(func.count(Properties.id))\
-            .filter(Properties.admin_id == admin_id)\
-            .scalar() or 0
-        
-        # Count all units
-        total_units = db.session.query(func.count(Units.unit_id))\
-            .join(Properties)\
-            .filter(Properties.admin_id == admin_id)\
-            .scalar() or 0
-        
-        # Count occupied units
-        occupied_units = db.session.query(func.count(Units.unit_id))\
-            .join(Properties)\
-            .filter(
-                Properties.admin_id == admin_id,
-                Units.status == 'occupied'
-            )\
-            .scalar() or 0
-        
-        # Calculate potential revenue
-      # Get start and end of the current month
         today = datetime.today().date()
-        start_of_month = today.replace(day=1)
-        end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        next_week = today + timedelta(days=7)
 
-        # Calculate potential revenue from active leases within the month
-        potential_revenue = db.session.query(
-            func.sum(Leases.monthly_rent)
-        ).filter(
-            Leases.admin_id == admin_id,
-            Leases.start_date <= end_of_month,
-            or_(
-                Leases.end_date >= start_of_month,
-                Leases.end_date == None
-            ),
+        # 1. Every headline number in one statement, one CTE per table
+        property_stats = db.session.query(
+            func.count(Properties.id).label('property_count')
+        ).filter(Properties.admin_id == admin_id, Properties.deleted_at.is_(None)).cte('property_stats')
+
+        unit_stats = db.session.query(
+            func.count(Units.unit_id).label('total_units'),
+            func.coalesce(func.sum(case((Units.status == 'occupied', 1), else_=0)), 0).label('occupied_units')
+        ).join(Properties).filter(Properties.admin_id == admin_id, Units.deleted_at.is_(None)).cte('unit_stats')
+
+        tenant_stats = db.session.query(
+            func.count(Tenants.id).label('active_tenants')
+        ).join(Leases, Leases.tenant_id == Tenants.id)\
+         .filter(
+            Tenants.admin_id == admin_id,
             Leases.lease_status == 'active'
-        ).scalar() or 0
+        ).cte('tenant_stats')
+
+        rent_stats = rollup_totals_query(admin_id, year_month(today), year_month(today)).cte('rent_stats')
+
+        stats = db.session.query(
+            property_stats.c.property_count,
+            unit_stats.c.total_units,
+            unit_stats.c.occupied_units,
+            tenant_stats.c.active_tenants,
+            rent_stats.c.expected,
+            rent_stats.c.collected
+        ).select_from(Admin)\
+         .join(property_stats, true())\
+         .join(unit_stats, true())\
+         .join(tenant_stats, true())\
+         .join(rent_stats, true())\
+         .filter(Admin.admin_id == admin_id)\
+         .first()
+
+        if not stats:
+            return jsonify({'error': 'Admin not found'}), 404
 
-        
-        # Count active tenants
-        active_tenants = db.session.query(func.count(Tenants.id))\
-            .join(Leases, Leases.tenant_id == Tenants.id)\
-            .filter(
-                Tenants.admin_id == admin_id,
-                Leases.lease_status == 'active'
-            )\
-            .scalar() or 0
-        
-        # Calculate collected rent (current month)
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        
-        collected_rent = db.session.query(func.sum(RentPayments.amount))\
-            .join(Leases, RentPayments.lease_id == Leases.lease_id)\
-            .filter(
-                RentPayments.admin_id == admin_id,
-                RentPayments.status == 'completed',
-                Leases.lease_status == 'active',
-                extract('month', RentPayments.payment_date) == current_month,
-                extract('year', RentPayments.payment_date) == current_year
-            )\
-            .scalar() or 0
+        property_count, total_units, occupied_units, active_tenants, potential_revenue, collected_rent = stats
+        outstanding = potential_revenue - collected_rent
 
-        
-        # Calculate outstanding payments
-        # Subquery to calculate sum of payments per lease this month
-        subq = db.session.query(
-            RentPayments.lease_id,
-            func.sum(RentPayments.amount).label("paid_amount")
-        ).filter(
-            RentPayments.status == 'completed',
-            extract('month', RentPayments.payment_date) == current_month,
-            extract('year', RentPayments.payment_date) == current_year
-        ).group_by(RentPayments.lease_id).subquery()
-
-        # Outer query to calculate outstanding for active leases
-        outstanding_query = db.session.query(
-            func.sum(Leases.monthly_rent - func.coalesce(subq.c.paid_amount, 0))
-        ).outerjoin(subq, subq.c.lease_id == Leases.lease_id)\
-        .filter(
-            Leases.admin_id == admin_id,
+        # 2. Recent activity (last 5 maintenance requests) and upcoming payments (next 7 days)
+        #    fetched together with their tenant and unit names
+        recent_activity = db.session.query(
+            literal('activity').label('kind'),
+            MaintenanceRequests.request_id.label('id'),
+            Tenants.first_name,
+            Tenants.last_name,
+            Units.unit_name,
+            MaintenanceRequests.request_description.label('description'),
+            MaintenanceRequests.request_date.label('date'),
+            MaintenanceRequests.request_status.label('status'),
+            null().label('amount'),
+            # Typed so the union returns the charges' due dates as dates
+            type_coerce(null(), db.Date).label('due_date')
+        ).join(Leases, MaintenanceRequests.lease_id == Leases.lease_id)\
+         .join(Tenants, Leases.tenant_id == Tenants.id)\
+         .join(Units, Leases.unit_id == Units.unit_id)\
+         .filter(MaintenanceRequests.admin_id == admin_id)\
+         .order_by(MaintenanceRequests.request_date.desc())\
+         .limit(5)\
+         .subquery()
+
+        upcoming_payments = db.session.query(
+            literal('payment').label('kind'),
+            Leases.lease_id.label('id'),
+            Tenants.first_name,
+            Tenants.last_name,
+            Units.unit_name,
+            null().label('description'),
+            null().label('date'),
+            null().label('status'),
+            RentCharges.amount.label('amount'),
+            RentCharges.due_date.label('due_date')
+        ).join(Leases, RentCharges.lease_id == Leases.lease_id)\
+         .join(Tenants, Tenants.id == Leases.tenant_id)\
+         .join(Units, Leases.unit_id == Units.unit_id)\
+         .filter(
+            RentCharges.admin_id == admin_id,
+            RentCharges.due_date.between(today, next_week),
             Leases.lease_status == 'active'
-        ).scalar()
+        )
 
-        outstanding = outstanding_query or 0
+        details = db.session.query(recent_activity).union_all(upcoming_payments).all()
 
-        
-        outstanding = outstanding_query or 0
-
-        # Recent activity (last 5 maintenance requests)
-        recent_activity = MaintenanceRequests.query\
-            .join(Leases, MaintenanceRequests.lease_id == Leases.lease_id)\
-            .join(Tenants, Leases.tenant_id == Tenants.id)\
-            .filter(MaintenanceRequests.admin_id == admin_id)\
-            .order_by(MaintenanceRequests.request_date.desc())\
-            .limit(5)\
-            .all()
-        
-        # Upcoming payments (next 7 days)
-        today = datetime.now()
-        next_week = today + timedelta(days=7)
-        
-        upcoming_payments = db.session.query(Leases, Tenants)\
-            .join(Tenants, Tenants.id == Leases.tenant_id)\
-            .filter(
-                Leases.admin_id == admin_id,
-                Leases.lease_status == 'active',
-                Leases.payment_due_day.between(today.day, next_week.day)
-            )\
-            .all()
-        
         # Format responses
         formatted_activity = [{
-            'text': f"Maintenance for {req.lease.unit.unit_name} filed by {req.lease.tenant.first_name} {req.lease.tenant.last_name}",
-            'description': req.request_description,
-            'time': req.request_date.strftime('%b %d, %Y'),
-            'status': req.request_status
-        } for req in recent_activity] if recent_activity else []
-                
+            'text': f"Maintenance for {row.unit_name} filed by {row.first_name} {row.last_name}",
+            'description': row.description,
+            'time': row.date.strftime('%b %d, %Y'),
+            'status': row.status
+        } for row in sorted((r for r in details if r.kind == 'activity'), key=lambda r: r.date, reverse=True)]
+
         formatted_payments = [{
-            'id': lease.lease_id,
-            'name': f"{tenant.first_name} {tenant.last_name}",
-            'unit': lease.unit.unit_name,
-            'amount': lease.monthly_rent,
+            'id': row.id,
+            'name': f"{row.first_name} {row.last_name}",
+            'unit': row.unit_name,
+            'amount': row.amount,
             'status': 'due',
-            'due_date': f"{today.year}-{today.month}-{lease.payment_due_day}"
-        } for lease, tenant in upcoming_payments] if upcoming_payments else []
+            'due_date': row.due_date.isoformat()
+        } for row in details if row.kind == 'payment']
 
         return jsonify({
             'success': True,
@@ -1851,6 +1971,146 @@ def get_admin_stats(admin_id):
             'error': str(e),
             'message': 'Failed to fetch dashboard data'
         }), 500
+# === CLI Commands ===
+@app.cli.command('rebuild-rollups')
+@click.option('--admin-id', type=int, default=None, help='Only rebuild rollups for this admin.')
+def rebuild_rollups_command(admin_id):
+    """Recompute the monthly rent rollups from leases and payments"""
+    count = rebuild_rollups(admin_id)
+    print(f"✅ Rebuilt {count} rollup row(s)")
+
+@app.cli.command('check-ledgers')
+@click.option('--fix', is_flag=True, help='Rewrite every ledger from raw payments.')
+def check_ledgers_command(fix):
+    """Compare lease ledgers with totals recomputed from raw payments"""
+    drift = find_ledger_drift()
+    for lease_id, stored, actual in drift:
+        print(f"⚠️ Lease {lease_id}: ledger (paid, pending, count)={stored}, payments={actual}")
+    print(f"{len(drift)} ledger(s) out of sync")
+
+    if fix:
+        count = rebuild_ledgers()
+        print(f"✅ Rebuilt {count} ledger(s)")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create the payment search index if missing and repopulate it from the database"""
+    count = rebuild_search_index()
+    print(f"✅ Indexed {count} payment(s)")
+
+@app.cli.command('sync-replica')
+def sync_replica_command():
+    """Copy the primary SQLite database onto the replica bind (local read/write split setups)"""
+    sync_sqlite_replica(db)
+    print("✅ Replica synced from primary")
+
+@app.cli.command('export-columnar')
+@click.argument('out_dir', type=click.Path(file_okay=False))
+@click.option('--admin-id', type=int, default=None, help='Only export this admin\'s rows.')
+@click.option('--table', 'tables', type=click.Choice(list(EXPORTS)), multiple=True,
+              help='Table to export (repeatable); defaults to all of them.')
+@click.option('--incremental', is_flag=True, help='Only rows changed since the last export\'s watermark.')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='parquet', show_default=True)
+@click.option('--batch-size', type=int, default=COLUMNAR_BATCH_SIZE, show_default=True)
+def export_columnar_command(out_dir, admin_id, tables, incremental, fmt, batch_size):
+    """Write payments, leases, expenses and maintenance requests as Parquet/Arrow files partitioned by year_month"""
+    for table in tables or EXPORTS:
+        rows, files = export_table(table, out_dir, admin_id=admin_id, incremental=incremental, fmt=fmt,
+                                   batch_size=batch_size,
+                                   overlap_seconds=app.config.get('EXPORT_WATERMARK_OVERLAP', 0))
+        print(f"✅ {table}: exported {rows} row(s) to {files} file(s)")
+
+@app.cli.command('expire-leases')
+def expire_leases_command():
+    """End active leases past their end date, vacate their units and stamp tenants' move-out dates (run daily)"""
+    print(f"✅ Ended {expire_leases()} expired lease(s)")
+
+@app.cli.command('generate-charges')
+@click.option('--from', 'first', default=None, help='First month to charge (YYYY-MM); defaults to this month.')
+@click.option('--through', 'last', default=None, help='Last month to charge (YYYY-MM); defaults to next month.')
+def generate_charges_command(first, last):
+    """Create the missing monthly rent charges of every lease, one month per transaction"""
+    this_month = year_month(date.today())
+    first = int(first.replace('-', '')) if first else this_month
+    last = int(last.replace('-', '')) if last else next_period(this_month)
+    print(f"✅ Created {charge_periods(first, last)} charge(s)")
+
+@app.cli.command('seed')
+@click.option('--admins', type=int, default=1, show_default=True)
+@click.option('--properties-per-admin', type=int, default=5, show_default=True)
+@click.option('--units-per-property', type=int, default=20, show_default=True)
+@click.option('--years', type=int, default=3, show_default=True, help='Years of lease history per unit.')
+@click.option('--seed', 'seed', type=int, default=0, show_default=True, help='Random seed; same seed, same data.')
+@click.option('--until', default=None, help='Last day of history (YYYY-MM-DD); defaults to today.')
+@click.option('--reset', is_flag=True, help='Delete all existing rows first.')
+def seed_command(admins, properties_per_admin, units_per_property, years, seed, until, reset):
+    """Generate a synthetic dataset of admins, properties, units, tenants, leases, payments, expenses and maintenance"""
+    from seeding import SEED_PASSWORD, clear_data, seed_dataset
+    if reset:
+        clear_data()
+    started = time.perf_counter()
+    counts = seed_dataset(admins, properties_per_admin, units_per_property, years, seed=seed,
+                          until=date.fromisoformat(until) if until else None)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"✅ {table}: {count} row(s)")
+    print(f"🌱 Seeded {sum(counts.values())} row(s) in {elapsed:.1f}s; every user's password is {SEED_PASSWORD!r}")
+
+@app.cli.command('purge-archived')
+@click.option('--older-than', 'days', type=int, default=30, show_default=True,
+              help='Only purge properties and units archived at least this many days ago.')
+def purge_archived_command(days):
+    """Permanently delete archived properties and units with all their history"""
+    count = purge_archived(datetime.utcnow() - timedelta(days=days))
+    print(f"✅ Purged {count} archived property/unit record(s)")
+
+@app.cli.command('archive-history')
+@click.option('--older-than', 'days', type=int, default=None,
+              help='Archive leases ended at least this many days ago; defaults to ARCHIVE_AFTER_DAYS.')
+@click.option('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, show_default=True, help='Leases moved per transaction.')
+def archive_history_command(days, batch_size):
+    """Move payments and maintenance requests of long-ended leases into the archive tables (resumable)"""
+    moved = archive_history(app.config['ARCHIVE_AFTER_DAYS'] if days is None else days, batch_size)
+    for table, count in moved.items():
+        print(f"✅ {table}: archived {count} row(s)")
+
+@app.cli.command('list-jobs')
+@click.option('--history', default=5, show_default=True, help='Recent runs to show per job.')
+def list_jobs_command(history):
+    """Show each scheduled job's cron schedule, next run, lock holder and recent runs"""
+    from models import JobRuns, ScheduledJobs
+    for job in JOBS.values():
+        state = db.session.get(ScheduledJobs, job.name)
+        print(f"⏰ {job.name} [{job.schedule.expression}] next: {state.next_run_at if state else 'not scheduled yet'}"
+              + (f", locked by {state.locked_by} until {state.locked_until}" if state and state.locked_by else ''))
+        runs = JobRuns.query.filter_by(job=job.name).order_by(JobRuns.started_at.desc()).limit(history)
+        for run in runs:
+            print(f"   {run.started_at:%Y-%m-%d %H:%M:%S} {run.status} in {run.duration_ms:.0f} ms on {run.worker}"
+                  f"{': ' + run.result if run.result else ''}")
+
+@app.cli.command('run-job')
+@click.argument('name', type=click.Choice(list(JOBS)))
+def run_job_command(name):
+    """Run a scheduled job now, taking its lock and recording the run"""
+    run = run_job_now(name, app.config['SCHEDULER_LOCK_SECONDS'])
+    if run is None:
+        print(f"⚠️ {name} is already running on another worker")
+    elif run.status == 'failed':
+        print(f"❌ {name} failed after {run.duration_ms:.0f} ms\n{run.error}")
+    else:
+        print(f"✅ {name} finished in {run.duration_ms:.0f} ms: {run.result}")
+
+@app.cli.command('run-scheduler')
+def run_scheduler_command():
+    """Run the job scheduler in the foreground (for a dedicated scheduler process)"""
+    stop = start_scheduler(app)
+    print("⏰ Scheduler running, Ctrl+C to stop")
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+
 # === Run the app ===
 if __name__ == '__main__':
     with app.app_context():
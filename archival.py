@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+
+from sqlalchemy import delete, exists, insert, or_, select, union_all
+
+from app import db
+from cache import invalidate_admins
+from models import Leases, MaintenanceRequests, MaintenanceRequestsArchive, RentPayments, RentPaymentsArchive
+from pagination import encode_cursor, keyset_page, page_limit
+
+# Live table -> the cold table its rows move to once their lease has been over for a while
+ARCHIVES = {
+    RentPayments: RentPaymentsArchive,
+    MaintenanceRequests: MaintenanceRequestsArchive,
+}
+ARCHIVE_BATCH_SIZE = 500
+
+
+def _archivable_leases(cutoff, after, batch_size):
+    """Next batch of lease ids past `after` that ended before `cutoff` and still have live rows"""
+    has_live_rows = [exists().where(model.lease_id == Leases.lease_id) for model in ARCHIVES]
+    return db.session.execute(
+        select(Leases.lease_id)
+        .where(Leases.lease_status != 'active', Leases.end_date < cutoff, Leases.lease_id > after,
+               or_(*has_live_rows))
+        .order_by(Leases.lease_id)
+        .limit(batch_size)
+    ).scalars().all()
+
+
+def _move(model, lease_ids):
+    """Copy a batch of leases' rows into the archive, then delete the copied rows from the live table"""
+    archive = ARCHIVES[model]
+    live_key, archive_key = model.__table__.primary_key.columns[0], archive.__table__.primary_key.columns[0]
+    names = [column.name for column in model.__table__.columns]
+    db.session.execute(insert(archive).from_select(
+        names, select(*model.__table__.columns).where(model.lease_id.in_(lease_ids))
+    ))
+    # Delete what was copied rather than re-reading the live table, which may have gained rows since
+    return db.session.execute(
+        delete(model)
+        .where(live_key.in_(select(archive_key).where(archive.lease_id.in_(lease_ids))))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def archive_history(older_than_days, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move payments and maintenance requests of leases ended over `older_than_days` ago to the archive
+
+    Each batch of leases is moved in its own transaction, so the write lock
+    is held briefly and an interrupted run loses nothing: the next one
+    picks up the leases that still have live rows. Ledgers, rollups and
+    charges are untouched since the rows they summarise only change table.
+    Returns the number of rows moved per live table.
+    """
+    cutoff = date.today() - timedelta(days=older_than_days)
+    moved = {model.__tablename__: 0 for model in ARCHIVES}
+    after = 0
+    while True:
+        lease_ids = _archivable_leases(cutoff, after, batch_size)
+        if not lease_ids:
+            return moved
+        for model in ARCHIVES:
+            moved[model.__tablename__] += _move(model, lease_ids)
+        invalidate_admins(db.session.execute(
+            select(Leases.admin_id).where(Leases.lease_id.in_(lease_ids)).distinct()
+        ).scalars())
+        db.session.commit()
+        after = lease_ids[-1]
+
+
+def with_archive(model, *names):
+    """Subquery of the named columns over a live table and its archive together, for full recomputes"""
+    return union_all(
+        select(*[model.__table__.c[name] for name in names]),
+        select(*[ARCHIVES[model].__table__.c[name] for name in names])
+    ).subquery()
+
+
+def history_page(live_query, archive_query, columns, archive_columns, descending=True):
+    """keyset_page over a live table and its archive as if they were one table
+
+    The archive is only read when its first row in page order falls
+    within the page, which a cheap indexed probe tells; pages of recent
+    history never touch it. `archive_query` must filter like `live_query`
+    and `archive_columns` mirror `columns`. Returns (rows, next_cursor).
+    """
+    rows, next_cursor = keyset_page(live_query, columns, descending)
+
+    def key(row):
+        return tuple(getattr(row, c.key) for c in columns)
+
+    first = archive_query.with_entities(*archive_columns).order_by(None)\
+        .order_by(*[c.desc() if descending else c.asc() for c in archive_columns]).first()
+    if first is None:
+        return rows, next_cursor
+    if next_cursor is not None and (tuple(first) < key(rows[-1]) if descending else tuple(first) > key(rows[-1])):
+        return rows, next_cursor
+
+    archived, archive_next = keyset_page(archive_query, archive_columns, descending)
+    merged = sorted(rows + archived, key=key, reverse=descending)
+    limit = page_limit()
+    if limit is None:
+        return merged, None
+    more = len(merged) > limit or next_cursor or archive_next
+    return merged[:limit], encode_cursor(key(merged[limit - 1])) if more else None
+
+
+def has_archived(archive_query):
+    """Whether any archived row matches, so callers can skip the archive for recent ranges"""
+    return db.session.query(archive_query.exists()).scalar()
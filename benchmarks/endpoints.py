@@ -0,0 +1,309 @@
+"""Latency, throughput and query counts of every route against a generated dataset
+
+Seeds a temporary SQLite database with seeding.seed_dataset, then --threads
+threads (one Flask test client each) run every scenario --rounds times in
+their own shuffled order. Query counts come from the Server-Timing header,
+so SQL instrumentation is on and the admin response cache is off:
+
+    python -m benchmarks.endpoints --admins 3 --properties-per-admin 10 --units-per-property 50
+    python -m benchmarks.endpoints --save-baseline
+
+Without --save-baseline the run is compared with the stored baselines and
+exits non-zero when a scenario's p95 grows past --tolerance (and --slack-ms),
+its query count grows at all, or overall throughput drops past --tolerance.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import date, timedelta
+
+PROFILES = {'default': 'testing', 'production': 'production'}
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'endpoint_baselines.json')
+QUERIES_PATTERN = re.compile(r'queries;desc="(\d+)"')
+
+
+def prepare(db, args, assignments):
+    """Seed the dataset and pick the admin, tenant and rows the scenarios point at
+
+    `assignments` vacant units are added for the assign-tenant scenario.
+    """
+    from models import Leases, Properties, RentPayments, Tenants, Units
+    from seeding import seed_dataset
+
+    db.create_all()
+    seed_dataset(args.admins, args.properties_per_admin, args.units_per_property, args.years, seed=args.seed)
+
+    # The tenant with the longest running active lease of the first admin has the most history
+    lease = Leases.query.filter_by(admin_id=1, lease_status='active').order_by(Leases.start_date, Leases.lease_id).first()
+    tenant = db.session.get(Tenants, lease.tenant_id)
+    unit = db.session.get(Units, lease.unit_id)
+    prop = db.session.get(Properties, lease.property_id)
+    payment = RentPayments.query.filter_by(lease_id=lease.lease_id).order_by(RentPayments.payment_id).first()
+
+    vacant = [Units(property_id=prop.id, unit_number=f'BENCH{i}', unit_name=f'Bench {i}', status='vacant',
+                    monthly_rent=unit.monthly_rent, deposit_amount=unit.deposit_amount, admin_id=1, type=unit.type)
+              for i in range(assignments)]
+    db.session.add_all(vacant)
+    db.session.commit()
+
+    # Plain values: the threads must not lazy-load through this thread's session
+    return {'admin_id': 1, 'lease_id': lease.lease_id, 'rent': float(lease.monthly_rent), 'tenant_id': tenant.id,
+            'email': tenant.email, 'first_name': tenant.first_name, 'last_name': tenant.last_name,
+            'unit_id': unit.unit_id, 'unit_name': unit.unit_name, 'property_id': prop.id,
+            'property_name': prop.property_name, 'reference': payment.transaction_reference_number,
+            'vacant_units': iter([u.unit_id for u in vacant])}
+
+
+def scenarios(fixture):
+    """(name, method, url, body) per scenario; url and body are called once per request"""
+    admin_id = fixture['admin_id']
+    today = date.today()
+    last_month = today.replace(day=1) - timedelta(days=1)
+    year_ago = today - timedelta(days=365)
+    sequence = itertools.count()
+    payments = f'/admin/rent-payments/{admin_id}'
+
+    def fixed(url):
+        return lambda: url
+
+    def filtered(**params):
+        return fixed(f'{payments}?{urllib.parse.urlencode(dict(params, limit=50))}')
+
+    def record_payment():
+        return {'amount': fixture['rent'], 'payment_date': today.isoformat(),
+                'period_start': today.replace(day=1).isoformat(), 'period_end': today.isoformat(),
+                'payment_method': 'mpesa', 'admin_id': admin_id, 'transaction_reference': f'BENCH{next(sequence)}'}
+
+    def file_payment():
+        return {'lease_id': fixture['lease_id'], 'tenant_id': fixture['tenant_id'], 'admin_id': admin_id,
+                'amount': fixture['rent'], 'payment_method': 'mpesa',
+                'transaction_reference_number': f'BENCHF{next(sequence)}', 'payment_date': today.isoformat(),
+                'period_start': today.replace(day=1).isoformat(), 'period_end': today.isoformat()}
+
+    def assign_tenant():
+        n = next(sequence)
+        return {'first_name': 'Bench', 'last_name': f'Tenant{n}', 'email': f'bench.tenant.{n}@example.com',
+                'phone': '0700000000', 'date_of_birth': '1990-01-01', 'emergency_contact_name': 'Bench Kin',
+                'emergency_contact_number': '0711000000', 'move_in_date': today.isoformat(), 'admin_id': admin_id,
+                'lease_start': today.isoformat(), 'lease_end': (today + timedelta(days=365)).isoformat(),
+                'payment_due_day': 5}
+
+    vacant_units = fixture['vacant_units']
+    return [
+        ('tenant-dashboard', 'GET', fixed('/tenant-dashboard'), None),
+        ('tenant-leases', 'GET', fixed('/tenant-leases'), None),
+        ('tenant-payments', 'GET', fixed('/tenant-payments'), None),
+        ('tenant-payments page', 'GET', fixed('/tenant-payments?limit=20'), None),
+        ('tenant-profile', 'GET', fixed('/tenant-profile'), None),
+        ('tenant active-lease', 'GET', fixed('/tenant/active-lease'), None),
+        ('tenant maintenance', 'GET', fixed('/tenant/maintenance'), None),
+        ('properties by admin', 'GET', fixed(f'/properties/admin/{admin_id}'), None),
+        ('properties', 'GET', fixed('/properties'), None),
+        ('units by property', 'GET', fixed(f'/units/property/{fixture["property_id"]}'), None),
+        ('unit', 'GET', fixed(f'/units/{fixture["unit_id"]}'), None),
+        ('admin stats', 'GET', fixed(f'/admin/stats/{admin_id}'), None),
+        ('admin maintenance', 'GET', fixed(f'/admin/maintenance-requests/{admin_id}?limit=50'), None),
+        ('payment months', 'GET', fixed(f'{payments}/months'), None),
+        ('payments', 'GET', filtered(), None),
+        ('payments search', 'GET', filtered(search=fixture['last_name']), None),
+        ('payments tenant_name', 'GET', filtered(tenant_name=fixture['first_name']), None),
+        ('payments unit_name', 'GET', filtered(unit_name=fixture['unit_name']), None),
+        ('payments property_name', 'GET', filtered(property_name=fixture['property_name']), None),
+        ('payments reference', 'GET', filtered(reference_number=fixture['reference']), None),
+        ('payments status', 'GET', filtered(status='pending'), None),
+        ('payments month+year', 'GET', filtered(month=last_month.month, year=last_month.year), None),
+        ('payments year', 'GET', filtered(year=last_month.year), None),
+        ('payments month', 'GET', filtered(month=last_month.month), None),
+        ('payments date range', 'GET', filtered(start_date=year_ago.isoformat(), end_date=today.isoformat()), None),
+        ('payments export', 'GET', fixed(f'{payments}/export?month={last_month.month}&year={last_month.year}'), None),
+        ('stats current month', 'GET', fixed(f'{payments}/stats'), None),
+        ('stats month+year', 'GET', fixed(f'{payments}/stats?month={last_month.month:02d}&year={last_month.year}'),
+         None),
+        ('stats custom range', 'GET',
+         fixed(f'{payments}/stats?start_date={year_ago.isoformat()}&end_date={today.isoformat()}'), None),
+        ('tenants page', 'GET', fixed('/tenants?limit=50'), None),
+        ('leases page', 'GET', fixed('/leases?limit=50'), None),
+        ('expenses page', 'GET', fixed('/expenses?limit=50'), None),
+        ('users page', 'GET', fixed('/users?limit=50'), None),
+        ('maintenance_requests page', 'GET', fixed('/maintenance_requests?limit=50'), None),
+        ('record-payment', 'POST', fixed(f'/units/{fixture["unit_id"]}/record-payment'), record_payment),
+        ('assign-tenant', 'POST', lambda: f'/units/{next(vacant_units)}/assign-tenant', assign_tenant),
+        ('tenant file-payment', 'POST', fixed('/tenant/file-payment'), file_payment),
+        ('tenant maintenance request', 'POST', fixed('/tenant/maintenance'),
+         lambda: {'request_description': 'Benchmark: leaking tap'}),
+    ]
+
+
+def client_for(app, fixture):
+    """A test client signed in as the fixture tenant, with the cookie /login would set"""
+    client = app.test_client()
+    cookie = json.dumps({'email': fixture['email'], 'role': 'tenant',
+                         'username': f"{fixture['first_name']} {fixture['last_name']}"})
+    client.set_cookie('user', urllib.parse.quote(cookie))
+    return client
+
+
+def call(client, method, url, body):
+    """One request; returns (seconds, queries, error or None)"""
+    started = time.perf_counter()
+    response = client.open(url(), method=method, json=body() if body else None)
+    response.get_data()
+    elapsed = time.perf_counter() - started
+    match = QUERIES_PATTERN.search(response.headers.get('Server-Timing', ''))
+    error = None if response.status_code < 400 else f'{response.status_code} {response.get_data(as_text=True)[:80]}'
+    return elapsed, int(match.group(1)) if match else 0, error
+
+
+def drive(app, fixture, plan, threads, rounds):
+    """Run every scenario `rounds` times from each of `threads` threads; returns (samples, wall seconds)"""
+    samples = {name: {'latencies': [], 'queries': 0, 'failures': []} for name, *_ in plan}
+    lock = threading.Lock()
+    ready = threading.Barrier(threads + 1)
+
+    def run(worker):
+        client = client_for(app, fixture)
+        order = [scenario for scenario in plan for _ in range(rounds)]
+        random.Random(worker).shuffle(order)
+        ready.wait()
+        for name, method, url, body in order:
+            elapsed, queries, error = call(client, method, url, body)
+            with lock:
+                sample = samples[name]
+                if error:
+                    sample['failures'].append(error)
+                else:
+                    sample['latencies'].append(elapsed)
+                sample['queries'] = max(sample['queries'], queries)
+
+    pool = [threading.Thread(target=run, args=(worker,)) for worker in range(threads)]
+    for t in pool:
+        t.start()
+    ready.wait()
+    started = time.perf_counter()
+    for t in pool:
+        t.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, wall):
+    def pct(latencies, p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0
+
+    endpoints = {}
+    for name, sample in samples.items():
+        latencies = sorted(sample['latencies'])
+        endpoints[name] = {'requests': len(latencies), 'failed': len(sample['failures']),
+                           'p50_ms': round(pct(latencies, 0.50), 2), 'p95_ms': round(pct(latencies, 0.95), 2),
+                           'p99_ms': round(pct(latencies, 0.99), 2), 'queries': sample['queries']}
+    total = sum(e['requests'] + e['failed'] for e in endpoints.values())
+    return {'endpoints': endpoints, 'throughput': round(total / wall, 1), 'wall_s': round(wall, 2)}
+
+
+def regressions(result, baseline, tolerance, slack_ms):
+    """Human-readable list of the ways `result` is worse than `baseline`"""
+    found = []
+    for name, current in result['endpoints'].items():
+        if current['failed']:
+            found.append(f'{name}: {current["failed"]} failed request(s)')
+        expected = baseline['endpoints'].get(name)
+        if expected is None:
+            continue
+        budget = max(expected['p95_ms'] * (1 + tolerance), expected['p95_ms'] + slack_ms)
+        if current['p95_ms'] > budget:
+            found.append(f'{name}: p95 {current["p95_ms"]:.1f}ms over budget {budget:.1f}ms '
+                         f'(baseline {expected["p95_ms"]:.1f}ms)')
+        if current['queries'] > expected['queries']:
+            found.append(f'{name}: {current["queries"]} queries, baseline {expected["queries"]}')
+    floor = baseline['throughput'] / (1 + tolerance)
+    if result['throughput'] < floor:
+        found.append(f'throughput {result["throughput"]:.1f} req/s under {floor:.1f} '
+                     f'(baseline {baseline["throughput"]:.1f})')
+    return found
+
+
+def report(result, baseline):
+    expected = baseline['endpoints'] if baseline else {}
+    print(f'{"scenario":<28} {"ok":>5} {"fail":>4} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>7}  baseline p95/queries')
+    for name, e in result['endpoints'].items():
+        base = expected.get(name)
+        base = f'{base["p95_ms"]:.1f}ms/{base["queries"]}' if base else '-'
+        print(f'{name:<28} {e["requests"]:>5} {e["failed"]:>4} {e["p50_ms"]:>6.1f}ms {e["p95_ms"]:>6.1f}ms '
+              f'{e["p99_ms"]:>6.1f}ms {e["queries"]:>7}  {base}')
+    print(f'{result["throughput"]:.1f} req/s over {result["wall_s"]:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--admins', type=int, default=3)
+    parser.add_argument('--properties-per-admin', type=int, default=10)
+    parser.add_argument('--units-per-property', type=int, default=50)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0, help='dataset random seed')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent clients')
+    parser.add_argument('--rounds', type=int, default=10, help='runs of every scenario per thread')
+    parser.add_argument('--profile', choices=PROFILES, default='production')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='allowed relative p95/throughput regression')
+    parser.add_argument('--slack-ms', type=float, default=20.0, help='p95 growth always allowed, for fast routes')
+    args = parser.parse_args()
+    settings = {name: getattr(args, name) for name in
+                ('admins', 'properties_per_admin', 'units_per_property', 'years', 'seed', 'threads', 'rounds',
+                 'profile')}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.update(FLASK_ENV=PROFILES[args.profile], DATABASE_URL=url, TEST_DATABASE_URL=url,
+                          METRICS_DIR=os.path.join(tmp, 'metrics'), SQL_INSTRUMENTATION='1', RESPONSE_CACHE='none',
+                          SCHEDULER_ENABLED='0')
+        os.environ.pop('REPLICA_DATABASE_URL', None)
+        from app import app, db
+        app.logger.setLevel(logging.ERROR)
+
+        print(f'seeding {args.admins} admins x {args.properties_per_admin} properties x '
+              f'{args.units_per_property} units x {args.years} years ...', flush=True)
+        # The routes print debug output on every request
+        with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet), app.app_context():
+            fixture = prepare(db, args, args.threads * args.rounds + 1)
+            plan = scenarios(fixture)
+            # One untimed pass warms up connections and per-process caches
+            warmup = client_for(app, fixture)
+            for _, method, url_for, body in plan:
+                call(warmup, method, url_for, body)
+            samples, wall = drive(app, fixture, plan, args.threads, args.rounds)
+
+    result = summarize(samples, wall)
+    if args.save_baseline:
+        report(result, None)
+        with open(args.baseline, 'w') as f:
+            json.dump(dict(result, settings=settings), f, indent=2)
+            f.write('\n')
+        print(f'baseline saved to {args.baseline}')
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print(f'{args.baseline} was recorded with {baseline.get("settings")}; comparing anyway')
+    report(result, baseline)
+    found = regressions(result, baseline, args.tolerance, args.slack_ms) if baseline else \
+        [f'{name}: {e["failed"]} failed request(s)' for name, e in result['endpoints'].items() if e['failed']]
+    for problem in found:
+        print(f'REGRESSION {problem}')
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Schema-based vs column-projected serialization of list routes at 100k rows
+
+Builds a temporary SQLite database and times, best of --repeat runs, the
+previous path (ORM objects through the marshmallow schema / to_dict plus
+jsonify) against the projection path, with orjson and with the stdlib
+fallback:
+
+    python -m benchmarks.serialization --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def _seed(db, rows):
+    from sqlalchemy import insert
+    from models import Admin, Leases, Properties, RentPayments, Tenants, Units
+
+    db.create_all()
+    db.session.execute(insert(Admin), [{'admin_id': 1, 'username': 'bench', 'password': 'x', 'gmail': 'b@x'}])
+    db.session.execute(insert(Properties), [{'id': 1, 'property_name': 'Bench Court', 'address': '1 Rd',
+                                            'city': 'Nairobi', 'state': 'Nairobi', 'zip_code': '00100',
+                                            'admin_id': 1}])
+    db.session.execute(insert(Tenants), [{
+        'id': i, 'first_name': f'First{i}', 'last_name': f'Last{i}', 'email': f't{i}@example.com', 'phone': '0700',
+        'date_of_birth': date(1990, 1, 1) + timedelta(days=i % 5000), 'emergency_contact_name': 'Kin',
+        'emergency_contact_number': '0711', 'move_in_date': date(2024, 1, 1) + timedelta(days=i % 365),
+        'admin_id': 1, 'password': 'x',
+    } for i in range(1, rows + 1)])
+    leases = min(rows, 1000)
+    db.session.execute(insert(Units), [{
+        'unit_id': i, 'property_id': 1, 'unit_number': str(i), 'unit_name': f'U{i}', 'status': 'occupied',
+        'monthly_rent': 1000, 'deposit_amount': 1000, 'admin_id': 1, 'type': '1br',
+    } for i in range(1, leases + 1)])
+    db.session.execute(insert(Leases), [{
+        'lease_id': i, 'tenant_id': i, 'unit_id': i, 'property_id': 1, 'admin_id': 1, 'start_date': date(2024, 1, 1),
+        'end_date': date(2026, 1, 1), 'monthly_rent': 1000, 'deposit_amount': 1000, 'lease_status': 'active',
+        'payment_due_day': 5,
+    } for i in range(1, leases + 1)])
+    payments = []
+    for i in range(rows):
+        lease_id = i % leases + 1
+        paid = date(2024, 1, 5) + timedelta(days=i % 700)
+        payments.append({
+            'lease_id': lease_id, 'tenant_id': lease_id, 'admin_id': 1, 'payment_date': paid,
+            'payment_month': paid.year * 100 + paid.month, 'amount': 1000.0, 'payment_method': 'mpesa',
+            'transaction_reference_number': f'REF{i}', 'period_start': paid.replace(day=1),
+            'period_end': paid.replace(day=28), 'status': 'completed',
+        })
+    db.session.execute(insert(RentPayments), payments)
+    db.session.commit()
+
+
+def _best(fn, repeat):
+    best, size = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update(FLASK_ENV='testing', TEST_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                      METRICS_DIR=os.path.join(tmp, 'metrics'), SQL_INSTRUMENTATION='0', RESPONSE_CACHE='none')
+
+    from app import app, db, get_payments, tenants_projection, tenants_schema
+    import serialization
+    from models import Leases, Properties, RentPayments, Tenants, Units
+
+    def schema_tenants():
+        return tenants_schema.jsonify(Tenants.query.order_by(Tenants.id).all()).get_data()
+
+    def projected_tenants():
+        rows = tenants_projection.query().order_by(Tenants.id).all()
+        return serialization.json_response(tenants_projection.dump(rows)).get_data()
+
+    def to_dict_payments():
+        # The previous get_payments body: ORM rows, to_dict(), strftime and jsonify
+        from flask import jsonify
+        rows = db.session.query(
+            RentPayments, Tenants.first_name + ' ' + Tenants.last_name.label('tenant_name'),
+            Units.unit_name, Properties.property_name
+        ).join(Leases, RentPayments.lease_id == Leases.lease_id)\
+         .join(Tenants, RentPayments.tenant_id == Tenants.id)\
+         .join(Units, Leases.unit_id == Units.unit_id)\
+         .join(Properties, Units.property_id == Properties.id)\
+         .filter(RentPayments.admin_id == 1)\
+         .order_by(RentPayments.payment_date.desc(), RentPayments.payment_id.desc()).all()
+        payments = []
+        for payment, tenant_name, unit_name, property_name in rows:
+            payment_dict = payment.to_dict()
+            payment_dict.update({'tenant_name': tenant_name, 'unit_name': unit_name,
+                                 'property_name': property_name,
+                                 'payment_month': payment.payment_date.strftime('%Y-%m')})
+            payments.append(payment_dict)
+        return jsonify({'success': True, 'payments': payments, 'next_cursor': None}).get_data()
+
+    def projected_payments():
+        return get_payments(1).get_data()
+
+    with app.app_context():
+        _seed(db, args.rows)
+        print(f'{args.rows} rows, best of {args.repeat}')
+        orjson = serialization.orjson
+        with app.test_request_context('/'):
+            for label, old, new in [('GET /tenants', schema_tenants, projected_tenants),
+                                    ('GET /admin/rent-payments', to_dict_payments, projected_payments)]:
+                old_ms, _ = _best(old, args.repeat)
+                db.session.expunge_all()
+                results = []
+                for encoder in ('orjson', 'stdlib'):
+                    if encoder == 'orjson' and orjson is None:
+                        continue
+                    serialization.orjson = orjson if encoder == 'orjson' else None
+                    new_ms, _ = _best(new, args.repeat)
+                    results.append(f'{encoder} {new_ms:8.1f} ms ({old_ms / new_ms:4.1f}x)')
+                serialization.orjson = orjson
+                print(f'{label:<26} schema {old_ms:8.1f} ms | projection ' + ' | '.join(results))
+
+
+if __name__ == '__main__':
+    main()
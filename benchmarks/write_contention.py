@@ -0,0 +1,142 @@
+"""Write throughput of concurrent record_payment calls against one SQLite file
+
+Models a multi-worker deployment: --workers processes, each running --threads
+threads that call record_payment through the Flask test client, all against
+the same database file. Every profile gets a fresh temporary database:
+
+    python -m benchmarks.write_contention --workers 4 --threads 4 --payments 50
+
+'default' is the plain TestingConfig engine; 'production' is ProductionConfig
+with its SQLITE_PRAGMAS profile (WAL, synchronous=NORMAL, busy_timeout, ...).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+PROFILES = {'default': 'testing', 'production': 'production'}
+
+
+def seed(units):
+    """Child process: create the schema and one active lease per unit"""
+    from app import app, db
+    from models import Admin, Leases, Properties, Tenants, Units
+    from search import rebuild_search_index
+
+    with app.app_context():
+        db.create_all()
+        admin = Admin(username='bench', password='bench', gmail='bench@example.com')
+        db.session.add(admin)
+        db.session.flush()
+        prop = Properties(property_name='Bench Court', address='1 Bench Rd', city='Nairobi', state='Nairobi',
+                          zip_code='00100', admin_id=admin.admin_id)
+        db.session.add(prop)
+        db.session.flush()
+
+        for i in range(units):
+            unit = Units(property_id=prop.id, unit_number=str(i), unit_name=f'B{i}', status='occupied',
+                         monthly_rent=1000, deposit_amount=1000, admin_id=admin.admin_id, type='1br')
+            tenant = Tenants(first_name=f'Bench{i}', last_name='Tenant', email=f'bench{i}@example.com', phone='0',
+                             date_of_birth=date(1990, 1, 1), emergency_contact_name='x', emergency_contact_number='0',
+                             move_in_date=date(2024, 1, 1), admin_id=admin.admin_id, password='x')
+            db.session.add_all([unit, tenant])
+            db.session.flush()
+            db.session.add(Leases(tenant_id=tenant.id, unit_id=unit.unit_id, property_id=prop.id,
+                                  admin_id=admin.admin_id, start_date=date(2024, 1, 1), end_date=date(2030, 1, 1),
+                                  monthly_rent=1000, deposit_amount=1000, lease_status='active', payment_due_day=5))
+        db.session.commit()
+        rebuild_search_index()
+
+
+def drive(worker, threads, payments, start_at):
+    """Child process: call record_payment from `threads` threads, print latencies as JSON"""
+    from app import app, db
+
+    with app.app_context():
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def run(unit_id):
+        client = app.test_client()
+        time.sleep(max(0.0, start_at - time.time()))
+        for i in range(payments):
+            started = time.perf_counter()
+            response = client.post(f'/units/{unit_id}/record-payment', json={
+                'amount': 1000, 'payment_date': '2025-01-05', 'period_start': '2025-01-01',
+                'period_end': '2025-01-31', 'payment_method': 'mpesa', 'admin_id': 1,
+                'transaction_reference': f'BENCH{unit_id}-{i}',
+            })
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    failures.append(response.get_json().get('error', str(response.status_code))[:80])
+
+    pool = [threading.Thread(target=run, args=(worker * threads + i + 1,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    print(json.dumps({'journal_mode': journal_mode, 'latencies': latencies, 'failures': failures,
+                      'finished_at': time.time()}))
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = dict(os.environ, FLASK_ENV=PROFILES[profile], DATABASE_URL=url, TEST_DATABASE_URL=url,
+                   METRICS_DIR=os.path.join(tmp, 'metrics'), SQL_INSTRUMENTATION='0')
+        command = [sys.executable, '-m', 'benchmarks.write_contention']
+        subprocess.run(command + ['--seed', str(args.workers * args.threads)],
+                       env=env, capture_output=True, check=True)
+
+        # Start every worker's threads at the same moment, once all interpreters have loaded
+        start_at = time.time() + 3
+        children = [subprocess.Popen(command + ['--drive', str(worker), '--threads', str(args.threads),
+                                                '--payments', str(args.payments), '--start-at', str(start_at)],
+                                     env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                    for worker in range(args.workers)]
+        results = [json.loads(child.communicate()[0].strip().splitlines()[-1]) for child in children]
+
+    latencies = sorted(l for r in results for l in r['latencies'])
+    failures = [f for r in results for f in r['failures']]
+    wall = max(r['finished_at'] for r in results) - start_at
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0
+
+    print(f"{profile:<11} journal={results[0]['journal_mode']:<7} ok={len(latencies):<5} failed={len(failures):<5} "
+          f"{len(latencies) / wall:8.1f} writes/s  p50={pct(0.50):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms")
+    for error in sorted(set(failures))[:3]:
+        print(f'    {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker')
+    parser.add_argument('--payments', type=int, default=50, help='record_payment calls per thread')
+    parser.add_argument('--profile', choices=PROFILES, action='append', help='default: every profile')
+    parser.add_argument('--seed', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--drive', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        return seed(args.seed)
+    if args.drive is not None:
+        return drive(args.drive, args.threads, args.payments, args.start_at)
+
+    print(f'{args.workers} workers x {args.threads} threads x {args.payments} record_payment calls')
+    for profile in args.profile or PROFILES:
+        run_profile(profile, args)
+
+
+if __name__ == '__main__':
+    main()
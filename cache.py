@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+from sqlalchemy import event, select
+
+from app import db
+from etags import bump_versions, versions
+from routing import read_version
+
+
+class LRUCache:
+    """In-process cache with a size bound and per-entry TTL"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class RedisCache:
+    """Cache on any Redis-protocol server; shared by every worker process"""
+
+    def __init__(self, url):
+        import redis  # only needed for this backend
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, value, ex=int(ttl) if ttl else None)
+
+
+cache = None
+
+
+def _generation(admin_id):
+    # Generations live in the database rather than the backend, so every worker
+    # sees a bump the moment its transaction commits, whichever process made it
+    row = read_version(db, select(versions.c.version)
+                       .where(versions.c.entity == 'admin', versions.c.entity_id == admin_id))
+    return row[0] if row else 0
+
+
+def invalidate_admins(admin_ids):
+    """Drop every cached response for these admins once the current transaction commits"""
+    if cache is not None:
+        bump_versions(db.session.connection(), 'admin', admin_ids)
+
+
+def cached_admin_view(view):
+    """Cache a view's 200 responses per admin_id and query string until that admin's data changes"""
+    @wraps(view)
+    def wrapper(admin_id, **kwargs):
+        if cache is None:
+            return view(admin_id, **kwargs)
+
+        query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        key = f'rms:view:{request.endpoint}:{admin_id}:{_generation(admin_id)}:{query}'
+        body = cache.get(key)
+        if body is not None:
+            response = Response(body, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        response = make_response(view(admin_id, **kwargs))
+        if response.status_code == 200:
+            cache.set(key, response.get_data(), current_app.config.get('RESPONSE_CACHE_TTL'))
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+_tracked_models = ()
+
+
+def _bump_changed_admins(session, flush_context):
+    # Still inside the flush's transaction, so generations commit or roll back with the data
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    bump_versions(session.connection(), 'admin', {
+        obj.admin_id for obj in objects
+        if isinstance(obj, _tracked_models) and getattr(obj, 'admin_id', None) is not None
+    })
+
+
+def init_response_cache(app, db, tracked_models):
+    """Pick the backend from RESPONSE_CACHE and invalidate when commits touch `tracked_models`"""
+    global cache, _tracked_models
+    backend = app.config.get('RESPONSE_CACHE', 'lru')
+    if backend == 'lru':
+        cache = LRUCache(app.config.get('RESPONSE_CACHE_SIZE', 1024))
+    elif backend == 'redis':
+        cache = RedisCache(app.config['REDIS_URL'])
+    else:
+        cache = None
+        return
+
+    _tracked_models = tuple(tracked_models)
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_flush', _bump_changed_admins):
+        event.listen(session_class, 'after_flush', _bump_changed_admins)
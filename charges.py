@@ -0,0 +1,122 @@
+from calendar import monthrange
+from datetime import date
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from cache import invalidate_admins
+from etags import bump_versions
+from models import Leases, RentCharges
+from rollups import iter_months, year_month
+
+
+def period_bounds(period):
+    """First and last day of a YYYYMM period"""
+    year, month = divmod(period, 100)
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def next_period(period):
+    year, month = divmod(period, 100)
+    return year * 100 + month + 1 if month < 12 else (year + 1) * 100 + 1
+
+
+def due_date(period, payment_due_day):
+    """The lease's due day within the period, moved to the last day in shorter months"""
+    first, last = period_bounds(period)
+    return first.replace(day=min(payment_due_day, last.day))
+
+
+def generate_charges(first_period, last_period=None, lease_ids=None):
+    """Create the missing rent charges of every lease for the months of its term in the range
+
+    Existing (lease, period) charges are left alone, so the range can be
+    regenerated at will, and a first month's charge is never due before the
+    lease starts. Runs in the caller's transaction and returns the rows it
+    inserted.
+    """
+    first_day, last_day = period_bounds(first_period)[0], period_bounds(last_period or first_period)[1]
+    leases = select(
+        Leases.lease_id, Leases.tenant_id, Leases.admin_id, Leases.start_date, Leases.end_date,
+        Leases.monthly_rent, Leases.payment_due_day
+    ).where(Leases.start_date <= last_day, Leases.end_date >= first_day)
+    if lease_ids is not None:
+        leases = leases.where(Leases.lease_id.in_(lease_ids))
+    leases = db.session.execute(leases).all()
+    if not leases:
+        return []
+
+    existing = select(RentCharges.lease_id, RentCharges.period)\
+        .where(RentCharges.period.between(year_month(first_day), year_month(last_day)))
+    if lease_ids is not None:
+        existing = existing.where(RentCharges.lease_id.in_(lease_ids))
+    existing = set(db.session.execute(existing))
+    rows = [
+        {'lease_id': lease.lease_id, 'tenant_id': lease.tenant_id, 'admin_id': lease.admin_id, 'period': period,
+         'due_date': max(due_date(period, lease.payment_due_day), lease.start_date), 'amount': lease.monthly_rent}
+        for lease in leases
+        for period in iter_months(max(lease.start_date, first_day), min(lease.end_date, last_day))
+        if (lease.lease_id, period) not in existing
+    ]
+    if not rows:
+        return []
+
+    dialect = db.session.get_bind().dialect.name
+    stmt = insert(RentCharges)
+    if dialect in ('sqlite', 'postgresql'):
+        # A concurrent run may have inserted some of them since the read above
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(RentCharges).on_conflict_do_nothing(index_elements=['lease_id', 'period'])
+    db.session.execute(stmt, rows)
+    # Balances and due dates on the tenant portal come from charges
+    bump_versions(db.session.connection(), 'tenant', {row['tenant_id'] for row in rows})
+    invalidate_admins({row['admin_id'] for row in rows})
+    return rows
+
+
+def charge_periods(first_period, last_period):
+    """Generate every lease's charges month by month, one transaction each; returns the number created"""
+    created, period = 0, first_period
+    while period <= last_period:
+        rows = generate_charges(period)
+        db.session.commit()
+        created += len(rows)
+        period = next_period(period)
+    return created
+
+
+def charge_upcoming_periods(today=None):
+    """Generate the current and next month's charges for every lease
+
+    Charging a month ahead lets upcoming-due lookups see the next due date
+    as soon as this month's has passed.
+    """
+    current = year_month(today or date.today())
+    return charge_periods(current, next_period(current))
+
+
+def drop_charges_after(lease):
+    """Delete a lease's charges for months after its (shortened) end date"""
+    RentCharges.query.filter(
+        RentCharges.lease_id == lease.lease_id, RentCharges.period > year_month(lease.end_date)
+    ).delete(synchronize_session=False)
+
+
+def regenerate_charges(lease, today=None):
+    """Replace a lease's charges after its term, rent or due day changed
+
+    Past months are rebuilt as well, up to next month like
+    charge_upcoming_periods. Runs in the caller's transaction and returns
+    the rows inserted.
+    """
+    RentCharges.query.filter(RentCharges.lease_id == lease.lease_id).delete(synchronize_session=False)
+    current = year_month(today or date.today())
+    return generate_charges(year_month(lease.start_date), next_period(current), [lease.lease_id])
+
+
+def next_due_date(lease_id, today):
+    """The lease's next charge due on or after today, or None"""
+    return db.session.query(func.min(RentCharges.due_date)).filter(
+        RentCharges.lease_id == lease_id, RentCharges.due_date >= today
+    ).scalar()
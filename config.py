@@ -26,6 +26,35 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key')
     JSONIFY_PRETTYPRINT_REGULAR = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Per-request SQL instrumentation (Server-Timing header + over-budget logging)
+    SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', '1') == '1'
+    QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', 20))
+    LATENCY_BUDGET_MS = float(os.getenv('LATENCY_BUDGET_MS', 500))
+    # Prometheus /metrics; every worker process must share the same METRICS_DIR
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    # Payment search: 'fts5' (SQLite full-text index, falls back to 'like' when missing) or 'like'
+    PAYMENT_SEARCH_BACKEND = os.getenv('PAYMENT_SEARCH_BACKEND', 'fts5')
+    # SQLite connection tuning, applied by sqlite_profile as each connection opens
+    SQLITE_PRAGMAS = {}
+    # Optional read replica: read-only requests use this bind, writes stay on the primary
+    REPLICA_BIND = 'replica'
+    SQLALCHEMY_BINDS = {REPLICA_BIND: os.getenv('REPLICA_DATABASE_URL')} if os.getenv('REPLICA_DATABASE_URL') else {}
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    # Admin dashboard response cache: 'lru' (per process), 'redis' (shared, needs REDIS_URL) or 'none';
+    # either way the generations that invalidate it are kept in entity_versions, shared by every worker
+    RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'lru')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    # Incremental columnar exports re-read rows this many seconds before their watermark
+    EXPORT_WATERMARK_OVERLAP = int(os.getenv('EXPORT_WATERMARK_OVERLAP', 60))
+    # In-process job scheduler; every worker may run it, a lock row picks one runner per job
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', '0') == '1'
+    SCHEDULER_TICK_SECONDS = int(os.getenv('SCHEDULER_TICK_SECONDS', 30))
+    SCHEDULER_LOCK_SECONDS = int(os.getenv('SCHEDULER_LOCK_SECONDS', 600))
+    # Payments and maintenance requests move to the archive tables this long after their lease ends
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
 
 class DevelopmentConfig(Config):
    DEBUG = True
@@ -37,6 +66,23 @@ class TestingConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f'sqlite:///{db_path}')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    }
+    # WAL lets readers run alongside the single writer; writers queue on busy_timeout
+    # instead of failing with "database is locked". Ignored for non-SQLite databases.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 10000)),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+        'temp_store': 'MEMORY',
+    }
+    # Run lease expiry and the nightly maintenance jobs inside the web workers
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', '1') == '1'
 config_by_name = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
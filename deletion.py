@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+
+from app import db
+from cache import invalidate_admins
+from etags import bump_versions
+from models import (Expenses, LeaseLedgers, Leases, MaintenanceRequests, MaintenanceRequestsArchive,
+                    MonthlyRentRollups, Properties, RentCharges, RentPayments, RentPaymentsArchive, Units)
+from rollups import rebuild_rollups
+
+# Tables keyed by lease, deleted before the leases themselves
+LEASE_CHILDREN = (RentCharges, LeaseLedgers, RentPayments, RentPaymentsArchive, MaintenanceRequests,
+                  MaintenanceRequestsArchive, Expenses)
+
+
+def _delete(model, criterion):
+    return db.session.execute(
+        delete(model).where(criterion).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _purge_units(unit_ids):
+    """Delete units with their leases and every row keyed by those leases
+
+    `unit_ids` is a select of unit ids, so each table is cleared with one
+    DELETE however many units, leases and payments there are. Runs in the
+    caller's transaction; returns the number of rows deleted per table.
+    """
+    lease_ids = select(Leases.lease_id).where(Leases.unit_id.in_(unit_ids))
+    tenant_ids = set(db.session.execute(select(Leases.tenant_id).where(Leases.unit_id.in_(unit_ids))).scalars())
+
+    counts = {model.__tablename__: _delete(model, model.lease_id.in_(lease_ids)) for model in LEASE_CHILDREN}
+    counts['leases'] = _delete(Leases, Leases.unit_id.in_(unit_ids))
+    counts['units'] = _delete(Units, Units.unit_id.in_(unit_ids))
+    # Set-based deletes skip the flush hooks that version the tenant portal
+    bump_versions(db.session.connection(), 'tenant', tenant_ids)
+    return counts
+
+
+def purge_property(property):
+    """Delete a property, its units and all of their history, then commit"""
+    admin_id, property_id = property.admin_id, property.id
+    counts = _purge_units(select(Units.unit_id).where(Units.property_id == property_id))
+    counts['monthly_rent_rollups'] = _delete(MonthlyRentRollups, MonthlyRentRollups.property_id == property_id)
+    counts['properties'] = _delete(Properties, Properties.id == property_id)
+    invalidate_admins([admin_id])
+    db.session.commit()
+    return counts
+
+
+def purge_unit(unit):
+    """Delete a unit and all of its history, recompute its property's rollups, then commit"""
+    admin_id, property_id = unit.admin_id, unit.property_id
+    counts = _purge_units(select(Units.unit_id).where(Units.unit_id == unit.unit_id))
+    rebuild_rollups(property_id=property_id, commit=False)
+    invalidate_admins([admin_id])
+    db.session.commit()
+    return counts
+
+
+def _has_active_lease(unit_ids):
+    return db.session.query(
+        select(Leases.lease_id).where(Leases.unit_id.in_(unit_ids), Leases.lease_status == 'active').exists()
+    ).scalar()
+
+
+def archive_property(property):
+    """Hide a property and its units from listings, keeping all history; False if a lease is still active
+
+    One UPDATE for the units and one for the property, so the write lock is
+    held only briefly however much history the property has.
+    """
+    units = select(Units.unit_id).where(Units.property_id == property.id)
+    if _has_active_lease(units):
+        return False
+    now = datetime.utcnow()
+    db.session.execute(
+        update(Units).where(Units.property_id == property.id, Units.deleted_at.is_(None))
+        .values(deleted_at=now).execution_options(synchronize_session=False)
+    )
+    property.deleted_at = now
+    db.session.commit()
+    return True
+
+
+def archive_unit(unit):
+    """Hide a unit from listings, keeping all history; False if it still has an active lease"""
+    if _has_active_lease([unit.unit_id]):
+        return False
+    unit.deleted_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def purge_archived(before):
+    """Hard-delete properties and units archived before `before`, one transaction each; returns how many"""
+    purged = 0
+    for property in Properties.query.filter(Properties.deleted_at < before).all():
+        purge_property(property)
+        purged += 1
+    for unit in Units.query.filter(Units.deleted_at < before).all():
+        purge_unit(unit)
+        purged += 1
+    return purged
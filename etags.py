@@ -0,0 +1,114 @@
+import json
+import urllib.parse
+from datetime import date
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import and_, event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from models import EntityVersions, Leases, MaintenanceRequests, Properties, RentPayments, Tenants, Units
+from routing import read_version
+
+versions = EntityVersions.__table__
+
+
+def _changed_tenant_ids(session, objects):
+    """Tenants whose portal screens show any of the flushed objects"""
+    tenant_ids, unit_ids, property_ids = set(), set(), set()
+    for obj in objects:
+        if isinstance(obj, Tenants):
+            tenant_ids.add(obj.id)
+        elif isinstance(obj, (Leases, RentPayments, MaintenanceRequests)):
+            tenant_ids.add(obj.tenant_id)
+        elif isinstance(obj, Units):
+            unit_ids.add(obj.unit_id)
+        elif isinstance(obj, Properties):
+            property_ids.add(obj.id)
+
+    # Unit and property edits are rare but show on every tenant leasing them;
+    # leases.property_id has no index, so properties are resolved to their units first
+    if property_ids:
+        unit_ids.update(session.connection().execute(
+            select(Units.unit_id).where(Units.property_id.in_(property_ids))
+        ).scalars())
+    if unit_ids:
+        rows = session.connection().execute(select(Leases.tenant_id).where(Leases.unit_id.in_(unit_ids)))
+        tenant_ids.update(tenant_id for tenant_id, in rows)
+    tenant_ids.discard(None)
+    return tenant_ids
+
+
+def bump_versions(connection, entity, entity_ids):
+    """Increment the version of each entity, creating counters that do not exist yet"""
+    entity_ids = sorted(entity_ids)
+    if not entity_ids:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(versions).values([{'entity': entity, 'entity_id': i, 'version': 1} for i in entity_ids])
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['entity', 'entity_id'], set_={'version': versions.c.version + 1}
+        ))
+        return
+
+    for entity_id in entity_ids:
+        key = and_(versions.c.entity == entity, versions.c.entity_id == entity_id)
+        if connection.execute(update(versions).where(key).values(version=versions.c.version + 1)).rowcount == 0:
+            connection.execute(versions.insert().values(entity=entity, entity_id=entity_id, version=1))
+
+
+def _bump_after_flush(session, flush_context):
+    # Still inside the flush's transaction, so versions commit or roll back with the data
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    bump_versions(session.connection(), 'tenant', _changed_tenant_ids(session, objects))
+
+
+def _cookie_email():
+    try:
+        session_data = json.loads(urllib.parse.unquote(request.cookies.get('user', '')))
+    except ValueError:
+        return None
+    if not isinstance(session_data, dict) or session_data.get('role') != 'tenant':
+        return None
+    return session_data.get('email')
+
+
+def tenant_view_etag(email):
+    """Weak ETag for a tenant's portal screens from a single indexed lookup, or None"""
+    row = read_version(db, select(Tenants.id, func.coalesce(versions.c.version, 0))
+                       .outerjoin(versions, and_(versions.c.entity == 'tenant', versions.c.entity_id == Tenants.id))
+                       .where(Tenants.email == email))
+    if row is None:
+        return None
+    # Balances and upcoming dates depend on today, so the tag also rolls over daily
+    return f'tenant-{row[0]}-v{row[1]}-{date.today().isoformat()}'
+
+
+def conditional_tenant_view(view):
+    """Answer 304 Not Modified when the tenant's data has not changed since If-None-Match"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        email = _cookie_email()
+        etag = tenant_view_etag(email) if email else None
+        if etag is None:
+            return view(*args, **kwargs)
+
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+
+def init_entity_versions():
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_flush', _bump_after_flush):
+        event.listen(session_class, 'after_flush', _bump_after_flush)
@@ -0,0 +1,63 @@
+from datetime import date
+
+from sqlalchemy import and_, exists, func, select, update
+from sqlalchemy.orm import aliased
+
+from app import db
+from cache import invalidate_admins
+from etags import bump_versions
+from models import Leases, Tenants, Units
+
+
+def _expired(today):
+    return and_(Leases.lease_status == 'active', Leases.end_date <= today)
+
+
+def _holds_current_lease(lease_column, column, today):
+    """Whether the unit or tenant in `column` still has an active lease that is not expiring"""
+    other = aliased(Leases)
+    return exists().where(
+        getattr(other, lease_column) == column, other.lease_status == 'active', other.end_date > today
+    )
+
+
+def expire_leases(today=None):
+    """End every active lease whose end date has passed; returns the number ended
+
+    Units are vacated and tenants get their lease's end date as move_out_date
+    unless they hold another current lease. A lease's term does not change
+    when it expires, so the monthly rollups need no adjustment.
+    """
+    today = today or date.today()
+    expired = _expired(today)
+    affected = db.session.execute(
+        select(Leases.tenant_id, Leases.admin_id).where(expired).distinct()
+    ).all()
+    if not affected:
+        return 0
+
+    db.session.execute(
+        update(Units)
+        .where(Units.unit_id.in_(select(Leases.unit_id).where(expired)),
+               ~_holds_current_lease('unit_id', Units.unit_id, today))
+        .values(status='vacant')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Tenants)
+        .where(Tenants.id.in_(select(Leases.tenant_id).where(expired)),
+               ~_holds_current_lease('tenant_id', Tenants.id, today))
+        .values(move_out_date=select(func.max(Leases.end_date))
+                .where(expired, Leases.tenant_id == Tenants.id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+    ended = db.session.execute(
+        update(Leases).where(expired).values(lease_status='ended')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # Bulk UPDATEs skip the flush hooks, so bump ETags and drop cached views here
+    bump_versions(db.session.connection(), 'tenant', {tenant_id for tenant_id, _ in affected})
+    invalidate_admins({admin_id for _, admin_id in affected})
+    db.session.commit()
+    return ended
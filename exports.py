@@ -0,0 +1,165 @@
+import json
+import os
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+from sqlalchemy import select, union_all
+
+from app import db
+from archival import ARCHIVES
+from models import Expenses, Leases, MaintenanceRequests, RentPayments
+from rollups import year_month
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional; only the columnar exports need it
+    pyarrow = None
+
+# Rows fetched and written per record batch (one Parquet row group)
+COLUMNAR_BATCH_SIZE = 50000
+FORMATS = ('parquet', 'arrow')
+WATERMARKS_FILE = '_watermarks.json'
+
+# Exported table -> (model, date column whose month picks the year_month partition)
+EXPORTS = {
+    'rent_payments': (RentPayments, RentPayments.payment_date),
+    'leases': (Leases, Leases.start_date),
+    'expenses': (Expenses, Expenses.expense_date),
+    'maintenance_requests': (MaintenanceRequests, MaintenanceRequests.request_date),
+}
+
+
+def _arrow_type(column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return pyarrow.timestamp('us')
+    return {
+        int: pyarrow.int64(),
+        float: pyarrow.float64(),
+        str: pyarrow.string(),
+        bool: pyarrow.bool_(),
+        date: pyarrow.date32(),
+    }[python_type]
+
+
+def arrow_schema(model):
+    return pyarrow.schema([
+        pyarrow.field(column.name, _arrow_type(column), nullable=column.nullable)
+        for column in model.__table__.columns
+    ])
+
+
+class _PartitionWriter:
+    """One year_month partition file, moved into place only once it is complete"""
+
+    def __init__(self, path, schema, fmt):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._partial = path + '.partial'
+        self._sink = None
+        if fmt == 'parquet':
+            self._writer = pyarrow.parquet.ParquetWriter(self._partial, schema)
+        else:
+            self._sink = pyarrow.OSFile(self._partial, 'wb')
+            self._writer = pyarrow.ipc.new_file(self._sink, schema)
+
+    def write(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        os.replace(self._partial, self.path)
+
+
+def _scope(admin_id):
+    return 'all' if admin_id is None else f'admin-{admin_id}'
+
+
+def read_watermarks(out_dir):
+    try:
+        with open(os.path.join(out_dir, WATERMARKS_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_watermark(out_dir, table, admin_id, watermark):
+    watermarks = read_watermarks(out_dir)
+    watermarks.setdefault(table, {})[_scope(admin_id)] = watermark.isoformat()
+    path = os.path.join(out_dir, WATERMARKS_FILE)
+    with open(path + '.partial', 'w') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(path + '.partial', path)
+
+
+def export_table(table, out_dir, admin_id=None, incremental=False, fmt='parquet',
+                 batch_size=COLUMNAR_BATCH_SIZE, overlap_seconds=0):
+    """Write one table to <out_dir>/<table>/year_month=YYYYMM/part-<run>.<fmt>
+
+    A full export writes every row; an incremental one only rows whose
+    updated_at is past the watermark the last export of the same table and
+    admin scope left in <out_dir>/_watermarks.json, less overlap_seconds to
+    catch transactions that committed late. Rows are appended as new part
+    files, so readers keep the latest row per primary key by updated_at.
+    Deleted rows are not tracked; archived payments and maintenance
+    requests are read from their archive tables too (archiving keeps
+    updated_at, so it does not make rows look changed). Returns (rows, files)
+    written.
+    """
+    if pyarrow is None:
+        raise RuntimeError('Columnar exports need pyarrow: pip install pyarrow')
+
+    model, partition_column = EXPORTS[table]
+    table_columns = model.__table__.columns
+    names = [column.name for column in table_columns]
+    schema = arrow_schema(model)
+    partition_index, updated_index = names.index(partition_column.key), names.index('updated_at')
+
+    since = None
+    if incremental:
+        watermark = read_watermarks(out_dir).get(table, {}).get(_scope(admin_id))
+        if watermark is not None:
+            since = datetime.fromisoformat(watermark) - timedelta(seconds=overlap_seconds)
+
+    selects = []
+    for source in [model] + ([ARCHIVES[model]] if model in ARCHIVES else []):
+        query = select(*[source.__table__.c[name] for name in names])
+        if admin_id is not None:
+            query = query.where(source.admin_id == admin_id)
+        if since is not None:
+            query = query.where(source.updated_at > since)
+        selects.append(query)
+    exported = union_all(*selects).subquery()
+    # Ordering by partition means each partition file is finished before the next one opens
+    stmt = select(exported).order_by(
+        exported.c[partition_column.key], *[exported.c[c.name] for c in model.__table__.primary_key.columns]
+    )
+
+    run = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    writer, current, files, rows, newest = None, None, 0, 0, None
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for chunk in result.partitions():
+        for partition, group in groupby(chunk, key=lambda row: year_month(row[partition_index])):
+            if partition != current:
+                if writer is not None:
+                    writer.close()
+                path = os.path.join(out_dir, table, f'year_month={partition}', f'part-{run}.{fmt}')
+                writer, current = _PartitionWriter(path, schema, fmt), partition
+                files += 1
+            values = list(zip(*group))
+            writer.write(pyarrow.record_batch(
+                [pyarrow.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema
+            ))
+            rows += len(values[0])
+            changed = max(values[updated_index])
+            newest = changed if newest is None else max(newest, changed)
+    if writer is not None:
+        writer.close()
+
+    if newest is not None:
+        _save_watermark(out_dir, table, admin_id, newest)
+    return rows, files
@@ -0,0 +1,64 @@
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if has_request_context() and 'db_statements' in g:
+        g.db_statements += 1
+        g.db_time += elapsed
+
+
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get('query_start_time'):
+        context.connection.info['query_start_time'].pop()
+
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+    g.db_statements = 0
+    g.db_time = 0.0
+
+
+def _add_server_timing(response):
+    if 'request_start' not in g:
+        return response
+
+    total_ms = (time.perf_counter() - g.request_start) * 1000
+    db_ms = g.db_time * 1000
+    app_ms = max(total_ms - db_ms, 0)
+
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={db_ms:.2f};desc="{g.db_statements} queries", app;dur={app_ms:.2f}, queries;desc="{g.db_statements}"'
+    )
+
+    query_budget = current_app.config.get('QUERY_BUDGET')
+    latency_budget = current_app.config.get('LATENCY_BUDGET_MS')
+    over_queries = query_budget is not None and g.db_statements > query_budget
+    over_latency = latency_budget is not None and total_ms > latency_budget
+    if over_queries or over_latency:
+        current_app.logger.warning(
+            "Request over budget: %s %s (endpoint=%s) took %.1fms with %d queries (%.1fms in db)",
+            request.method, request.path, request.endpoint, total_ms, g.db_statements, db_ms
+        )
+    return response
+
+
+def init_instrumentation(app):
+    """Count SQL statements and DB time per request and report them as Server-Timing"""
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    app.before_request(_start_timer)
+    app.after_request(_add_server_timing)
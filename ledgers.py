@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from sqlalchemy import case, func, insert
+
+from app import db
+from archival import with_archive
+from models import LeaseLedgers, RentCharges, RentPayments
+from rollups import increment, lock_for_rebuild
+
+
+def apply_payment_to_ledger(payment, sign=1):
+    """Add (sign=1) or remove (sign=-1) a payment from its lease's running totals"""
+    amount = float(payment.amount)
+    if payment.status == 'completed':
+        deltas = {'total_paid': sign * amount, 'completed_count': sign}
+    elif payment.status == 'pending':
+        deltas = {'total_pending': sign * amount}
+    else:
+        return
+    increment(LeaseLedgers, {'lease_id': payment.lease_id}, **deltas)
+
+
+def lease_payment_status(lease, ledger=None, today=None):
+    """Balance summary for a lease from its ledger and the charges that have fallen due"""
+    if ledger is None:
+        ledger = db.session.get(LeaseLedgers, lease.lease_id)
+    today = today or datetime.today().date()
+    total_paid = ledger.total_paid if ledger else 0
+
+    months_due, expected_total = db.session.query(
+        func.count(RentCharges.charge_id), func.coalesce(func.sum(RentCharges.amount), 0)
+    ).filter(RentCharges.lease_id == lease.lease_id, RentCharges.due_date <= today).one()
+    # A rent-free lease is never behind
+    months_paid = total_paid // lease.monthly_rent if lease.monthly_rent else months_due
+
+    return {
+        'total_months': months_due,
+        'expected_total_rent': expected_total,
+        'total_paid': total_paid,
+        'balance_due': expected_total - total_paid,
+        'months_behind': months_due - months_paid
+    }
+
+
+def _ledger_totals_query():
+    payments = with_archive(RentPayments, 'lease_id', 'status', 'amount')
+    return db.session.query(
+        payments.c.lease_id,
+        func.sum(case((payments.c.status == 'completed', payments.c.amount), else_=0)).label('total_paid'),
+        func.sum(case((payments.c.status == 'pending', payments.c.amount), else_=0)).label('total_pending'),
+        func.sum(case((payments.c.status == 'completed', 1), else_=0)).label('completed_count')
+    ).group_by(payments.c.lease_id)
+
+
+def find_ledger_drift(tolerance=0.005):
+    """Compare every ledger with totals recomputed from raw payments
+
+    Returns a list of (lease_id, stored, actual) tuples for leases whose
+    ledger does not match.
+    """
+    actual = {row.lease_id: (row.total_paid or 0, row.total_pending or 0, row.completed_count or 0)
+              for row in _ledger_totals_query()}
+    stored = {row.lease_id: (row.total_paid, row.total_pending, row.completed_count)
+              for row in LeaseLedgers.query}
+
+    drift = []
+    for lease_id in sorted(set(actual) | set(stored)):
+        have = stored.get(lease_id, (0, 0, 0))
+        want = actual.get(lease_id, (0, 0, 0))
+        if any(abs(h - w) > tolerance for h, w in zip(have, want)):
+            drift.append((lease_id, have, want))
+    return drift
+
+
+def rebuild_ledgers():
+    """Recompute every ledger from raw payments; returns the number of ledgers written"""
+    # Delete before reading, as rebuild_rollups does, so no payment commits in between
+    lock_for_rebuild(LeaseLedgers)
+    LeaseLedgers.query.delete(synchronize_session=False)
+    values = [{'lease_id': row.lease_id,
+               'total_paid': row.total_paid or 0,
+               'total_pending': row.total_pending or 0,
+               'completed_count': row.completed_count or 0}
+              for row in _ledger_totals_query()]
+    if values:
+        db.session.execute(insert(LeaseLedgers), values)
+    db.session.commit()
+    return len(values)
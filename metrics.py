@@ -0,0 +1,233 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# name -> (type, help)
+METRICS = {
+    'rms_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status code.'),
+    'rms_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.'),
+    'rms_http_requests_in_flight': ('gauge', 'HTTP requests currently being served.'),
+    'rms_db_statements_total': ('counter', 'SQL statements executed by endpoint.'),
+    'rms_db_duration_seconds_total': ('counter', 'Time spent executing SQL by endpoint.'),
+    'rms_db_pool_checkout_wait_seconds': ('histogram', 'Time spent waiting for a pooled DB connection.'),
+}
+
+
+class MmapValues:
+    """Per-process file of float values that other processes can read
+
+    Layout: a 4-byte used-length header, then entries of
+    (4-byte key length, utf-8 key padded to 8 bytes, 8-byte double).
+    Values are updated in place, so readers see them without any flush.
+    """
+
+    _INITIAL_SIZE = 1024 * 1024
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._path = path
+        self._f = open(path, 'a+b')
+        if os.fstat(self._f.fileno()).st_size == 0:
+            self._f.truncate(self._INITIAL_SIZE)
+        self._capacity = os.fstat(self._f.fileno()).st_size
+        self._m = mmap.mmap(self._f.fileno(), self._capacity)
+        self._positions = {}
+        self._used = struct.unpack_from('i', self._m, 0)[0] or 8
+        for key, _, pos in _read_entries(self._m, self._used):
+            self._positions[key] = pos
+
+    def _init_key(self, key):
+        encoded = key.encode('utf-8')
+        padded = encoded + b' ' * (8 - (len(encoded) + 4) % 8)
+        entry = struct.pack(f'i{len(padded)}sd', len(encoded), padded, 0.0)
+        while self._used + len(entry) > self._capacity:
+            self._capacity *= 2
+            self._f.truncate(self._capacity)
+            self._m.close()
+            self._m = mmap.mmap(self._f.fileno(), self._capacity)
+        self._m[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        struct.pack_into('i', self._m, 0, self._used)
+        self._positions[key] = self._used - 8
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            if key not in self._positions:
+                self._init_key(key)
+            pos = self._positions[key]
+            value = struct.unpack_from('d', self._m, pos)[0]
+            struct.pack_into('d', self._m, pos, value + amount)
+
+
+def _read_entries(data, used):
+    pos = 8
+    while pos < used:
+        length = struct.unpack_from('i', data, pos)[0]
+        key = bytes(data[pos + 4:pos + 4 + length]).decode('utf-8')
+        pos += 4 + length + (8 - (length + 4) % 8)
+        yield key, struct.unpack_from('d', data, pos)[0], pos
+        pos += 8
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsStore:
+    """File-backed metric values shared by every worker process using the same directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._values = None
+        self._pid = None
+
+    def _local(self):
+        # Re-open after a fork so every worker writes to its own file
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._values = MmapValues(os.path.join(self.directory, f'rms_{self._pid}.db'))
+        return self._values
+
+    def inc(self, name, labels=None, amount=1.0, sample=None):
+        key = json.dumps([name, sample or name, sorted((labels or {}).items())])
+        self._local().inc(key, amount)
+
+    def observe(self, name, value, buckets, labels=None):
+        labels = labels or {}
+        for bound in buckets:
+            if value <= bound:
+                self.inc(name, dict(labels, le=str(bound)), sample=f'{name}_bucket')
+        self.inc(name, dict(labels, le='+Inf'), sample=f'{name}_bucket')
+        self.inc(name, labels, value, sample=f'{name}_sum')
+        self.inc(name, labels, sample=f'{name}_count')
+
+    def collect(self):
+        """Sum values across every process file; gauges only count live processes"""
+        totals = {}
+        for path in glob.glob(os.path.join(self.directory, 'rms_*.db')):
+            pid = int(os.path.basename(path)[4:-3])
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < 8:
+                continue
+            used = struct.unpack_from('i', data, 0)[0]
+            for key, value, _ in _read_entries(data, used):
+                name, sample, labels = json.loads(key)
+                if METRICS.get(name, ('counter',))[0] == 'gauge' and not _pid_alive(pid):
+                    continue
+                sample_key = (name, sample, tuple(tuple(pair) for pair in labels))
+                totals[sample_key] = totals.get(sample_key, 0.0) + value
+        return totals
+
+    def render(self):
+        """Prometheus text exposition format"""
+        totals = self.collect()
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            samples = sorted(((k, v) for k, v in totals.items() if k[0] == name), key=_sample_order)
+            for (_, sample, labels), value in samples:
+                label_text = ','.join(
+                    '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels
+                )
+                lines.append(f'{sample}{{{label_text}}} {value:g}' if label_text else f'{sample} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def _sample_order(item):
+    (_, sample, labels), _ = item
+    # Histogram buckets read best in ascending le order, with +Inf last
+    return sample, [(k, float(v) if k == 'le' else 0, v if k != 'le' else '') for k, v in labels]
+
+
+store = None
+
+
+def _endpoint_label():
+    return request.endpoint or 'unmatched'
+
+
+def _request_started():
+    g.metrics_start = time.perf_counter()
+    g.metrics_in_flight = True
+    store.inc('rms_http_requests_in_flight')
+
+
+def _request_finished(response):
+    if 'metrics_start' not in g:
+        return response
+    endpoint = _endpoint_label()
+    duration = time.perf_counter() - g.metrics_start
+
+    store.inc('rms_http_requests_total', {
+        'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)
+    })
+    store.observe('rms_http_request_duration_seconds', duration, LATENCY_BUCKETS, {'endpoint': endpoint})
+    if 'db_statements' in g:
+        store.inc('rms_db_statements_total', {'endpoint': endpoint}, g.db_statements)
+        store.inc('rms_db_duration_seconds_total', {'endpoint': endpoint}, g.db_time)
+    return response
+
+
+def _request_teardown(exc):
+    if g.pop('metrics_in_flight', False):
+        store.inc('rms_http_requests_in_flight', amount=-1)
+
+
+def _time_pool_checkouts(engine):
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            store.observe('rms_db_pool_checkout_wait_seconds', time.perf_counter() - start, POOL_WAIT_BUCKETS)
+
+    pool.connect = timed_connect
+
+
+def metrics_view():
+    return Response(store.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app, db):
+    """Expose /metrics and record per-request metrics into a multi-process store"""
+    global store
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    directory = app.config.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'rms_metrics')
+    store = MetricsStore(directory)
+
+    app.before_request(_request_started)
+    app.after_request(_request_finished)
+    app.teardown_request(_request_teardown)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _time_pool_checkouts(engine)
+    if not event.contains(Engine, 'engine_disposed', _time_pool_checkouts):
+        # dispose() swaps in a fresh pool, so wrap the new one too
+        event.listen(Engine, 'engine_disposed', _time_pool_checkouts)
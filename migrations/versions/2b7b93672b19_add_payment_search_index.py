@@ -0,0 +1,87 @@
+"""add payment search index
+
+Revision ID: 2b7b93672b19
+Revises: 88bc6f9207dd
+Create Date: 2026-10-18 14:05:37.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7b93672b19'
+down_revision = '88bc6f9207dd'
+branch_labels = None
+depends_on = None
+
+PAYMENT_SEARCH_ROW = (
+    "SELECT {id}.payment_id, {id}.admin_id, t.first_name || ' ' || t.last_name, u.unit_name, p.property_name, "
+    "{id}.transaction_reference_number "
+    "FROM leases l JOIN units u ON u.unit_id = l.unit_id JOIN properties p ON p.id = u.property_id "
+    "JOIN tenants t ON t.id = {id}.tenant_id WHERE l.lease_id = {id}.lease_id"
+)
+INSERT_PAYMENT_SEARCH = (
+    "INSERT INTO payment_search (rowid, admin_id, tenant_name, unit_name, property_name, reference) "
+)
+
+TRIGGERS = {
+    'payment_search_ai': "AFTER INSERT ON rent_payments BEGIN "
+        + INSERT_PAYMENT_SEARCH + PAYMENT_SEARCH_ROW.format(id='new') + "; END",
+    'payment_search_ad': "AFTER DELETE ON rent_payments BEGIN "
+        "DELETE FROM payment_search WHERE rowid = old.payment_id; END",
+    'payment_search_au': "AFTER UPDATE OF admin_id, tenant_id, lease_id, transaction_reference_number "
+        "ON rent_payments BEGIN "
+        "DELETE FROM payment_search WHERE rowid = old.payment_id; "
+        + INSERT_PAYMENT_SEARCH + PAYMENT_SEARCH_ROW.format(id='new') + "; END",
+    'payment_search_tenant_au': "AFTER UPDATE OF first_name, last_name ON tenants BEGIN "
+        "UPDATE payment_search SET tenant_name = new.first_name || ' ' || new.last_name "
+        "WHERE rowid IN (SELECT payment_id FROM rent_payments WHERE tenant_id = new.id); END",
+    'payment_search_unit_au': "AFTER UPDATE OF unit_name ON units BEGIN "
+        "UPDATE payment_search SET unit_name = new.unit_name "
+        "WHERE rowid IN (SELECT rp.payment_id FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id "
+        "WHERE l.unit_id = new.unit_id); END",
+    'payment_search_property_au': "AFTER UPDATE OF property_name ON properties BEGIN "
+        "UPDATE payment_search SET property_name = new.property_name "
+        "WHERE rowid IN (SELECT rp.payment_id FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id "
+        "JOIN units u ON u.unit_id = l.unit_id WHERE u.property_id = new.id); END",
+    'payment_search_lease_au': "AFTER UPDATE OF unit_id ON leases BEGIN "
+        "UPDATE payment_search SET unit_name = u.unit_name, property_name = p.property_name "
+        "FROM units u JOIN properties p ON p.id = u.property_id "
+        "WHERE u.unit_id = new.unit_id "
+        "AND payment_search.rowid IN (SELECT payment_id FROM rent_payments WHERE lease_id = new.lease_id); END",
+}
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases keep using the LIKE search backend
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    bind.execute(text(
+        "CREATE VIRTUAL TABLE payment_search USING fts5("
+        "admin_id UNINDEXED, tenant_name, unit_name, property_name, reference, tokenize='trigram')"
+    ))
+    for name, body in TRIGGERS.items():
+        bind.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+    # Backfill from the existing payments
+    bind.execute(text(
+        INSERT_PAYMENT_SEARCH
+        + "SELECT rp.payment_id, rp.admin_id, t.first_name || ' ' || t.last_name, u.unit_name, p.property_name, "
+        "rp.transaction_reference_number "
+        "FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id JOIN units u ON u.unit_id = l.unit_id "
+        "JOIN properties p ON p.id = u.property_id JOIN tenants t ON t.id = rp.tenant_id"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    for name in TRIGGERS:
+        bind.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    bind.execute(text("DROP TABLE IF EXISTS payment_search"))
@@ -0,0 +1,69 @@
+"""add updated_at for incremental exports
+
+Revision ID: 943ac5daac24
+Revises: f2e9eda3a9bf
+Create Date: 2026-10-18 19:09:23.680615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision = '943ac5daac24'
+down_revision = 'f2e9eda3a9bf'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('expenses', 'leases', 'maintenance_requests', 'rent_payments')
+
+
+def _drop_triggers(conn):
+    # SQLite batch mode rebuilds each table by renaming a copy into place,
+    # which fails while triggers (the payment search ones) reference it;
+    # drop them for the duration and return their DDL to recreate afterwards
+    if conn.dialect.name != 'sqlite':
+        return []
+    triggers = conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")).fetchall()
+    for name, _ in triggers:
+        conn.execute(text(f'DROP TRIGGER "{name}"'))
+    return [sql for _, sql in triggers]
+
+
+def _restore_triggers(conn, triggers):
+    for sql in triggers:
+        conn.execute(text(sql))
+
+
+def upgrade():
+    conn = op.get_bind()
+    triggers = _drop_triggers(conn)
+
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+        # Existing rows count as changed now, so the first incremental export includes them
+        conn.execute(text(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP"))
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at',
+                   existing_type=sa.DateTime(),
+                   nullable=False)
+            batch_op.create_index(batch_op.f(f'ix_{table}_updated_at'), ['updated_at'], unique=False)
+
+    _restore_triggers(conn, triggers)
+
+
+def downgrade():
+    conn = op.get_bind()
+    triggers = _drop_triggers(conn)
+
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_updated_at'))
+            batch_op.drop_column('updated_at')
+
+    _restore_triggers(conn, triggers)
@@ -0,0 +1,46 @@
+"""add payment_month to rent_payments
+
+Revision ID: 99519395c6de
+Revises: 65176ac7222f
+Create Date: 2026-10-18 10:03:47.581224
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision = '99519395c6de'
+down_revision = '65176ac7222f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rent_payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payment_month', sa.Integer(), nullable=True))
+
+    # Backfill the YYYYMM bucket from the existing payment dates
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(
+            "UPDATE rent_payments SET payment_month = CAST(strftime('%Y%m', payment_date) AS INTEGER)"
+        ))
+    else:
+        conn.execute(text(
+            "UPDATE rent_payments SET payment_month = "
+            "EXTRACT(YEAR FROM payment_date) * 100 + EXTRACT(MONTH FROM payment_date)"
+        ))
+
+    with op.batch_alter_table('rent_payments', schema=None) as batch_op:
+        batch_op.alter_column('payment_month',
+               existing_type=sa.Integer(),
+               nullable=False)
+        batch_op.create_index('ix_rent_payments_admin_id_payment_month', ['admin_id', 'payment_month'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rent_payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_rent_payments_admin_id_payment_month')
+        batch_op.drop_column('payment_month')
@@ -1,4 +1,7 @@
+from datetime import datetime
+
 from app import db
+from sqlalchemy.orm import validates
 
 class Tenants(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,7 +17,7 @@ class Tenants(db.Model):
     password = db.Column(db.String(50), nullable=False)
     leases=db.relationship('Leases', backref='tenant', lazy=True)
     payments = db.relationship('RentPayments', backref='payment_tenant', lazy=True, foreign_keys='RentPayments.tenant_id')
-    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False, index=True)
     def to_dict(self):
         return {
             'id': self.id,
@@ -37,7 +40,9 @@ class Properties(db.Model):
     state = db.Column(db.String(50), nullable=False)
     zip_code = db.Column(db.String(50), nullable=False)
     
-    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)  # 🔥 Add this
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False, index=True)  # 🔥 Add this
+    # Set when the property is archived instead of deleted; archived properties are hidden from listings
+    deleted_at = db.Column(db.DateTime, nullable=True)
 
     units = db.relationship('Units', backref='property', lazy=True)
     leases = db.relationship('Leases', backref='property', lazy=True)
@@ -60,7 +65,7 @@ class Admin(db.Model):
     
 class Units(db.Model):
     unit_id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False, index=True)
     unit_number = db.Column(db.String(50), nullable=False)
     unit_name = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), nullable=False)
@@ -68,6 +73,7 @@ class Units(db.Model):
     deposit_amount = db.Column(db.Float, nullable=False)
     admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
     type=db.Column(db.String(50), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=True)
     # tenants = db.relationship('Leases', backref='unit', lazy=True)
      
     def to_dict(self):
@@ -83,6 +89,13 @@ class Units(db.Model):
             'type': self.type
         }
 class Leases(db.Model):
+    __table_args__ = (
+        db.Index('ix_leases_tenant_id_lease_status', 'tenant_id', 'lease_status'),
+        db.Index('ix_leases_tenant_id_start_date', 'tenant_id', 'start_date'),
+        db.Index('ix_leases_unit_id_lease_status_end_date', 'unit_id', 'lease_status', 'end_date'),
+        db.Index('ix_leases_admin_id_lease_status', 'admin_id', 'lease_status'),
+        db.Index('ix_leases_lease_status_end_date', 'lease_status', 'end_date'),
+    )
     lease_id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
     unit_id = db.Column(db.Integer, db.ForeignKey('units.unit_id'), nullable=False)
@@ -97,6 +110,9 @@ class Leases(db.Model):
     payment_due_day = db.Column(db.Integer, nullable=False)
     payments=db.relationship('RentPayments', backref='lease', lazy=True)
     unit=db.relationship('Units', backref='lease', lazy=True)
+    ledger = db.relationship('LeaseLedgers', uselist=False, lazy=True)
+    # Set on every insert and update; incremental exports pick up rows changed since their watermark
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -113,6 +129,13 @@ class Leases(db.Model):
             'payment_due_day': self.payment_due_day
         }
 class RentPayments(db.Model):
+    __table_args__ = (
+        db.Index('ix_rent_payments_admin_id_payment_date', 'admin_id', 'payment_date'),
+        db.Index('ix_rent_payments_admin_id_payment_month', 'admin_id', 'payment_month'),
+        db.Index('ix_rent_payments_lease_id_status', 'lease_id', 'status'),
+        db.Index('ix_rent_payments_lease_id_period_start', 'lease_id', 'period_start'),
+        db.Index('ix_rent_payments_tenant_id_payment_date', 'tenant_id', 'payment_date'),
+    )
     payment_id = db.Column(db.Integer, primary_key=True)
     lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False)
     payment_date = db.Column(db.Date, nullable=False)
@@ -124,6 +147,15 @@ class RentPayments(db.Model):
     period_end = db.Column(db.Date, nullable=False)
     status=db.Column(db.String(50), nullable=False)
     tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    # YYYYMM bucket of payment_date, kept in sync so month filters can use an index
+    payment_month = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    @validates('payment_date')
+    def _set_payment_month(self, key, value):
+        if value is not None:
+            self.payment_month = value.year * 100 + value.month
+        return value
 
     def to_dict(self):
         return {
@@ -139,19 +171,88 @@ class RentPayments(db.Model):
             'status': self.status,
             'tenant_id': self.tenant_id
         }
+class RentCharges(db.Model):
+    """Rent owed by a lease for one month, created ahead of time by the charge generator"""
+    __table_args__ = (
+        db.UniqueConstraint('lease_id', 'period', name='uq_rent_charges_lease_id_period'),
+        db.Index('ix_rent_charges_admin_id_due_date', 'admin_id', 'due_date'),
+    )
+    charge_id = db.Column(db.Integer, primary_key=True)
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
+    # YYYYMM month the charge is for
+    period = db.Column(db.Integer, nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            'charge_id': self.charge_id,
+            'lease_id': self.lease_id,
+            'tenant_id': self.tenant_id,
+            'admin_id': self.admin_id,
+            'period': self.period,
+            'due_date': self.due_date,
+            'amount': self.amount
+        }
+class MonthlyRentRollups(db.Model):
+    """Per admin/property/month rent totals, maintained alongside lease and payment writes"""
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), primary_key=True)
+    year_month = db.Column(db.Integer, primary_key=True)
+    expected = db.Column(db.Float, nullable=False, default=0)
+    collected = db.Column(db.Float, nullable=False, default=0)
+    pending = db.Column(db.Float, nullable=False, default=0)
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'admin_id': self.admin_id,
+            'property_id': self.property_id,
+            'year_month': self.year_month,
+            'expected': self.expected,
+            'collected': self.collected,
+            'pending': self.pending,
+            'payment_count': self.payment_count
+        }
+class LeaseLedgers(db.Model):
+    """Running payment totals for a lease, maintained alongside payment writes"""
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), primary_key=True)
+    total_paid = db.Column(db.Float, nullable=False, default=0)
+    total_pending = db.Column(db.Float, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'lease_id': self.lease_id,
+            'total_paid': self.total_paid,
+            'total_pending': self.total_pending,
+            'completed_count': self.completed_count
+        }
+class EntityVersions(db.Model):
+    """Version counter per entity, bumped in the same transaction as any write that changes what it shows"""
+    entity = db.Column(db.String(30), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
 class Expenses(db.Model):
     expense_id = db.Column(db.Integer, primary_key=True)
-    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False)
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False, index=True)
     expense_date = db.Column(db.Date, nullable=False)
     expense_amount = db.Column(db.Float, nullable=False)
     expense_description = db.Column(db.String(50), nullable=False)
     payment_reference_number = db.Column(db.String(50), nullable=False)
     paid_by= db.Column(db.String(50), nullable=False)
-    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 class MaintenanceRequests(db.Model):
+    __table_args__ = (
+        db.Index('ix_maintenance_requests_admin_id_request_date', 'admin_id', 'request_date'),
+        db.Index('ix_maintenance_requests_tenant_id_request_date', 'tenant_id', 'request_date'),
+    )
     request_id = db.Column(db.Integer, primary_key=True)
-    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False)
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False, index=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
     request_date = db.Column(db.Date, nullable=False)
     request_description = db.Column(db.String(50), nullable=False)
@@ -160,6 +261,47 @@ class MaintenanceRequests(db.Model):
     cost= db.Column(db.Float, nullable=True)
     lease=  db.relationship('Leases', backref='maintenance_request', lazy=True)
     admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+class RentPaymentsArchive(db.Model):
+    """Payments of leases that ended long ago, moved out of rent_payments by `flask archive-history`"""
+    __tablename__ = 'rent_payments_archive'
+    __table_args__ = (
+        db.Index('ix_rent_payments_archive_admin_id_payment_date', 'admin_id', 'payment_date'),
+        db.Index('ix_rent_payments_archive_admin_id_payment_month', 'admin_id', 'payment_month'),
+        db.Index('ix_rent_payments_archive_tenant_id_payment_date', 'tenant_id', 'payment_date'),
+    )
+    payment_id = db.Column(db.Integer, primary_key=True)
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False, index=True)
+    payment_date = db.Column(db.Date, nullable=False)
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False)
+    transaction_reference_number = db.Column(db.String(50), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    period_end = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    payment_month = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class MaintenanceRequestsArchive(db.Model):
+    """Maintenance requests of leases that ended long ago, moved out of maintenance_requests"""
+    __tablename__ = 'maintenance_requests_archive'
+    __table_args__ = (
+        db.Index('ix_maintenance_requests_archive_admin_id_request_date', 'admin_id', 'request_date'),
+        db.Index('ix_maintenance_requests_archive_tenant_id_request_date', 'tenant_id', 'request_date'),
+    )
+    request_id = db.Column(db.Integer, primary_key=True)
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.lease_id'), nullable=False, index=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    request_date = db.Column(db.Date, nullable=False)
+    request_description = db.Column(db.String(50), nullable=False)
+    request_status = db.Column(db.String(50), nullable=False)
+    request_priority = db.Column(db.String(50), nullable=False)
+    cost = db.Column(db.Float, nullable=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, index=True)
 class Users(db.Model):
     __tablename__ = 'users'
     user_id = db.Column(db.Integer, primary_key=True)
@@ -179,4 +321,34 @@ class Users(db.Model):
             'role': self.role,
             'last_login': self.last_login,
             'is_active': self.is_active
-        }
\ No newline at end of file
+        }
+class ScheduledJobs(db.Model):
+    """When each scheduled job is next due and which worker, if any, holds its lock"""
+    name = db.Column(db.String(50), primary_key=True)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+class JobRuns(db.Model):
+    __table_args__ = (
+        db.Index('ix_job_runs_job_started_at', 'job', 'started_at'),
+    )
+    run_id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(50), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    duration_ms = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    result = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    worker = db.Column(db.String(100), nullable=False)
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'job': self.job,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'worker': self.worker
+        }
@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request
+from sqlalchemy import Date, DateTime, Integer, literal, tuple_
+
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError
+        values = []
+        for column, value in zip(columns, payload):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            elif isinstance(column.type, Integer) and (not isinstance(value, int) or isinstance(value, bool)):
+                raise ValueError
+            values.append(value)
+        return values
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def page_limit():
+    """The page size the request asks for, or None when it wants the full result"""
+    limit = request.args.get('limit', type=int)
+    if limit is None and request.args.get('cursor') is None:
+        return None
+    return max(1, min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, columns, descending=False, key=None):
+    """Apply keyset pagination from the request's `limit`/`cursor` arguments
+
+    `columns` is the stable ordering (ending in a unique column) and `key`
+    pulls the same values out of a result row. Without `limit` or `cursor`
+    the full result is returned, as before. Returns (rows, next_cursor).
+    """
+    limit = page_limit()
+    cursor = request.args.get('cursor')
+    key = key or (lambda row: tuple(getattr(row, c.key) for c in columns))
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if limit is None:
+        return query.all(), None
+
+    if cursor:
+        after = tuple_(*[literal(v, c.type) for c, v in zip(columns, decode_cursor(cursor, columns))])
+        position = tuple_(*columns)
+        query = query.filter(position < after if descending else position > after)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(key(rows[limit - 1])) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def with_next_cursor(response, next_cursor):
+    """Attach the next cursor to a list response as the X-Next-Cursor header"""
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -0,0 +1,194 @@
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import case, func, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from archival import with_archive
+from cache import invalidate_admins
+from models import Leases, MonthlyRentRollups, RentPayments
+
+
+def year_month(d):
+    """Return the YYYYMM bucket for a date"""
+    return d.year * 100 + d.month
+
+
+def iter_months(start, end):
+    """Yield every YYYYMM bucket from start to end (inclusive)"""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year * 100 + month
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def increment(model, key, **deltas):
+    """Add deltas to the row of model identified by key, creating it if needed
+
+    Runs in the current transaction so the totals commit or roll back
+    together with the write that caused them.
+    """
+    increment_many(model, list(key), [dict(key, **deltas)])
+
+
+def increment_many(model, key_names, rows):
+    """increment() for many rows in one statement
+
+    Each row holds its key columns and the same delta columns; keys must
+    not repeat within `rows`.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    delta_names = [name for name in rows[0] if name not in key_names]
+    defaults = {c.name: 0 for c in table.columns if not c.primary_key}
+
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(table).values([dict(defaults, **row) for row in rows])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_names),
+            set_={k: table.c[k] + stmt.excluded[k] for k in delta_names}
+        )
+        db.session.execute(stmt)
+        return
+
+    for values in rows:
+        row = db.session.get(model, tuple(values[k] for k in key_names))
+        if row is None:
+            db.session.add(model(**dict(defaults, **values)))
+        else:
+            for k in delta_names:
+                setattr(row, k, getattr(model, k) + values[k])
+    db.session.flush()
+
+
+def _upsert(admin_id, property_id, ym, **deltas):
+    increment(MonthlyRentRollups,
+              {'admin_id': admin_id, 'property_id': property_id, 'year_month': ym},
+              **deltas)
+
+
+def apply_payment(payment, lease, sign=1):
+    """Add (sign=1) or remove (sign=-1) a payment's contribution to its month"""
+    amount = float(payment.amount)
+    if payment.status == 'completed':
+        deltas = {'collected': sign * amount, 'payment_count': sign}
+    elif payment.status == 'pending':
+        deltas = {'pending': sign * amount}
+    else:
+        return
+    _upsert(payment.admin_id, lease.property_id, year_month(payment.payment_date), **deltas)
+
+
+LeaseTerm = namedtuple('LeaseTerm', 'admin_id property_id start_date end_date monthly_rent')
+
+
+def lease_term(lease):
+    """The fields a lease's expected rent depends on, taken before the lease is edited"""
+    return LeaseTerm(lease.admin_id, lease.property_id, lease.start_date, lease.end_date, lease.monthly_rent)
+
+
+def apply_lease_term(term, sign=1):
+    """Add (sign=1) or remove (sign=-1) a lease's rent to the expected total of each month of its term
+
+    `term` is a lease or a lease_term() snapshot. Every month goes in one
+    multi-row upsert; an edit removes the old term and applies the new one.
+    """
+    increment_many(MonthlyRentRollups, ('admin_id', 'property_id', 'year_month'), [
+        {'admin_id': term.admin_id, 'property_id': term.property_id, 'year_month': ym,
+         'expected': sign * term.monthly_rent}
+        for ym in iter_months(term.start_date, term.end_date)
+    ])
+
+
+def lock_for_rebuild(model):
+    """Block other writers to a derived table until the current transaction ends
+
+    SQLite's first write takes the database write lock by itself; PostgreSQL
+    only locks the rows a statement touches, so the table is locked explicitly.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text(f'LOCK TABLE {model.__tablename__} IN EXCLUSIVE MODE'))
+
+
+def rebuild_rollups(admin_id=None, property_id=None, commit=True):
+    """Recompute rollups from raw leases and payments; returns the number of rows written
+
+    With commit=False the rows are replaced inside the caller's transaction.
+    The old rows are deleted before anything is read: the write lock that takes
+    keeps payments from committing an increment between the reads and the
+    insert, where the insert would silently drop it.
+    """
+    lock_for_rebuild(MonthlyRentRollups)
+    delete = MonthlyRentRollups.query
+    if admin_id is not None:
+        delete = delete.filter(MonthlyRentRollups.admin_id == admin_id)
+    if property_id is not None:
+        delete = delete.filter(MonthlyRentRollups.property_id == property_id)
+    # Rows committed after this read come from leases and payments the reads below still see
+    admin_ids = {row_admin for row_admin, in delete.with_entities(MonthlyRentRollups.admin_id).distinct()}
+    delete.delete(synchronize_session=False)
+
+    rows = defaultdict(lambda: {'expected': 0, 'collected': 0, 'pending': 0, 'payment_count': 0})
+
+    leases = db.session.query(
+        Leases.admin_id, Leases.property_id, Leases.start_date, Leases.end_date, Leases.monthly_rent
+    )
+    if admin_id is not None:
+        leases = leases.filter(Leases.admin_id == admin_id)
+    if property_id is not None:
+        leases = leases.filter(Leases.property_id == property_id)
+    for lease in leases.yield_per(1000):
+        for ym in iter_months(lease.start_date, lease.end_date):
+            rows[(lease.admin_id, lease.property_id, ym)]['expected'] += lease.monthly_rent
+
+    payments = with_archive(RentPayments, 'admin_id', 'lease_id', 'payment_month', 'status', 'amount')
+    totals = db.session.query(
+        payments.c.admin_id,
+        Leases.property_id,
+        payments.c.payment_month,
+        func.sum(case((payments.c.status == 'completed', payments.c.amount), else_=0)),
+        func.sum(case((payments.c.status == 'pending', payments.c.amount), else_=0)),
+        func.sum(case((payments.c.status == 'completed', 1), else_=0))
+    ).join(Leases, payments.c.lease_id == Leases.lease_id)\
+     .group_by(payments.c.admin_id, Leases.property_id, payments.c.payment_month)
+    if admin_id is not None:
+        totals = totals.filter(payments.c.admin_id == admin_id)
+    if property_id is not None:
+        totals = totals.filter(Leases.property_id == property_id)
+    for row_admin, row_property, ym, collected, pending, count in totals:
+        row = rows[(row_admin, row_property, ym)]
+        row['collected'] = collected or 0
+        row['pending'] = pending or 0
+        row['payment_count'] = count or 0
+
+    values = [dict(admin_id=a, property_id=p, year_month=ym, **sums)
+              for (a, p, ym), sums in rows.items()]
+    if values:
+        db.session.execute(insert(MonthlyRentRollups), values)
+    invalidate_admins(admin_ids | {row_admin for row_admin, _, _ in rows})
+    if commit:
+        db.session.commit()
+    return len(values)
+
+
+def rollup_totals_query(admin_id, first_month, last_month):
+    """Query summing an admin's rollups over an inclusive YYYYMM range"""
+    return db.session.query(
+        func.coalesce(func.sum(MonthlyRentRollups.expected), 0).label('expected'),
+        func.coalesce(func.sum(MonthlyRentRollups.collected), 0).label('collected'),
+        func.coalesce(func.sum(MonthlyRentRollups.pending), 0).label('pending'),
+        func.coalesce(func.sum(MonthlyRentRollups.payment_count), 0).label('payment_count')
+    ).filter(
+        MonthlyRentRollups.admin_id == admin_id,
+        MonthlyRentRollups.year_month.between(first_month, last_month)
+    )
+
+
+def rollup_totals(admin_id, first_month, last_month):
+    """Sum an admin's rollups over an inclusive YYYYMM range"""
+    return rollup_totals_query(admin_id, first_month, last_month).one()
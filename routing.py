@@ -0,0 +1,79 @@
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Flask session key holding the time until which this client reads from the primary
+STICKY_KEY = '_db_primary_until'
+
+
+def _replica_bind():
+    return current_app.config.get('REPLICA_BIND', 'replica')
+
+
+class RoutingSession(Session):
+    """Session that sends read-only requests to the replica bind
+
+    Writes (flushes and DML statements) always go to the primary, and once a
+    request has written, the rest of it and the same client's requests for
+    REPLICA_STICKY_SECONDS afterwards read from the primary too, so clients
+    see their own writes even while the replica lags.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or (clause is not None and clause.is_dml):
+                g.db_wrote = True
+            elif self._reads_from_replica():
+                return self._db.engines[_replica_bind()]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self):
+        if _replica_bind() not in self._db.engines:
+            return False
+        if request.method not in READ_METHODS or g.get('db_wrote') or g.get('db_read_primary'):
+            return False
+        return session.get(STICKY_KEY, 0) <= time.time()
+
+
+def read_version(db, statement):
+    """First row of a version lookup (ETags, cache generations), always read from the primary
+
+    A lagging replica would hand out a version from before the latest write,
+    and responses cached or tagged with it would be served after the write.
+    When this request otherwise reads from a replica that has not caught up
+    with the row, the rest of the request reads from the primary as well, so
+    the data served under the version is at least as new as the version.
+    """
+    session = db.session()
+    row = session.execute(statement, bind_arguments={'bind': db.engines[None]}).first()
+    if has_request_context() and session._reads_from_replica() and session.execute(statement).first() != row:
+        g.db_read_primary = True
+    return row
+
+
+def _stick_to_primary(response):
+    if g.get('db_wrote'):
+        session[STICKY_KEY] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+    return response
+
+
+def sync_sqlite_replica(db):
+    """Copy the primary SQLite database over the replica (for local two-file setups)"""
+    primary, replica = db.engines[None], db.engines[_replica_bind()]
+    if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise RuntimeError('sync-replica only copies SQLite databases; use real replication otherwise')
+    replica.dispose()
+    source, target = primary.raw_connection(), replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+
+
+def init_read_replica(app):
+    """Route reads to the replica bind when SQLALCHEMY_BINDS configures one"""
+    if app.config.get('REPLICA_BIND', 'replica') in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        app.after_request(_stick_to_primary)
@@ -0,0 +1,255 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, time as clock, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import JobRuns, ScheduledJobs
+
+def worker_id():
+    """Identifies this process in locks and run history (read per call: workers may fork after import)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _parse_field(field, low, high):
+    """Values matched by one cron field: *, */n, a, a-b, a-b/n and comma-separated lists"""
+    values = set()
+    for part in field.split(','):
+        spec, _, step = part.partition('/')
+        if spec == '*':
+            start, end = low, high
+        elif '-' in spec:
+            start, end = (int(v) for v in spec.split('-', 1))
+        else:
+            start = end = int(spec)
+            if step:
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f'cron field {field!r} is outside {low}-{high}')
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day-of-month month day-of-week), evaluated in UTC"""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'cron expression {expression!r} needs 5 fields')
+        self.expression = expression
+        self.minutes = sorted(_parse_field(fields[0], 0, 59))
+        self.hours = sorted(_parse_field(fields[1], 0, 23))
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        # 0 and 7 are both Sunday
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7)}
+        # As in cron, a day matches either field when both are restricted
+        self._either_day = fields[2] != '*' and fields[4] != '*'
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        in_month, in_week = day.day in self.days, day.isoweekday() % 7 in self.weekdays
+        return in_month or in_week if self._either_day else in_month and in_week
+
+    def next_after(self, moment):
+        """The first time strictly after `moment` that the schedule fires"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 8):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime.combine(day, clock(hour, minute))
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f'cron expression {self.expression!r} never fires')
+
+
+class Job:
+    def __init__(self, name, schedule, func):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.func = func
+
+
+JOBS = {}
+
+
+def register_job(name, schedule, func):
+    """Run func() whenever the cron `schedule` fires; whatever it returns is kept in the run history"""
+    JOBS[name] = Job(name, schedule, func)
+
+
+def ensure_job_rows(now=None):
+    """Create the scheduling row of each registered job that does not have one yet"""
+    now = now or datetime.utcnow()
+    existing = set(db.session.execute(select(ScheduledJobs.name)).scalars())
+    for job in JOBS.values():
+        if job.name in existing:
+            continue
+        db.session.add(ScheduledJobs(name=job.name, next_run_at=job.schedule.next_after(now)))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+
+
+def _acquire(job, lock_seconds, due_only=True):
+    """Take the job's lock with a single conditional UPDATE; True if this worker won it"""
+    # Read the clock per job: earlier jobs in the same tick may have run for a while
+    now = datetime.utcnow()
+    stmt = update(ScheduledJobs).where(
+        ScheduledJobs.name == job.name,
+        or_(ScheduledJobs.locked_until.is_(None), ScheduledJobs.locked_until < now)
+    )
+    if due_only:
+        stmt = stmt.where(ScheduledJobs.next_run_at <= now)
+    acquired = db.session.execute(
+        stmt.values(locked_by=worker_id(), locked_until=now + timedelta(seconds=lock_seconds))
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    db.session.commit()
+    return acquired
+
+
+def _release(job, owner, reschedule):
+    values = {'locked_by': None, 'locked_until': None}
+    if reschedule:
+        values['next_run_at'] = job.schedule.next_after(datetime.utcnow())
+    db.session.execute(
+        update(ScheduledJobs)
+        .where(ScheduledJobs.name == job.name, ScheduledJobs.locked_by == owner)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _renew(engine, job, owner, lock_seconds):
+    """Push the job's lock expiry forward on a connection of its own; False if `owner` no longer holds it"""
+    with engine.begin() as connection:
+        return connection.execute(
+            update(ScheduledJobs)
+            .where(ScheduledJobs.name == job.name, ScheduledJobs.locked_by == owner)
+            .values(locked_until=datetime.utcnow() + timedelta(seconds=lock_seconds))
+        ).rowcount == 1
+
+
+def _heartbeat(app, engine, job, owner, lock_seconds, stop):
+    # Renew well before expiry, so a job that runs past SCHEDULER_LOCK_SECONDS keeps its lock
+    while not stop.wait(lock_seconds / 3):
+        try:
+            if not _renew(engine, job, owner, lock_seconds):
+                return
+        except Exception:
+            # e.g. SQLite busy while the job holds the write lock; the next beat retries
+            app.logger.warning('Could not renew the lock of job %s', job.name, exc_info=True)
+
+
+def _holds_lock(job, owner):
+    return db.session.execute(
+        select(ScheduledJobs.locked_by).where(ScheduledJobs.name == job.name)
+    ).scalar() == owner
+
+
+def _run(job, reschedule, lock_seconds):
+    owner = worker_id()
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, name=f'job-heartbeat-{job.name}', daemon=True,
+                                 args=(current_app._get_current_object(), db.engine, job, owner, lock_seconds, stop))
+    heartbeat.start()
+    started_at, started = datetime.utcnow(), time.perf_counter()
+    result, error = None, None
+    try:
+        result = job.func()
+        status = 'succeeded'
+    except Exception:
+        db.session.rollback()
+        status, error = 'failed', traceback.format_exc()
+    finally:
+        stop.set()
+        heartbeat.join()
+    if not _holds_lock(job, owner):
+        # Renewals failed long enough for another worker to take over; it owns the schedule now
+        status = 'lock_lost'
+    run = JobRuns(
+        job=job.name, started_at=started_at, duration_ms=(time.perf_counter() - started) * 1000,
+        status=status, result=None if result is None else str(result)[:255], error=error, worker=owner
+    )
+    db.session.add(run)
+    db.session.commit()
+    _release(job, owner, reschedule)
+    return run
+
+
+def run_due_jobs(lock_seconds):
+    """Run every registered job that is due and not locked by another worker; returns their runs"""
+    return [_run(job, True, lock_seconds) for job in JOBS.values() if _acquire(job, lock_seconds)]
+
+
+def run_job_now(name, lock_seconds):
+    """Run one job immediately, outside its schedule; None if another worker is running it"""
+    job = JOBS[name]
+    ensure_job_rows()
+    if not _acquire(job, lock_seconds, due_only=False):
+        return None
+    return _run(job, False, lock_seconds)
+
+
+def _scheduler_loop(app, stop):
+    tick, lock_seconds = app.config.get('SCHEDULER_TICK_SECONDS', 30), app.config.get('SCHEDULER_LOCK_SECONDS', 600)
+    while True:
+        with app.app_context():
+            try:
+                ensure_job_rows()
+                run_due_jobs(lock_seconds)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Scheduler tick failed')
+        if stop.wait(tick):
+            return
+
+
+def start_scheduler(app):
+    """Check for due jobs every SCHEDULER_TICK_SECONDS on a daemon thread; returns an Event that stops it
+
+    Every worker process may run the loop: the lock in scheduled_jobs lets
+    exactly one of them run each firing. A running job renews its lock every
+    third of SCHEDULER_LOCK_SECONDS, so a long job keeps it while a worker
+    that dies mid-run loses it within SCHEDULER_LOCK_SECONDS.
+    """
+    stop = threading.Event()
+    threading.Thread(target=_scheduler_loop, args=(app, stop), name='job-scheduler', daemon=True).start()
+    return stop
+
+
+_stop = None
+_start_lock = threading.Lock()
+
+
+def init_scheduler(app):
+    """Start the scheduler with the first request each worker serves when SCHEDULER_ENABLED
+
+    Waiting for a request keeps CLI commands (migrations included) from
+    starting it, and starts it after a pre-forking server has forked.
+    """
+    if not app.config.get('SCHEDULER_ENABLED'):
+        return
+
+    @app.before_request
+    def _start_scheduler():
+        global _stop
+        if _stop is None:
+            with _start_lock:
+                if _stop is None:
+                    _stop = start_scheduler(app)
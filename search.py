@@ -0,0 +1,160 @@
+import re
+
+from flask import current_app
+from sqlalchemy import column, inspect, literal_column, or_, select, table, text
+
+from app import db
+from models import Leases, Properties, RentPayments, Tenants, Units
+
+# Trigram FTS5 index over the text the payment search box matches against.
+# rowid is the payment_id; triggers keep it in sync with every write path.
+SEARCH_TABLE = 'payment_search'
+SEARCH_COLUMNS = ('tenant_name', 'unit_name', 'property_name', 'reference')
+
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS payment_search USING fts5("
+    "admin_id UNINDEXED, tenant_name, unit_name, property_name, reference, tokenize='trigram')",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_ai AFTER INSERT ON rent_payments BEGIN "
+    "INSERT INTO payment_search (rowid, admin_id, tenant_name, unit_name, property_name, reference) "
+    "SELECT new.payment_id, new.admin_id, t.first_name || ' ' || t.last_name, u.unit_name, p.property_name, "
+    "new.transaction_reference_number "
+    "FROM leases l JOIN units u ON u.unit_id = l.unit_id JOIN properties p ON p.id = u.property_id "
+    "JOIN tenants t ON t.id = new.tenant_id WHERE l.lease_id = new.lease_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_ad AFTER DELETE ON rent_payments BEGIN "
+    "DELETE FROM payment_search WHERE rowid = old.payment_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_au "
+    "AFTER UPDATE OF admin_id, tenant_id, lease_id, transaction_reference_number ON rent_payments BEGIN "
+    "DELETE FROM payment_search WHERE rowid = old.payment_id; "
+    "INSERT INTO payment_search (rowid, admin_id, tenant_name, unit_name, property_name, reference) "
+    "SELECT new.payment_id, new.admin_id, t.first_name || ' ' || t.last_name, u.unit_name, p.property_name, "
+    "new.transaction_reference_number "
+    "FROM leases l JOIN units u ON u.unit_id = l.unit_id JOIN properties p ON p.id = u.property_id "
+    "JOIN tenants t ON t.id = new.tenant_id WHERE l.lease_id = new.lease_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_tenant_au AFTER UPDATE OF first_name, last_name ON tenants BEGIN "
+    "UPDATE payment_search SET tenant_name = new.first_name || ' ' || new.last_name "
+    "WHERE rowid IN (SELECT payment_id FROM rent_payments WHERE tenant_id = new.id); END",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_unit_au AFTER UPDATE OF unit_name ON units BEGIN "
+    "UPDATE payment_search SET unit_name = new.unit_name "
+    "WHERE rowid IN (SELECT rp.payment_id FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id "
+    "WHERE l.unit_id = new.unit_id); END",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_property_au AFTER UPDATE OF property_name ON properties BEGIN "
+    "UPDATE payment_search SET property_name = new.property_name "
+    "WHERE rowid IN (SELECT rp.payment_id FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id "
+    "JOIN units u ON u.unit_id = l.unit_id WHERE u.property_id = new.id); END",
+
+    "CREATE TRIGGER IF NOT EXISTS payment_search_lease_au AFTER UPDATE OF unit_id ON leases BEGIN "
+    "UPDATE payment_search SET unit_name = u.unit_name, property_name = p.property_name "
+    "FROM units u JOIN properties p ON p.id = u.property_id "
+    "WHERE u.unit_id = new.unit_id "
+    "AND payment_search.rowid IN (SELECT payment_id FROM rent_payments WHERE lease_id = new.lease_id); END",
+)
+
+payment_search = table(SEARCH_TABLE, column('rowid'), column('admin_id'), *[column(c) for c in SEARCH_COLUMNS])
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class LikeSearch:
+    """Fallback backend: substring predicates over the payment/tenant/unit/property join"""
+
+    def _fields(self, model):
+        return {
+            'tenant_name': Tenants.first_name + ' ' + Tenants.last_name,
+            'unit_name': Units.unit_name,
+            'property_name': Properties.property_name,
+            'reference': model.transaction_reference_number,
+        }
+
+    def available(self):
+        return True
+
+    def payment_ids(self, admin_id, term, field=None, model=RentPayments):
+        fields = self._fields(model)
+        targets = [fields[field]] if field else list(fields.values())
+        return select(model.payment_id)\
+            .join(Leases, model.lease_id == Leases.lease_id)\
+            .join(Tenants, model.tenant_id == Tenants.id)\
+            .join(Units, Leases.unit_id == Units.unit_id)\
+            .join(Properties, Units.property_id == Properties.id)\
+            .where(model.admin_id == admin_id,
+                   or_(*[target.ilike(f'%{term}%') for target in targets]))
+
+
+class Fts5Search:
+    """SQLite FTS5 trigram index; case-insensitive substring matches like ILIKE '%term%'"""
+
+    def __init__(self):
+        self._available = {}
+
+    def available(self):
+        engine = db.engine
+        if engine.url not in self._available:
+            self._available[engine.url] = (engine.dialect.name == 'sqlite'
+                                           and inspect(engine).has_table(SEARCH_TABLE))
+        return self._available[engine.url]
+
+    def payment_ids(self, admin_id, term, field=None):
+        query = select(payment_search.c.rowid).where(payment_search.c.admin_id == admin_id)
+        if len(term) < 3:
+            # Trigrams need at least three characters; scan the (narrow) index table instead
+            targets = [payment_search.c[field]] if field else [payment_search.c[c] for c in SEARCH_COLUMNS]
+            return query.where(or_(*[target.like(f'%{term}%') for target in targets]))
+        phrase = _fts_phrase(term)
+        if field:
+            phrase = f'{field} : {phrase}'
+        return query.where(literal_column(SEARCH_TABLE).match(phrase))
+
+
+BACKENDS = {'fts5': Fts5Search(), 'like': LikeSearch()}
+
+
+def search_backend():
+    """The configured backend, falling back to LIKE when the index is not there"""
+    backend = BACKENDS[current_app.config.get('PAYMENT_SEARCH_BACKEND', 'fts5')]
+    return backend if backend.available() else BACKENDS['like']
+
+
+def matching_payment_ids(admin_id, term, field=None, model=RentPayments):
+    """Subquery of payment ids for `admin_id` whose search fields contain `term`
+
+    `field` restricts the match to one of SEARCH_COLUMNS. Archived payments
+    (model=RentPaymentsArchive) are not indexed and are matched with LIKE.
+    """
+    if model is not RentPayments:
+        return BACKENDS['like'].payment_ids(admin_id, term, field, model)
+    return search_backend().payment_ids(admin_id, term, field)
+
+
+def drop_search_triggers():
+    """Stop maintaining the index ahead of a bulk load; rebuild_search_index() recreates the triggers"""
+    for name in re.findall(r'CREATE TRIGGER IF NOT EXISTS (\w+)', ' '.join(SEARCH_INDEX_DDL)):
+        db.session.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+    db.session.commit()
+
+
+def rebuild_search_index():
+    """Create the FTS5 index and triggers if missing and repopulate it; returns the row count"""
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError('The payment search index requires SQLite FTS5')
+    for statement in SEARCH_INDEX_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text("DELETE FROM payment_search"))
+    db.session.execute(text(
+        "INSERT INTO payment_search (rowid, admin_id, tenant_name, unit_name, property_name, reference) "
+        "SELECT rp.payment_id, rp.admin_id, t.first_name || ' ' || t.last_name, u.unit_name, p.property_name, "
+        "rp.transaction_reference_number "
+        "FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id JOIN units u ON u.unit_id = l.unit_id "
+        "JOIN properties p ON p.id = u.property_id JOIN tenants t ON t.id = rp.tenant_id"
+    ))
+    db.session.execute(text("INSERT INTO payment_search (payment_search) VALUES ('optimize')"))
+    db.session.commit()
+    BACKENDS['fts5']._available.clear()
+    return db.session.execute(text("SELECT count(*) FROM payment_search")).scalar()
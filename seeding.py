@@ -0,0 +1,255 @@
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, DateTime, func, select
+from werkzeug.security import generate_password_hash
+
+from app import db
+from archival import ARCHIVES
+from cache import invalidate_admins
+from charges import due_date, generate_charges, next_period
+from ledgers import rebuild_ledgers
+from models import (Admin, Expenses, Leases, MaintenanceRequests, Properties, RentPayments, Tenants, Units,
+                    Users)
+from rollups import iter_months, rebuild_rollups, year_month
+from search import drop_search_triggers, rebuild_search_index
+
+# Every seeded admin and tenant logs in with this password
+SEED_PASSWORD = 'password123'
+# Rows per executemany; one admin's rows are inserted and committed together
+INSERT_BATCH_SIZE = 10000
+# Insert order, parents before children
+SEEDED_MODELS = (Admin, Users, Properties, Units, Tenants, Leases, RentPayments, Expenses, MaintenanceRequests)
+
+FIRST_NAMES = ('Alice', 'Brian', 'Cynthia', 'Dennis', 'Esther', 'Faith', 'George', 'Grace', 'Hassan', 'Irene',
+               'James', 'Joy', 'Kevin', 'Lucy', 'Mercy', 'Moses', 'Njeri', 'Otieno', 'Peter', 'Purity', 'Samuel',
+               'Sharon', 'Tom', 'Wanjiru', 'Yusuf', 'Zawadi')
+LAST_NAMES = ('Achieng', 'Chebet', 'Kamau', 'Karanja', 'Kiplagat', 'Kiprono', 'Maina', 'Mutua', 'Mwangi', 'Njoroge',
+              'Ochieng', 'Odhiambo', 'Omondi', 'Onyango', 'Otieno', 'Wafula', 'Wambui', 'Wanjala', 'Waweru')
+STREETS = ('Koinange St', 'Moi Ave', 'Haile Selassie Ave', 'Kenyatta Ave', 'Kimathi St', 'Ngong Rd', 'Waiyaki Way',
+           'Argwings Kodhek Rd', 'Lenana Rd', 'Mombasa Rd')
+CITIES = (('Nairobi', 'Nairobi', '00100'), ('Mombasa', 'Mombasa', '80100'), ('Kisumu', 'Kisumu', '40100'),
+          ('Nakuru', 'Nakuru', '20100'), ('Eldoret', 'Uasin Gishu', '30100'))
+BUILDINGS = ('Court', 'Heights', 'Gardens', 'Apartments', 'Residency', 'Towers')
+# Unit type -> typical monthly rent
+UNIT_TYPES = (('studio', 12000), ('1br', 18000), ('2br', 26000), ('3br', 38000))
+LEASE_MONTHS = (6, 12, 12, 12, 24)
+VACANCY_DAYS = (0, 0, 0, 14, 30, 60)
+PAYMENT_METHODS = ('mpesa', 'mpesa', 'bank', 'cash')
+EXPENSE_DESCRIPTIONS = ('Plumbing repair', 'Repainting', 'Lock replacement', 'Pest control', 'Electrical repair',
+                        'Deep cleaning')
+REQUEST_DESCRIPTIONS = ('Leaking tap', 'Broken window', 'Blocked drain', 'Faulty socket', 'Door lock stuck',
+                        'No hot water')
+REQUEST_PRIORITIES = ('low', 'medium', 'high', 'secondary')
+
+
+def _add_months(day, months):
+    year, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + year, month + 1, 1)
+
+
+class _Generator:
+    """Builds one admin's rows at a time with explicit ids, so children never wait on a flush"""
+
+    def __init__(self, seed, until, years):
+        self.rng = random.Random(seed)
+        self.until = until
+        self.window_start = _add_months(until.replace(day=1), -12 * years)
+        self.password = generate_password_hash(SEED_PASSWORD)
+        self.now = datetime.utcnow()
+        self.ids = {model: self._max_id(model) for model in SEEDED_MODELS}
+        self.rows = {}
+
+    def _max_id(self, model):
+        """Last id in use; archived rows keep their ids, so those count too"""
+        highest = 0
+        for table in (model, ARCHIVES.get(model)):
+            if table is not None:
+                key = table.__table__.primary_key.columns[0]
+                highest = max(highest, db.session.execute(select(func.max(key))).scalar() or 0)
+        return highest
+
+    def _add(self, model, **row):
+        self.ids[model] += 1
+        row[model.__table__.primary_key.columns[0].name] = self.ids[model]
+        if 'updated_at' in model.__table__.c:
+            row['updated_at'] = self.now
+        self.rows.setdefault(model, []).append(row)
+        return self.ids[model]
+
+    def admin(self, properties, units_per_property):
+        admin_id = self._add(Admin, username=f'admin{self.ids[Admin] + 1}', password='seeded',
+                             gmail=f'admin{self.ids[Admin] + 1}@example.com')
+        self._add(Users, username=f'admin{admin_id}', email=f'admin{admin_id}@example.com', password=self.password,
+                  role='admin', last_login=None, is_active=True)
+        for _ in range(properties):
+            self.property(admin_id, units_per_property)
+        return admin_id
+
+    def property(self, admin_id, units):
+        rng = self.rng
+        city, state, zip_code = rng.choice(CITIES)
+        property_id = self._add(
+            Properties, property_name=f'{rng.choice(LAST_NAMES)} {rng.choice(BUILDINGS)}',
+            address=f'{rng.randint(1, 999)} {rng.choice(STREETS)}', city=city, state=state, zip_code=zip_code,
+            admin_id=admin_id, deleted_at=None
+        )
+        for number in range(units):
+            unit_type, rent = rng.choice(UNIT_TYPES)
+            rent = round(rent * rng.uniform(0.85, 1.15), -2)
+            unit_number = f'{chr(ord("A") + number // 20)}{number % 20 + 1}'
+            unit_id = self._add(
+                Units, property_id=property_id, unit_number=unit_number, unit_name=f'Unit {unit_number}',
+                status='vacant', monthly_rent=rent, deposit_amount=rent, admin_id=admin_id, type=unit_type,
+                deleted_at=None
+            )
+            if self.unit_history(admin_id, property_id, unit_id, rent):
+                self.rows[Units][-1]['status'] = 'occupied'
+
+    def unit_history(self, admin_id, property_id, unit_id, rent):
+        """Back-to-back leases over the window, each with a new tenant; True if one is active at `until`"""
+        rng, until = self.rng, self.until
+        start = self.window_start + timedelta(days=rng.randint(0, 60))
+        occupied = False
+        while start <= until:
+            end = _add_months(start, rng.choice(LEASE_MONTHS)) + timedelta(days=start.day - 2)
+            occupied = end >= until
+            self.lease(admin_id, property_id, unit_id, rent, start, end, 'active' if occupied else 'ended')
+            rent = round(rent * 1.05, -2)
+            start = end + timedelta(days=1 + rng.choice(VACANCY_DAYS))
+        return occupied
+
+    def tenant(self, admin_id, move_in, move_out):
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f'{first}.{last}.{self.ids[Tenants] + 1}@example.com'.lower()
+        tenant_id = self._add(
+            Tenants, first_name=first, last_name=last, email=email, phone=f'07{rng.randint(0, 99999999):08d}',
+            date_of_birth=date(rng.randint(1955, 2004), rng.randint(1, 12), rng.randint(1, 28)),
+            emergency_contact_name=f'{rng.choice(FIRST_NAMES)} {last}',
+            emergency_contact_number=f'07{rng.randint(0, 99999999):08d}', move_in_date=move_in,
+            move_out_date=move_out, admin_id=admin_id, password='seeded'
+        )
+        self._add(Users, username=f'{first} {last}', email=email, password=self.password, role='tenant',
+                  last_login=None, is_active=True)
+        return tenant_id
+
+    def lease(self, admin_id, property_id, unit_id, rent, start, end, status):
+        rng, until = self.rng, self.until
+        tenant_id = self.tenant(admin_id, start, None if status == 'active' else end)
+        due_day = rng.choice((1, 1, 5, 5, 10, 15, 28))
+        lease_id = self._add(
+            Leases, tenant_id=tenant_id, unit_id=unit_id, start_date=start, end_date=end, monthly_rent=rent,
+            deposit_amount=rent, lease_status=status, property_id=property_id, admin_id=admin_id,
+            payment_due_day=due_day
+        )
+
+        for period in iter_months(start, min(end, until)):
+            due = max(due_date(period, due_day), start)
+            if due <= until and rng.random() >= 0.04:
+                paid = min(due + timedelta(days=rng.randint(-3, 7)), until)
+                method = rng.choice(PAYMENT_METHODS)
+                recent = (until - paid).days < 7
+                self._add(
+                    RentPayments, lease_id=lease_id, payment_date=paid, payment_month=year_month(paid),
+                    admin_id=admin_id, amount=rent, payment_method=method,
+                    transaction_reference_number=f'{method[:2].upper()}{self.ids[RentPayments] + 1:010d}',
+                    period_start=due.replace(day=1), period_end=due.replace(day=1) + timedelta(days=27),
+                    status='pending' if recent and rng.random() < 0.5 else 'completed', tenant_id=tenant_id
+                )
+            day = due.replace(day=rng.randint(1, 28))
+            if day > until or day < start:
+                continue
+            if rng.random() < 0.25:
+                done = (until - day).days > 30
+                self._add(
+                    MaintenanceRequests, lease_id=lease_id, tenant_id=tenant_id, request_date=day,
+                    request_description=rng.choice(REQUEST_DESCRIPTIONS),
+                    request_status='completed' if done else rng.choice(('pending', 'in-progress')),
+                    request_priority=rng.choice(REQUEST_PRIORITIES),
+                    cost=round(rng.uniform(500, 15000), -2) if done else None, admin_id=admin_id
+                )
+            if rng.random() < 0.1:
+                self._add(
+                    Expenses, lease_id=lease_id, expense_date=day, expense_amount=round(rng.uniform(1000, 40000), -2),
+                    expense_description=rng.choice(EXPENSE_DESCRIPTIONS),
+                    payment_reference_number=f'EXP{self.ids[Expenses] + 1:08d}',
+                    paid_by=rng.choice(('admin', 'tenant')), admin_id=admin_id
+                )
+
+    def flush(self):
+        """Insert the buffered rows table by table in batches; returns the count per table"""
+        counts = {}
+        for model in SEEDED_MODELS:
+            rows = self.rows.pop(model, [])
+            for i in range(0, len(rows), INSERT_BATCH_SIZE):
+                _bulk_insert(model.__table__, rows[i:i + INSERT_BATCH_SIZE])
+            counts[model.__tablename__] = len(rows)
+        return counts
+
+
+def _bulk_insert(table, rows):
+    """executemany straight on the driver; SQLAlchemy's per-row parameter processing costs more than the insert
+
+    Dates are bound as ISO strings, which SQLite stores as they are and
+    PostgreSQL casts. Columns missing from a row are inserted as NULL.
+    """
+    dialect = db.engine.dialect
+    preparer = dialect.identifier_preparer
+    columns = []
+    for column in table.columns:
+        values = [row.get(column.name) for row in rows]
+        if isinstance(column.type, (Date, DateTime)):
+            values = [None if value is None else str(value) for value in values]
+        columns.append(values)
+    placeholder = '?' if dialect.paramstyle == 'qmark' else '%s'
+    sql = (f'INSERT INTO {preparer.format_table(table)} ({", ".join(preparer.quote(c.name) for c in table.columns)}) '
+           f'VALUES ({", ".join([placeholder] * len(columns))})')
+    db.session.connection().exec_driver_sql(sql, list(zip(*columns)))
+
+
+def clear_data():
+    """Delete every row of every table, children first, keeping the schema and migration state
+
+    On SQLite the payment search index stops being maintained until
+    rebuild_search_index() runs, as seed_dataset() does when it finishes.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        drop_search_triggers()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+
+def seed_dataset(admins, properties_per_admin, units_per_property, years, seed=0, until=None):
+    """Generate a realistic dataset: admins, properties, units and `years` of lease history up to `until`
+
+    Every unit gets back-to-back leases with a new tenant each, monthly
+    payments (a few missed, the last week's partly pending), expenses and
+    maintenance requests. The same arguments always produce the same rows.
+    Raw rows are bulk-inserted with explicit ids and committed per admin;
+    charges, rollups, ledgers and the search index are then derived the
+    usual way. Returns the number of rows inserted per table.
+    """
+    until = until or date.today()
+    sqlite = db.engine.dialect.name == 'sqlite'
+    if sqlite:
+        # The index triggers would run a join per payment; the index is rebuilt once at the end
+        drop_search_triggers()
+
+    generator = _Generator(seed, until, years)
+    totals = {model.__tablename__: 0 for model in SEEDED_MODELS}
+    for _ in range(admins):
+        admin_id = generator.admin(properties_per_admin, units_per_property)
+        for table, count in generator.flush().items():
+            totals[table] += count
+        invalidate_admins([admin_id])
+        db.session.commit()
+
+    totals['rent_charges'] = len(generate_charges(year_month(generator.window_start), next_period(year_month(until))))
+    db.session.commit()
+    totals['monthly_rent_rollups'] = rebuild_rollups()
+    totals['lease_ledgers'] = rebuild_ledgers()
+    if sqlite:
+        rebuild_search_index()
+    return totals
@@ -0,0 +1,56 @@
+import json
+from datetime import date
+from functools import lru_cache
+
+from flask import Response
+from werkzeug.http import http_date
+
+from app import db
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Encode to JSON bytes with sorted keys; dates and datetimes become ISO 8601 strings"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), default=_default).encode()
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+@lru_cache(maxsize=8192)
+def cached_http_date(value):
+    """The HTTP-date string Flask's jsonify writes for a date, computed once per distinct date"""
+    return http_date(value)
+
+
+class Projection:
+    """The columns a SQLAlchemyAutoSchema dumps, selected as plain rows instead of ORM objects
+
+    Dumping rows through a projection gives the same JSON as schema.dump()
+    without hydrating instances or running marshmallow per field.
+    """
+
+    def __init__(self, schema):
+        model = schema.opts.model
+        self.keys = list(schema.dump_fields)
+        self.columns = [getattr(model, field.attribute or name) for name, field in schema.dump_fields.items()]
+
+    def query(self):
+        return db.session.query(*self.columns)
+
+    def dump(self, rows):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in rows]
@@ -0,0 +1,26 @@
+from sqlalchemy import event
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+
+def configure_sqlite_engine(engine, pragmas):
+    """Apply PRAGMAs to every new connection of a SQLite engine"""
+    if engine.dialect.name == 'sqlite' and pragmas:
+        event.listen(engine, 'connect', _pragma_listener(dict(pragmas)))
+
+
+def init_sqlite_profile(app, db):
+    """Tune SQLite connections from the SQLITE_PRAGMAS config"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_sqlite_engine(engine, pragmas)
@@ -0,0 +1,138 @@
+import contextlib
+import json
+import os
+import re
+import tempfile
+import urllib.parse
+from datetime import date, timedelta
+
+# The app reads its configuration at import time
+_tmp = tempfile.mkdtemp()
+os.environ.update(FLASK_ENV='testing', TEST_DATABASE_URL=f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+                  METRICS_DIR=os.path.join(_tmp, 'metrics'), SQL_INSTRUMENTATION='1', RESPONSE_CACHE='none',
+                  SCHEDULER_ENABLED='0')
+os.environ.pop('REPLICA_DATABASE_URL', None)
+
+import pytest
+from sqlalchemy import text
+
+from app import app as flask_app, db
+from charges import generate_charges, next_period, year_month
+from ledgers import rebuild_ledgers
+from models import Admin, Leases, Properties, RentPayments, Tenants, Units
+from rollups import rebuild_rollups
+from search import BACKENDS, SEARCH_TABLE
+
+QUERIES = re.compile(r'queries;desc="(\d+)"')
+
+
+@contextlib.contextmanager
+def _empty_database():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+        db.session.execute(text(f'DROP TABLE IF EXISTS {SEARCH_TABLE}'))
+        db.session.commit()
+        BACKENDS['fts5']._available.clear()
+
+
+@pytest.fixture
+def app():
+    with _empty_database() as app:
+        yield app
+
+
+@pytest.fixture(scope='module')
+def module_app():
+    """An app whose database lives for the whole module, for tests that share one expensive dataset"""
+    with _empty_database() as app:
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def statements(response):
+    """SQL statements the request ran, from its Server-Timing header"""
+    return int(QUERIES.search(response.headers['Server-Timing']).group(1))
+
+
+@pytest.fixture
+def count_statements():
+    return statements
+
+
+@pytest.fixture
+def admin(app):
+    admin = Admin(username='owner', password='x', gmail='owner@example.com')
+    db.session.add(admin)
+    db.session.flush()
+    prop = Properties(property_name='Test Court', address='1 Test Rd', city='Nairobi', state='Nairobi',
+                      zip_code='00100', admin_id=admin.admin_id)
+    db.session.add(prop)
+    db.session.commit()
+    return {'admin_id': admin.admin_id, 'property_id': prop.id}
+
+
+@pytest.fixture
+def make_tenant(admin):
+    """Factory: a tenant with `leases` back-to-back yearly leases (the last one active) of `payments` payments each"""
+    counter = iter(range(1, 1000))
+
+    def make(leases=1, payments=1):
+        n = next(counter)
+        today = date.today()
+        tenant = Tenants(first_name=f'Tenant{n}', last_name='Test', email=f'tenant{n}@example.com', phone='0700',
+                         date_of_birth=date(1990, 1, 1), emergency_contact_name='Kin',
+                         emergency_contact_number='0711', move_in_date=today - timedelta(days=365 * leases),
+                         admin_id=admin['admin_id'], password='x')
+        db.session.add(tenant)
+        db.session.flush()
+
+        lease_ids, unit_ids = [], []
+        for i in range(leases):
+            start = today - timedelta(days=365 * (leases - i))
+            active = i == leases - 1
+            unit = Units(property_id=admin['property_id'], unit_number=f'{n}-{i}', unit_name=f'Unit {n}-{i}',
+                         status='occupied' if active else 'vacant', monthly_rent=1000, deposit_amount=1000,
+                         admin_id=admin['admin_id'], type='1br')
+            db.session.add(unit)
+            db.session.flush()
+            lease = Leases(tenant_id=tenant.id, unit_id=unit.unit_id, property_id=admin['property_id'],
+                           admin_id=admin['admin_id'], start_date=start,
+                           end_date=start + timedelta(days=730 if active else 364), monthly_rent=1000,
+                           deposit_amount=1000, lease_status='active' if active else 'ended', payment_due_day=5)
+            db.session.add(lease)
+            db.session.flush()
+            for p in range(payments):
+                paid = start + timedelta(days=30 * p)
+                db.session.add(RentPayments(
+                    lease_id=lease.lease_id, tenant_id=tenant.id, admin_id=admin['admin_id'], amount=1000,
+                    payment_date=paid, payment_method='mpesa', transaction_reference_number=f'REF{n}-{i}-{p}',
+                    period_start=paid.replace(day=1), period_end=paid.replace(day=28), status='completed'
+                ))
+            lease_ids.append(lease.lease_id)
+            unit_ids.append(unit.unit_id)
+
+        generate_charges(year_month(today - timedelta(days=365 * leases)), next_period(year_month(today)), lease_ids)
+        db.session.commit()
+        rebuild_ledgers()
+        rebuild_rollups()
+        return {'tenant_id': tenant.id, 'email': tenant.email, 'lease_ids': lease_ids, 'unit_ids': unit_ids}
+
+    return make
+
+
+@pytest.fixture
+def tenant_client(app):
+    """Factory: a test client carrying the cookie /login sets for the tenant"""
+    def make(tenant):
+        client = app.test_client()
+        client.set_cookie('user', urllib.parse.quote(json.dumps({'email': tenant['email'], 'role': 'tenant'})))
+        return client
+
+    return make
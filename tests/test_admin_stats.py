@@ -0,0 +1,25 @@
+from app import db
+from models import Admin
+from seeding import seed_dataset
+
+
+def _seed_admin(properties, units, years):
+    seed_dataset(1, properties, units, years)
+    return db.session.query(db.func.max(Admin.admin_id)).scalar()
+
+
+def test_admin_stats_runs_two_statements_whatever_the_portfolio_size(client, count_statements):
+    small = _seed_admin(properties=1, units=2, years=1)
+    large = _seed_admin(properties=5, units=20, years=3)
+
+    units = {}
+    for admin_id in (small, large):
+        response = client.get(f'/admin/stats/{admin_id}')
+        assert response.status_code == 200
+        assert count_statements(response) == 2
+        units[admin_id] = response.get_json()['data']['total_units']
+    assert units == {small: 2, large: 100}
+
+
+def test_admin_stats_for_unknown_admin(client):
+    assert client.get('/admin/stats/999').status_code == 404
@@ -0,0 +1,66 @@
+import pytest
+
+import archival
+from app import db
+from archival import archive_history
+from models import RentPayments, RentPaymentsArchive
+
+
+@pytest.fixture
+def tenant(make_tenant):
+    """Two ended leases of four payments each, then an active lease of four"""
+    return make_tenant(leases=3, payments=4)
+
+
+def payment_keys(model):
+    return sorted(((p.payment_date, p.payment_id) for p in model.query), reverse=True)
+
+
+def test_archive_history_moves_ended_leases_and_resumes_after_an_interruption(tenant, monkeypatch):
+    everything = payment_keys(RentPayments)
+    move, batches = archival._move, []
+
+    def fail_on_second_batch(model, lease_ids):
+        if model is RentPayments:
+            batches.append(lease_ids)
+            if len(batches) == 2:
+                raise RuntimeError('worker killed')
+        return move(model, lease_ids)
+
+    monkeypatch.setattr(archival, '_move', fail_on_second_batch)
+    with pytest.raises(RuntimeError):
+        archive_history(0, batch_size=1)
+    db.session.rollback()
+    # The first batch committed on its own
+    assert {p.lease_id for p in RentPaymentsArchive.query} == set(batches[0])
+
+    monkeypatch.setattr(archival, '_move', move)
+    assert archive_history(0, batch_size=1)['rent_payments'] == 4
+    assert archive_history(0, batch_size=1)['rent_payments'] == 0
+
+    assert {p.lease_id for p in RentPayments.query} == {tenant['lease_ids'][-1]}
+    assert {p.lease_id for p in RentPaymentsArchive.query} == set(tenant['lease_ids'][:-1])
+    assert sorted(payment_keys(RentPayments) + payment_keys(RentPaymentsArchive), reverse=True) == everything
+
+
+def follow_cursors(client, url, limit):
+    """Payment ids of every page of a history route, in the order served"""
+    ids, cursor = [], None
+    while True:
+        query = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        body = client.get(url, query_string=query).get_json()
+        assert len(body['payments']) <= limit
+        ids += [payment['payment_id'] for payment in body['payments']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('limit', [1, 3, 5, 12, 50])
+def test_history_pages_merge_live_and_archived_payments_across_cursors(client, tenant_client, admin, tenant, limit):
+    expected = [payment_id for _, payment_id in payment_keys(RentPayments)]
+    archive_history(0)
+    assert RentPaymentsArchive.query.count() == 8
+
+    assert follow_cursors(client, f"/admin/rent-payments/{admin['admin_id']}", limit) == expected
+    assert follow_cursors(tenant_client(tenant), '/tenant-payments', limit) == expected
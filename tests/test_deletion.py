@@ -0,0 +1,109 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from archival import archive_history
+from deletion import LEASE_CHILDREN, purge_archived
+from etags import versions
+from models import Expenses, Leases, MaintenanceRequests, MonthlyRentRollups, Properties, RentPayments, Units
+from rollups import rebuild_rollups
+
+
+@pytest.fixture
+def tenant(admin, make_tenant):
+    """A tenant with an ended lease whose history is archived and an active lease, each with a row in every child table"""
+    tenant = make_tenant(leases=2, payments=2)
+    for lease_id in tenant['lease_ids']:
+        db.session.add(Expenses(lease_id=lease_id, expense_date=date.today(), expense_amount=50,
+                                expense_description='Plumbing', payment_reference_number='EXP',
+                                paid_by='owner', admin_id=admin['admin_id']))
+        db.session.add(MaintenanceRequests(lease_id=lease_id, tenant_id=tenant['tenant_id'],
+                                           request_date=date.today() - timedelta(days=400),
+                                           request_description='Leak', request_status='closed',
+                                           request_priority='low', admin_id=admin['admin_id']))
+    db.session.commit()
+    archive_history(0)
+    return tenant
+
+
+def child_counts(lease_ids):
+    return {model.__tablename__: model.query.filter(model.lease_id.in_(lease_ids)).count() for model in LEASE_CHILDREN}
+
+
+def tenant_version(tenant_id):
+    return db.session.execute(db.select(versions.c.version).where(
+        versions.c.entity == 'tenant', versions.c.entity_id == tenant_id)).scalar()
+
+
+def rollups():
+    return {(r.property_id, r.year_month): (r.expected, r.collected) for r in MonthlyRentRollups.query
+            if r.expected or r.collected}
+
+
+def test_every_child_table_has_rows_to_purge(tenant):
+    assert all(child_counts(tenant['lease_ids']).values())
+
+
+def test_purge_property_removes_everything_under_it(client, admin, tenant):
+    version = tenant_version(tenant['tenant_id'])
+
+    response = client.delete(f"/properties/{admin['property_id']}")
+    assert response.status_code == 200
+    assert response.get_json()['deleted']['leases'] == 2
+
+    db.session.expire_all()
+    assert set(child_counts(tenant['lease_ids']).values()) == {0}
+    assert Leases.query.count() == Units.query.count() == Properties.query.count() == 0
+    assert MonthlyRentRollups.query.count() == 0
+    assert tenant_version(tenant['tenant_id']) > version
+
+
+def test_purge_unit_removes_its_leases_history_and_rebuilds_rollups(client, tenant):
+    ended_lease, active_lease = tenant['lease_ids']
+    version = tenant_version(tenant['tenant_id'])
+    kept = child_counts([active_lease])
+
+    assert client.delete(f"/units/{tenant['unit_ids'][0]}").status_code == 200
+
+    db.session.expire_all()
+    assert set(child_counts([ended_lease]).values()) == {0}
+    assert child_counts([active_lease]) == kept
+    assert db.session.get(Leases, ended_lease) is None
+    assert tenant_version(tenant['tenant_id']) > version
+    maintained = rollups()
+    rebuild_rollups()
+    assert maintained == rollups()
+
+
+def test_archiving_hides_units_and_properties_but_keeps_history(client, admin, tenant):
+    ended_unit, active_unit = tenant['unit_ids']
+    property_id = admin['property_id']
+    kept = child_counts(tenant['lease_ids'])
+
+    assert client.delete(f'/units/{active_unit}', query_string={'mode': 'soft'}).status_code == 409
+    assert client.delete(f'/properties/{property_id}', query_string={'mode': 'soft'}).status_code == 409
+
+    assert client.delete(f'/units/{ended_unit}', query_string={'mode': 'soft'}).status_code == 200
+    assert [u['unit_id'] for u in client.get(f'/units/property/{property_id}').get_json()] == [active_unit]
+    assert child_counts(tenant['lease_ids']) == kept
+    assert RentPayments.query.count() == 2
+
+    Leases.query.filter_by(lease_id=tenant['lease_ids'][-1]).update({'lease_status': 'ended'})
+    db.session.commit()
+    assert client.delete(f'/properties/{property_id}', query_string={'mode': 'soft'}).status_code == 200
+    assert client.get('/properties').get_json() == []
+    assert client.get(f'/units/property/{property_id}').get_json() == []
+    assert child_counts(tenant['lease_ids']) == kept
+
+
+def test_purge_archived_only_deletes_what_was_archived_before_the_cutoff(client, tenant):
+    ended_unit, active_unit = tenant['unit_ids']
+    assert client.delete(f'/units/{ended_unit}', query_string={'mode': 'soft'}).status_code == 200
+
+    assert purge_archived(datetime.utcnow() - timedelta(days=1)) == 0
+    assert purge_archived(datetime.utcnow() + timedelta(seconds=1)) == 1
+
+    db.session.expire_all()
+    assert [u.unit_id for u in Units.query] == [active_unit]
+    assert set(child_counts(tenant['lease_ids'][:1]).values()) == {0}
@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def tenant(make_tenant):
+    return make_tenant()
+
+
+def etag(client, url='/tenant-dashboard'):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+@pytest.mark.parametrize('url', ['/tenant-dashboard', '/tenant-leases', '/tenant-payments'])
+def test_matching_if_none_match_is_answered_with_304(tenant_client, tenant, url):
+    client = tenant_client(tenant)
+    first = client.get(url)
+    assert first.headers['ETag'].startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+
+    assert client.get(url, headers={'If-None-Match': 'W/"something-else"'}).status_code == 200
+
+
+def test_payment_and_lease_writes_change_the_etag(client, admin, tenant_client, make_tenant, tenant):
+    reader = tenant_client(tenant)
+    other = make_tenant()
+    before = etag(reader)
+    today = date.today().isoformat()
+
+    response = client.post(f"/units/{other['unit_ids'][-1]}/record-payment", json={
+        'amount': 100, 'payment_date': today, 'period_start': today, 'period_end': today,
+        'payment_method': 'cash', 'admin_id': admin['admin_id'],
+    })
+    assert response.status_code == 200
+    assert etag(reader) == before, "another tenant's payment"
+
+    response = client.post(f"/units/{tenant['unit_ids'][-1]}/record-payment", json={
+        'amount': 100, 'payment_date': today, 'period_start': today, 'period_end': today,
+        'payment_method': 'cash', 'admin_id': admin['admin_id'],
+    })
+    assert response.status_code == 200
+    after_payment = etag(reader)
+    assert after_payment != before
+    assert reader.get('/tenant-dashboard', headers={'If-None-Match': before}).status_code == 200
+
+    assert client.put(f"/leases/{tenant['lease_ids'][-1]}", json={'payment_due_day': 9}).status_code == 200
+    assert etag(reader) != after_payment
+
+
+def test_requests_without_a_tenant_cookie_get_no_etag(client, tenant):
+    response = client.get('/tenant-dashboard')
+    assert 'ETag' not in response.headers
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from app import db
+from etags import versions
+from expiry import expire_leases
+from models import Leases, Tenants, Units
+
+
+def tenant_version(tenant_id):
+    return db.session.execute(db.select(versions.c.version).where(
+        versions.c.entity == 'tenant', versions.c.entity_id == tenant_id)).scalar() or 0
+
+
+def snapshot(tenants):
+    db.session.expire_all()
+    return {
+        'leases': {lease.lease_id: lease.lease_status for lease in Leases.query},
+        'units': {unit.unit_id: unit.status for unit in Units.query},
+        'move_out': {t['tenant_id']: db.session.get(Tenants, t['tenant_id']).move_out_date for t in tenants},
+        'versions': {t['tenant_id']: tenant_version(t['tenant_id']) for t in tenants},
+    }
+
+
+def test_expire_leases_ends_leases_vacates_units_and_moves_tenants_out_once(make_tenant):
+    renewing, leaving = make_tenant(), make_tenant()
+    expiring = db.session.get(Leases, renewing['lease_ids'][-1])
+    end_date = expiring.end_date
+    # The renewing tenant signed a follow-on lease for the same unit
+    renewal = Leases(tenant_id=expiring.tenant_id, unit_id=expiring.unit_id, property_id=expiring.property_id,
+                     admin_id=expiring.admin_id, start_date=end_date, end_date=end_date + timedelta(days=365),
+                     monthly_rent=1000, deposit_amount=1000, lease_status='active', payment_due_day=5)
+    db.session.add(renewal)
+    db.session.commit()
+    before = snapshot([renewing, leaving])
+
+    assert expire_leases(today=end_date - timedelta(days=1)) == 0
+    assert snapshot([renewing, leaving]) == before
+
+    assert expire_leases(today=end_date) == 2
+    after = snapshot([renewing, leaving])
+    assert after['leases'] == {**before['leases'], renewing['lease_ids'][-1]: 'ended',
+                               leaving['lease_ids'][-1]: 'ended'}
+    assert after['units'] == {**before['units'], leaving['unit_ids'][-1]: 'vacant'}
+    assert after['move_out'] == {renewing['tenant_id']: before['move_out'][renewing['tenant_id']],
+                                 leaving['tenant_id']: end_date}
+    assert all(after['versions'][t] > before['versions'][t] for t in after['versions'])
+
+    # Safe to run again: nothing is left to end and nothing is bumped
+    assert expire_leases(today=end_date) == 0
+    assert snapshot([renewing, leaving]) == after
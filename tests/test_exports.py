@@ -0,0 +1,97 @@
+import os
+from collections import Counter
+
+import pytest
+
+pyarrow = pytest.importorskip('pyarrow')
+import pyarrow.ipc
+import pyarrow.parquet
+
+import exports
+from app import db
+from archival import archive_history
+from exports import export_table, read_watermarks
+from models import RentPayments, RentPaymentsArchive
+from rollups import year_month
+
+
+@pytest.fixture
+def payments(make_tenant):
+    """Payment month of every payment id, live and archived"""
+    make_tenant(leases=2, payments=3)
+    archive_history(0)
+    assert RentPaymentsArchive.query.count() == 3
+    return {p.payment_id: year_month(p.payment_date)
+            for model in (RentPayments, RentPaymentsArchive) for p in model.query}
+
+
+def read_partitions(out_dir, fmt='parquet'):
+    """{year_month: [payment ids]} across every part file, and the names of all files written"""
+    partitions, names = {}, []
+    for root, _, files in os.walk(os.path.join(out_dir, 'rent_payments')):
+        for name in files:
+            names.append(name)
+            if name.endswith('.partial'):
+                continue
+            path = os.path.join(root, name)
+            if fmt == 'parquet':
+                data = pyarrow.parquet.read_table(path)
+            else:
+                with pyarrow.OSFile(path) as source:
+                    data = pyarrow.ipc.open_file(source).read_all()
+            month = int(os.path.basename(root).split('=')[1])
+            partitions.setdefault(month, []).extend(data.column('payment_id').to_pylist())
+    return partitions, names
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_full_export_writes_one_file_per_month_with_live_and_archived_rows(tmp_path, payments, fmt):
+    rows, files = export_table('rent_payments', str(tmp_path), fmt=fmt, batch_size=2)
+
+    partitions, names = read_partitions(str(tmp_path), fmt)
+    assert rows == len(payments)
+    assert files == len(partitions) == len(set(payments.values()))
+    assert {payment_id: month for month, ids in partitions.items() for payment_id in ids} == payments
+    assert not [name for name in names if name.endswith('.partial')]
+    newest = max(db.session.query(db.func.max(model.updated_at)).scalar() for model in (RentPayments, RentPaymentsArchive))
+    assert read_watermarks(str(tmp_path)) == {'rent_payments': {'all': newest.isoformat()}}
+
+
+def test_interrupted_export_leaves_only_complete_files_in_place(tmp_path, payments, monkeypatch):
+    write, written = exports._PartitionWriter.write, []
+
+    def fail_in_second_partition(self, batch):
+        written.append(self.path)
+        if len(set(written)) == 2:
+            raise RuntimeError('disk full')
+        write(self, batch)
+
+    monkeypatch.setattr(exports._PartitionWriter, 'write', fail_in_second_partition)
+    with pytest.raises(RuntimeError):
+        export_table('rent_payments', str(tmp_path))
+
+    partitions, names = read_partitions(str(tmp_path))
+    first_month = min(set(payments.values()))
+    assert partitions == {first_month: [i for i, month in sorted(payments.items()) if month == first_month]}
+    assert sum(name.endswith('.partial') for name in names) == 1
+    assert read_watermarks(str(tmp_path)) == {}
+
+
+def test_incremental_export_starts_at_the_watermark_less_the_overlap(tmp_path, payments):
+    out_dir = str(tmp_path)
+    assert export_table('rent_payments', out_dir, incremental=True) == (len(payments), len(set(payments.values())))
+    watermark = read_watermarks(out_dir)
+    assert export_table('rent_payments', out_dir, incremental=True) == (0, 0)
+    assert read_watermarks(out_dir) == watermark
+
+    changed = RentPayments.query.first()
+    changed.payment_method = 'bank'
+    db.session.commit()
+    assert export_table('rent_payments', out_dir, incremental=True) == (1, 1)
+    assert read_watermarks(out_dir)['rent_payments']['all'] == changed.updated_at.isoformat()
+
+    # An overlap reaching back before every row's updated_at re-exports them all
+    rows, _ = export_table('rent_payments', out_dir, incremental=True, overlap_seconds=3600)
+    assert rows == len(payments)
+    exported = Counter(i for ids in read_partitions(out_dir)[0].values() for i in ids)
+    assert set(exported) == set(payments) and exported[changed.payment_id] == 3
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from app import db
+from ledgers import find_ledger_drift, lease_payment_status
+from models import LeaseLedgers, Leases, RentPayments
+
+
+def ledger(lease_id):
+    db.session.expire_all()
+    row = db.session.get(LeaseLedgers, lease_id)
+    return (row.total_paid, row.total_pending, row.completed_count) if row else None
+
+
+def test_record_payment_adds_to_the_ledger(client, admin, make_tenant):
+    tenant = make_tenant(payments=1)
+    lease_id = tenant['lease_ids'][-1]
+    today = date.today().isoformat()
+
+    response = client.post(f"/units/{tenant['unit_ids'][-1]}/record-payment", json={
+        'amount': 250, 'payment_date': today, 'period_start': today, 'period_end': today,
+        'payment_method': 'cash', 'admin_id': admin['admin_id'],
+    })
+    assert response.status_code == 200
+    assert ledger(lease_id) == (1250, 0, 2)
+    assert find_ledger_drift() == []
+
+
+def test_filed_payments_move_from_pending_when_the_admin_decides(client, admin, make_tenant):
+    tenant = make_tenant(payments=0)
+    lease_id = tenant['lease_ids'][-1]
+    today = date.today().isoformat()
+
+    def file_payment(reference):
+        response = client.post('/tenant/file-payment', json={
+            'lease_id': lease_id, 'tenant_id': tenant['tenant_id'], 'admin_id': admin['admin_id'], 'amount': 400,
+            'payment_method': 'mpesa', 'transaction_reference_number': reference,
+            'period_start': today, 'period_end': today, 'payment_date': today,
+        })
+        assert response.status_code == 201
+        return RentPayments.query.filter_by(transaction_reference_number=reference).one().payment_id
+
+    accepted, rejected = file_payment('ACCEPT'), file_payment('REJECT')
+    assert ledger(lease_id) == (0, 800, 0)
+
+    assert client.patch(f'/admin/rent-payments/{accepted}/status', json={'status': 'completed'}).status_code == 200
+    assert ledger(lease_id) == (400, 400, 1)
+    assert client.patch(f'/admin/rent-payments/{rejected}/status', json={'status': 'rejected'}).status_code == 200
+    assert ledger(lease_id) == (400, 0, 1)
+    assert find_ledger_drift() == []
+
+
+def test_delete_lease_leaves_no_ledger_behind(client, make_tenant):
+    lease_id = make_tenant(payments=0)['lease_ids'][-1]
+    db.session.add(LeaseLedgers(lease_id=lease_id, total_paid=0, total_pending=0, completed_count=0))
+    db.session.commit()
+
+    assert client.delete(f'/leases/{lease_id}').status_code == 204
+    assert ledger(lease_id) is None
+    assert find_ledger_drift() == []
+
+
+def test_check_ledgers_reports_drift_and_fixes_it(app, make_tenant):
+    lease_id = make_tenant(payments=2)['lease_ids'][-1]
+    db.session.get(LeaseLedgers, lease_id).total_paid = 5
+    db.session.commit()
+    assert find_ledger_drift() == [(lease_id, (5, 0, 2), (2000, 0, 2))]
+
+    runner = app.test_cli_runner()
+    assert '1 ledger(s) out of sync' in runner.invoke(args=['check-ledgers']).output
+    assert 'Rebuilt 1 ledger(s)' in runner.invoke(args=['check-ledgers', '--fix']).output
+    assert find_ledger_drift() == []
+    assert ledger(lease_id) == (2000, 0, 2)
+
+
+def test_rent_free_lease_is_never_behind(make_tenant):
+    lease = db.session.get(Leases, make_tenant(payments=0)['lease_ids'][-1])
+    lease.monthly_rent = 0
+    status = lease_payment_status(lease, today=date.today() + timedelta(days=90))
+    assert status['months_behind'] == 0
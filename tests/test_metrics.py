@@ -0,0 +1,110 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import metrics
+from metrics import LATENCY_BUCKETS, METRICS, MetricsStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A second worker: records one in-flight request and two finished ones, then waits to be told to exit
+WORKER = '''
+import sys
+from metrics import MetricsStore
+store = MetricsStore(sys.argv[1])
+store.inc('rms_http_requests_in_flight')
+store.inc('rms_http_requests_total', {'endpoint': 'worker', 'method': 'GET', 'status': '200'}, 2)
+print('ready', flush=True)
+sys.stdin.read()
+'''
+
+SAMPLE = re.compile(r'^([a-z_]+)(?:\{(.*)\})? (\S+)$')
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = MetricsStore(str(tmp_path))
+    monkeypatch.setattr(metrics, 'store', store)
+    return store
+
+
+def samples(text):
+    """(sample, labels) -> value for every sample line of an exposition"""
+    parsed = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        sample, labels, value = SAMPLE.match(line).groups()
+        parsed[sample, labels or ''] = float(value)
+    return parsed
+
+
+def test_values_from_every_process_are_summed_and_a_dead_process_drops_its_gauges(store):
+    store.inc('rms_http_requests_in_flight')
+    store.inc('rms_http_requests_total', {'endpoint': 'worker', 'method': 'GET', 'status': '200'})
+    worker = subprocess.Popen([sys.executable, '-c', WORKER, store.directory], cwd=ROOT,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert worker.stdout.readline() == 'ready\n'
+        assert len(os.listdir(store.directory)) == 2
+        live = samples(store.render())
+        assert live['rms_http_requests_in_flight', ''] == 2
+        assert live['rms_http_requests_total', 'endpoint="worker",method="GET",status="200"'] == 3
+    finally:
+        worker.communicate('')
+
+    # The dead worker's requests still count; its in-flight gauge no longer does
+    dead = samples(store.render())
+    assert dead['rms_http_requests_in_flight', ''] == 1
+    assert dead['rms_http_requests_total', 'endpoint="worker",method="GET",status="200"'] == 3
+
+
+def test_values_survive_reopening_the_file_and_growing_past_its_size(tmp_path):
+    path = str(tmp_path / 'rms_1.db')
+    values = metrics.MmapValues(path)
+    keys = [f'key-{i}-' + 'x' * (i % 13) for i in range(40000)]
+    for key in keys:
+        values.inc(key, 2)
+    values.inc(keys[0], 0.5)
+    assert os.path.getsize(path) > metrics.MmapValues._INITIAL_SIZE
+
+    reopened = metrics.MmapValues(path)
+    reopened.inc(keys[-1])
+    with open(path, 'rb') as f:
+        data = f.read()
+    found = {key: value for key, value, _ in metrics._read_entries(data, reopened._used)}
+    assert len(found) == len(keys)
+    assert found[keys[0]] == 2.5 and found[keys[-1]] == 3 and found[keys[1]] == 2
+
+
+def test_metrics_endpoint_renders_the_prometheus_text_format(client, store):
+    for _ in range(3):
+        assert client.get('/admin/rent-payments/1').status_code == 200
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert response.mimetype_params['version'] == '0.0.4'
+    text = response.get_data(as_text=True)
+
+    comments = [line for line in text.splitlines() if line.startswith('#')]
+    assert comments == [line for name, (metric_type, help_text) in METRICS.items()
+                        for line in (f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}')]
+
+    parsed = samples(text)
+    endpoint = 'endpoint="get_payments"'
+    assert parsed['rms_http_requests_total', f'{endpoint},method="GET",status="200"'] == 3
+    assert parsed['rms_http_request_duration_seconds_count', endpoint] == 3
+    assert parsed['rms_db_statements_total', endpoint] >= 3
+    # The /metrics request itself is still being served while it renders
+    assert parsed['rms_http_requests_in_flight', ''] == 1
+
+    buckets = [(labels, value) for (sample, labels), value in parsed.items()
+               if sample == 'rms_http_request_duration_seconds_bucket' and labels.startswith(endpoint)]
+    assert [labels.split('le=')[1] for labels, _ in buckets] == [f'"{b}"' for b in LATENCY_BUCKETS] + ['"+Inf"']
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts) and counts[-1] == 3
+
+    assert samples(client.get('/metrics').get_data(as_text=True))['rms_http_requests_in_flight', ''] == 1
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+import pytest
+
+import app as app_module
+from archival import archive_history
+from models import RentPayments, RentPaymentsArchive
+
+HEADER = ['payment_id', 'lease_id', 'payment_date', 'admin_id', 'amount', 'payment_method',
+          'transaction_reference_number', 'period_start', 'period_end', 'status', 'tenant_id', 'payment_month',
+          'tenant_name', 'unit_name', 'property_name']
+
+
+@pytest.fixture
+def admin_id(admin, make_tenant, monkeypatch):
+    make_tenant(leases=2, payments=3)
+    archive_history(0)
+    assert RentPaymentsArchive.query.count() == 3
+    # Small batches, so the stream is flushed more than once
+    monkeypatch.setattr(app_module, 'EXPORT_BATCH_SIZE', 2)
+    return admin['admin_id']
+
+
+def listed_ids(client, admin_id, **filters):
+    return [p['payment_id'] for p in client.get(f'/admin/rent-payments/{admin_id}', query_string=filters)
+            .get_json()['payments']]
+
+
+def filters_for(name):
+    """Request args for one of the filters the export shares with the payment list"""
+    archived = RentPaymentsArchive.query.order_by(RentPaymentsArchive.payment_date).first()
+    return {
+        'none': {},
+        'status': {'status': 'completed'},
+        'reference': {'reference_number': archived.transaction_reference_number},
+        'year': {'year': archived.payment_date.year},
+    }[name]
+
+
+@pytest.mark.parametrize('name', ['none', 'status', 'reference', 'year'])
+def test_csv_export_has_the_list_columns_and_rows(client, admin_id, name):
+    filters = filters_for(name)
+    response = client.get(f'/admin/rent-payments/{admin_id}/export', query_string=filters)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == f'attachment; filename=rent-payments-{admin_id}.csv'
+
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == HEADER
+    expected = listed_ids(client, admin_id, **filters)
+    assert expected
+    assert [int(row[0]) for row in rows[1:]] == expected
+    assert all(len(row[HEADER.index('payment_month')]) == 7 for row in rows[1:])
+
+
+def test_ndjson_export_matches_csv(client, admin_id):
+    response = client.get(f'/admin/rent-payments/{admin_id}/export', query_string={'format': 'ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert all(sorted(record) == sorted(HEADER) for record in records)
+    assert [record['payment_id'] for record in records] == listed_ids(client, admin_id)
+    assert {record['payment_id'] for record in records} == {
+        p.payment_id for model in (RentPayments, RentPaymentsArchive) for p in model.query}
+
+
+def test_unknown_export_format_is_rejected(client, admin_id):
+    assert client.get(f'/admin/rent-payments/{admin_id}/export', query_string={'format': 'xml'}).status_code == 400
@@ -0,0 +1,27 @@
+import pytest
+
+from app import db
+from models import Admin, RentPayments
+from seeding import seed_dataset
+
+
+@pytest.fixture
+def admin_id(app):
+    seed_dataset(1, 1, 4, 2)
+    return db.session.query(db.func.max(Admin.admin_id)).scalar()
+
+
+@pytest.mark.parametrize('with_year, month', [(True, None), (True, 3), (True, 12), (False, 3)],
+                         ids=['year', 'month+year', 'december', 'month'])
+def test_month_and_year_filters_match_payment_dates(client, admin_id, with_year, month):
+    # Last year is fully covered by the two seeded years
+    year = db.session.query(db.func.max(RentPayments.payment_date)).scalar().year - 1
+    args = {key: value for key, value in (('year', year if with_year else None), ('month', month)) if value}
+    expected = {payment.payment_id for payment in RentPayments.query.filter_by(admin_id=admin_id)
+                if payment.payment_date.year == args.get('year', payment.payment_date.year)
+                and payment.payment_date.month == args.get('month', payment.payment_date.month)}
+
+    response = client.get(f'/admin/rent-payments/{admin_id}', query_string=args)
+    assert response.status_code == 200
+    assert expected
+    assert {payment['payment_id'] for payment in response.get_json()['payments']} == expected
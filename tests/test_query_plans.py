@@ -0,0 +1,139 @@
+"""EXPLAIN QUERY PLAN of the SQL behind each benchmarks.endpoints scenario
+
+A filter that wraps an indexed column (func.lower, extract, ...) or an OR
+the planner cannot split turns a SEARCH into a SCAN without changing any
+result. Each scenario is sent once against a seeded database, every
+statement it ran is explained, and the plans must use the scenario's
+indexes and never scan GUARDED_TABLES.
+"""
+import argparse
+import re
+
+import pytest
+from flask import has_request_context
+from sqlalchemy import event
+
+from app import db
+from benchmarks.endpoints import call, client_for, prepare, scenarios
+
+GUARDED_TABLES = {'rent_payments', 'rent_payments_archive', 'leases', 'maintenance_requests',
+                  'maintenance_requests_archive'}
+
+# Keyset pages over the primary key walk it from the start and stop at LIMIT
+ALLOWED_SCANS = {
+    'leases page': {'leases'},
+    'maintenance_requests page': {'maintenance_requests'},
+}
+
+PAYMENT_LIST_INDEXES = ('ix_rent_payments_admin_id_payment_date', 'ix_rent_payments_archive_admin_id_payment_date')
+PAYMENT_MONTH_INDEXES = ('ix_rent_payments_admin_id_payment_month', 'ix_rent_payments_archive_admin_id_payment_month')
+TENANT_PAYMENT_INDEXES = ('ix_rent_payments_tenant_id_payment_date', 'ix_rent_payments_archive_tenant_id_payment_date')
+
+# Every scenario, with the indexes its plans must use (none for routes off the guarded tables)
+EXPECTED_INDEXES = {
+    'tenant-dashboard': ('ix_leases_tenant_id_lease_status', 'ix_rent_payments_tenant_id_payment_date'),
+    'tenant-leases': ('ix_leases_tenant_id_start_date',),
+    'tenant-payments': TENANT_PAYMENT_INDEXES,
+    'tenant-payments page': TENANT_PAYMENT_INDEXES,
+    'tenant-profile': (),
+    'tenant active-lease': ('ix_leases_tenant_id_lease_status',),
+    'tenant maintenance': ('ix_maintenance_requests_tenant_id_request_date',
+                           'ix_maintenance_requests_archive_tenant_id_request_date'),
+    'properties by admin': (),
+    'properties': (),
+    'units by property': (),
+    'unit': ('ix_leases_unit_id_lease_status_end_date', 'ix_rent_payments_lease_id_period_start'),
+    'admin stats': ('ix_maintenance_requests_admin_id_request_date', 'ix_rent_charges_admin_id_due_date'),
+    'admin maintenance': ('ix_maintenance_requests_admin_id_request_date',
+                          'ix_maintenance_requests_archive_admin_id_request_date'),
+    'payment months': PAYMENT_MONTH_INDEXES,
+    **{name: PAYMENT_LIST_INDEXES for name in (
+        'payments', 'payments search', 'payments tenant_name', 'payments unit_name', 'payments property_name',
+        'payments reference', 'payments status', 'payments month', 'payments date range',
+    )},
+    'payments month+year': PAYMENT_MONTH_INDEXES,
+    'payments year': PAYMENT_MONTH_INDEXES,
+    'payments export': ('ix_rent_payments_admin_id_payment_month',),
+    'stats current month': ('sqlite_autoindex_monthly_rent_rollups_1',),
+    'stats month+year': ('sqlite_autoindex_monthly_rent_rollups_1',),
+    'stats custom range': ('ix_rent_charges_admin_id_due_date', 'ix_rent_payments_admin_id_payment_date'),
+    'tenants page': (),
+    'leases page': (),
+    'expenses page': (),
+    'users page': (),
+    'maintenance_requests page': (),
+    'record-payment': ('ix_leases_unit_id_lease_status_end_date',),
+    'assign-tenant': (),
+    'tenant file-payment': (),
+    'tenant maintenance request': ('ix_leases_tenant_id_lease_status',),
+}
+
+EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|UPDATE|DELETE)\b', re.IGNORECASE)
+SCAN = re.compile(r'^SCAN (\w+)')
+INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def capture(client, scenario):
+    """Send one scenario's request; returns (error or None, [(statement, parameters)])"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and not executemany and EXPLAINABLE.match(statement):
+            statements.append((statement, parameters))
+
+    _, method, url, body = scenario
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        _, _, error = call(client, method, url, body)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return error, statements
+
+
+def explain(statements):
+    """[(statement, [plan detail, ...])] from EXPLAIN QUERY PLAN"""
+    with db.engine.connect() as conn:
+        return [(statement, [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)])
+                for statement, parameters in statements]
+
+
+def check(name, plans):
+    """Problems with one scenario's plans: guarded scans and expected indexes never used"""
+    problems, used = [], set()
+    allowed = ALLOWED_SCANS.get(name, set())
+    for statement, details in plans:
+        for detail in details:
+            used.update(INDEX.findall(detail))
+            scan = SCAN.match(detail)
+            # Eager loads alias tables as leases_1, ...
+            table = re.sub(r'_\d+$', '', scan.group(1)) if scan else None
+            if table in GUARDED_TABLES and table not in allowed:
+                problems.append(f'{detail} in: {" ".join(statement.split())[:120]}')
+    for index in EXPECTED_INDEXES.get(name, ()):
+        if index not in used:
+            problems.append(f'does not use {index}')
+    return problems
+
+
+@pytest.fixture(scope='module')
+def plans(module_app):
+    """Captured plans per scenario name, from one pass over a small seeded dataset"""
+    dataset = argparse.Namespace(admins=1, properties_per_admin=2, units_per_property=10, years=2, seed=0)
+    fixture = prepare(db, dataset, 1)
+    client = client_for(module_app, fixture)
+    results = {}
+    for scenario in scenarios(fixture):
+        error, statements = capture(client, scenario)
+        results[scenario[0]] = (error, explain(statements))
+    return results
+
+
+def test_every_scenario_is_checked(plans):
+    assert set(plans) == set(EXPECTED_INDEXES)
+
+
+@pytest.mark.parametrize('name', list(EXPECTED_INDEXES))
+def test_plan_uses_its_indexes_without_scanning(plans, name):
+    error, captured = plans[name]
+    assert error is None
+    assert check(name, captured) == []
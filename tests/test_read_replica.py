@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import db
+from models import Properties, RentPayments
+from routing import _stick_to_primary, sync_sqlite_replica
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """A second SQLite file as the replica bind, set up the way init_read_replica does"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.engines[app.config['REPLICA_BIND']] = engine
+    after_request = app.after_request_funcs.setdefault(None, [])
+    after_request.append(_stick_to_primary)
+    yield engine
+    after_request.remove(_stick_to_primary)
+    del db.engines[app.config['REPLICA_BIND']]
+    engine.dispose()
+
+
+def request(app, client, method, url, **kwargs):
+    # Each request gets its own app context, and so its own g and session, as in a server
+    with app.app_context():
+        return client.open(url, method=method, **kwargs)
+
+
+def test_reads_use_the_replica_until_the_client_writes(app, admin, replica):
+    property_id = admin['property_id']
+    sync_sqlite_replica(db)
+    writer, reader = app.test_client(), app.test_client()
+
+    def city(client):
+        return {row['id']: row['city'] for row in request(app, client, 'GET', '/properties').get_json()}[property_id]
+
+    assert request(app, writer, 'PATCH', f'/properties/{property_id}', json={'city': 'Mombasa'}).status_code == 200
+
+    # The write went to the primary only; nothing copies it to the replica here
+    db.session.expire_all()
+    assert db.session.get(Properties, property_id).city == 'Mombasa'
+    with replica.connect() as connection:
+        assert connection.execute(text('SELECT city FROM properties WHERE id = :id'),
+                                  {'id': property_id}).scalar() == 'Nairobi'
+
+    assert city(reader) == 'Nairobi'
+    assert city(writer) == 'Mombasa'
+
+
+def test_tenant_etag_and_data_come_from_the_primary_while_the_replica_lags(app, admin, make_tenant, tenant_client,
+                                                                          replica):
+    tenant = make_tenant()
+    sync_sqlite_replica(db)
+    client = tenant_client(tenant)
+    before = request(app, client, 'GET', '/tenant-dashboard')
+
+    lease_id = tenant['lease_ids'][-1]
+    today = date.today()
+    payment = RentPayments(
+        lease_id=lease_id, tenant_id=tenant['tenant_id'], admin_id=admin['admin_id'],
+        amount=1000, payment_date=today, payment_method='mpesa', transaction_reference_number='PAID-ON-PRIMARY',
+        period_start=today.replace(day=1), period_end=today.replace(day=28), status='completed'
+    )
+    db.session.add(payment)
+    db.session.commit()
+
+    after = request(app, client, 'GET', '/tenant-dashboard', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert payment.payment_id in [row['payment_id'] for row in after.get_json()['payments']]
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import event
+
+import cache as cache_module
+from app import db
+from archival import archive_history
+from etags import bump_versions
+from models import Admin, Leases, MaintenanceRequests, Properties, RentPayments, Tenants, Units
+from rollups import rebuild_rollups
+from seeding import seed_dataset
+
+
+@pytest.fixture
+def cached_client(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'RESPONSE_CACHE', 'lru')
+    cache_module.init_response_cache(app, db, [Tenants, Properties, Units, Leases, RentPayments, MaintenanceRequests])
+    yield client
+    event.remove(db.session.session_factory.class_, 'after_flush', cache_module._bump_changed_admins)
+    cache_module.cache = None
+
+
+@pytest.fixture
+def admin_id(app):
+    seed_dataset(1, 1, 4, 2)
+    return db.session.query(db.func.max(Admin.admin_id)).scalar()
+
+
+def x_cache(client, admin_id):
+    response = client.get(f'/admin/stats/{admin_id}')
+    assert response.status_code == 200
+    return response.headers['X-Cache']
+
+
+def test_generation_bumped_by_another_worker_drops_cached_views(cached_client, admin_id):
+    assert [x_cache(cached_client, admin_id), x_cache(cached_client, admin_id)] == ['MISS', 'HIT']
+
+    # Another process shares nothing with this one but the database
+    with db.engine.begin() as connection:
+        bump_versions(connection, 'admin', [admin_id])
+    assert x_cache(cached_client, admin_id) == 'MISS'
+
+
+def test_orm_writes_drop_cached_views_on_commit(cached_client, admin_id):
+    x_cache(cached_client, admin_id)
+    unit = Units.query.filter_by(admin_id=admin_id).first()
+    unit.unit_name = 'Renamed'
+    db.session.flush()
+    db.session.rollback()
+    assert x_cache(cached_client, admin_id) == 'HIT'
+
+    unit = Units.query.filter_by(admin_id=admin_id).first()
+    unit.unit_name = 'Renamed'
+    db.session.commit()
+    assert x_cache(cached_client, admin_id) == 'MISS'
+
+
+@pytest.mark.parametrize('bulk_write', [
+    lambda: rebuild_rollups(),
+    lambda: archive_history(older_than_days=0),
+], ids=['rebuild_rollups', 'archive_history'])
+def test_bulk_writes_drop_cached_views(cached_client, admin_id, bulk_write):
+    x_cache(cached_client, admin_id)
+    bulk_write()
+    assert x_cache(cached_client, admin_id) == 'MISS'
@@ -0,0 +1,106 @@
+import sqlite3
+from datetime import date, timedelta
+
+import rollups as rollups_module
+from app import db
+from models import LeaseLedgers, Leases, MonthlyRentRollups, RentCharges, Units
+from rollups import iter_months, rebuild_rollups, year_month
+
+
+def rollups():
+    """Every non-empty rollup row; removing a term can leave zeroed rows that a rebuild does not write"""
+    rows = {(r.admin_id, r.property_id, r.year_month): (r.expected, r.collected, r.pending, r.payment_count)
+            for r in MonthlyRentRollups.query}
+    return {key: sums for key, sums in rows.items() if any(sums)}
+
+
+def assert_rollups_match_rebuild():
+    maintained = rollups()
+    rebuild_rollups()
+    assert maintained == rollups()
+
+
+def test_assign_tenant_stays_within_the_query_budget(app, client, admin, count_statements):
+    unit = Units(property_id=admin['property_id'], unit_number='1', unit_name='Unit 1', status='vacant',
+                 monthly_rent=1000, deposit_amount=1000, admin_id=admin['admin_id'], type='1br')
+    db.session.add(unit)
+    db.session.commit()
+    today = date.today()
+
+    response = client.post(f'/units/{unit.unit_id}/assign-tenant', json={
+        'first_name': 'New', 'last_name': 'Tenant', 'email': 'new@example.com', 'phone': '0700',
+        'date_of_birth': '1990-01-01', 'emergency_contact_name': 'Kin', 'emergency_contact_number': '0711',
+        'move_in_date': today.isoformat(), 'admin_id': admin['admin_id'], 'lease_start': today.isoformat(),
+        'lease_end': (today + timedelta(days=365)).isoformat(),
+    })
+    assert response.status_code == 200
+    assert count_statements(response) <= app.config['QUERY_BUDGET']
+    assert_rollups_match_rebuild()
+
+
+def test_lease_edits_move_expected_rent(client, make_tenant):
+    lease_id = make_tenant(payments=0)['lease_ids'][-1]
+    end_date = client.get('/leases').get_json()[0]['end_date']
+
+    response = client.put(f'/leases/{lease_id}', json={
+        'end_date': (date.fromisoformat(end_date) - timedelta(days=200)).isoformat(), 'monthly_rent': 1500
+    })
+    assert response.status_code == 200
+    assert_rollups_match_rebuild()
+
+    assert client.delete(f'/leases/{lease_id}').status_code == 204
+    assert rollups() == {}
+
+
+def test_lease_edits_replace_charges_and_delete_removes_them(client, make_tenant):
+    lease_id = make_tenant(payments=0)['lease_ids'][-1]
+    lease = db.session.get(Leases, lease_id)
+    new_end = date.today() - timedelta(days=100)
+
+    response = client.put(f'/leases/{lease_id}', json={'end_date': new_end.isoformat(), 'monthly_rent': 1500})
+    assert response.status_code == 200
+    db.session.expire_all()
+    expected = set(iter_months(lease.start_date, new_end))
+    charges = RentCharges.query.filter_by(lease_id=lease_id).all()
+    assert {c.period for c in charges} == expected
+    assert {c.amount for c in charges} == {1500}
+
+    db.session.add(LeaseLedgers(lease_id=lease_id, total_paid=0, total_pending=0, completed_count=0))
+    db.session.commit()
+    assert client.delete(f'/leases/{lease_id}').status_code == 204
+    assert RentCharges.query.filter_by(lease_id=lease_id).count() == 0
+    assert db.session.get(LeaseLedgers, lease_id) is None
+
+
+def test_end_lease_refuses_to_extend_the_lease(client, make_tenant):
+    tenant = make_tenant(payments=0)
+    lease = db.session.get(Leases, tenant['lease_ids'][-1])
+    end_date, charges = lease.end_date, RentCharges.query.filter_by(lease_id=lease.lease_id).count()
+
+    response = client.post(f"/units/{tenant['unit_ids'][-1]}/end-lease",
+                           json={'end_date': (end_date + timedelta(days=60)).isoformat()})
+    assert response.status_code == 400
+    db.session.expire_all()
+    assert (lease.lease_status, lease.end_date) == ('active', end_date)
+    assert RentCharges.query.filter_by(lease_id=lease.lease_id).count() == charges
+    assert_rollups_match_rebuild()
+
+
+def test_rebuild_locks_out_writers_while_it_reads(make_tenant, monkeypatch):
+    make_tenant()
+    blocked = []
+
+    def write_from_another_connection(start, end):
+        other = sqlite3.connect(db.engine.url.database, timeout=0.05)
+        try:
+            other.execute('UPDATE monthly_rent_rollups SET payment_count = payment_count + 1')
+            other.commit()
+        except sqlite3.OperationalError:
+            blocked.append(True)
+        finally:
+            other.close()
+        return iter_months(start, end)
+
+    monkeypatch.setattr(rollups_module, 'iter_months', write_from_another_connection)
+    rebuild_rollups()
+    assert blocked
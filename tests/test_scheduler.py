@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timedelta
+
+import scheduler
+from app import db
+from models import ScheduledJobs
+
+
+class Clock(datetime):
+    """datetime whose utcnow() only moves when a test moves it"""
+    current = None
+
+    @classmethod
+    def utcnow(cls):
+        return cls.current
+
+
+def test_each_job_is_locked_and_rescheduled_from_when_it_runs(app, monkeypatch):
+    monkeypatch.setattr(scheduler, 'datetime', Clock)
+    monkeypatch.setattr(scheduler, 'JOBS', {})
+    Clock.current = datetime(2026, 1, 1, 12, 0)
+    locked_until = {}
+
+    def slow():
+        Clock.current += timedelta(minutes=30)
+
+    def record():
+        locked_until['fast'] = db.session.get(ScheduledJobs, 'fast').locked_until
+
+    scheduler.register_job('slow', '* * * * *', slow)
+    scheduler.register_job('fast', '* * * * *', record)
+    scheduler.ensure_job_rows()
+    Clock.current += timedelta(minutes=1)
+
+    assert [run.status for run in scheduler.run_due_jobs(lock_seconds=600)] == ['succeeded', 'succeeded']
+    assert locked_until['fast'] == Clock.current + timedelta(seconds=600)
+    db.session.expire_all()
+    assert db.session.get(ScheduledJobs, 'fast').next_run_at == Clock.current + timedelta(minutes=1)
+
+
+def test_a_job_that_outlives_its_lock_keeps_it(app, monkeypatch):
+    monkeypatch.setattr(scheduler, 'JOBS', {})
+    taken_by_other_worker = []
+
+    def long_job():
+        time.sleep(1.2)
+        with monkeypatch.context() as other_worker:
+            other_worker.setattr(scheduler, 'worker_id', lambda: 'other-host:1')
+            taken_by_other_worker.append(scheduler._acquire(scheduler.JOBS['long'], 0.6, due_only=False))
+
+    scheduler.register_job('long', '* * * * *', long_job)
+    run = scheduler.run_job_now('long', lock_seconds=0.6)
+
+    assert taken_by_other_worker == [False]
+    assert run.status == 'succeeded'
+    row = db.session.get(ScheduledJobs, 'long')
+    assert (row.locked_by, row.locked_until) == (None, None)
+
+
+def test_a_run_whose_lock_was_taken_over_is_recorded_and_leaves_the_lock_alone(app, monkeypatch):
+    monkeypatch.setattr(scheduler, 'JOBS', {})
+
+    def lose_lock():
+        db.session.get(ScheduledJobs, 'lost').locked_by = 'other-host:1'
+        db.session.commit()
+
+    scheduler.register_job('lost', '* * * * *', lose_lock)
+    run = scheduler.run_job_now('lost', lock_seconds=600)
+
+    assert run.status == 'lock_lost'
+    db.session.expire_all()
+    assert db.session.get(ScheduledJobs, 'lost').locked_by == 'other-host:1'
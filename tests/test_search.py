@@ -0,0 +1,102 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from models import Admin, Leases, Properties, RentPayments, Tenants, Units
+from search import BACKENDS, SEARCH_COLUMNS, rebuild_search_index
+from seeding import seed_dataset
+
+INDEXED_ROWS = (
+    "SELECT rp.payment_id, rp.admin_id, t.first_name || ' ' || t.last_name, u.unit_name, p.property_name, "
+    "rp.transaction_reference_number "
+    "FROM rent_payments rp JOIN leases l ON l.lease_id = rp.lease_id JOIN units u ON u.unit_id = l.unit_id "
+    "JOIN properties p ON p.id = u.property_id JOIN tenants t ON t.id = rp.tenant_id"
+)
+
+
+@pytest.fixture
+def admin_id(app):
+    seed_dataset(2, 2, 5, 1)
+    if not BACKENDS['fts5'].available():
+        pytest.skip('SQLite was built without FTS5')
+    return db.session.query(db.func.min(Admin.admin_id)).scalar()
+
+
+def matches(backend, admin_id, term, field=None):
+    return set(db.session.execute(BACKENDS[backend].payment_ids(admin_id, term, field)).scalars())
+
+
+def assert_index_in_sync():
+    indexed = db.session.execute(text(
+        'SELECT rowid, admin_id, tenant_name, unit_name, property_name, reference FROM payment_search'
+    )).all()
+    assert sorted(indexed) == sorted(db.session.execute(text(INDEXED_ROWS)).all())
+
+
+def test_fts5_matches_like_for_every_field_and_term_length(admin_id):
+    payment = RentPayments.query.filter_by(admin_id=admin_id).first()
+    values = dict(zip(SEARCH_COLUMNS, db.session.execute(
+        text(INDEXED_ROWS + ' WHERE rp.payment_id = :id'), {'id': payment.payment_id}
+    ).one()[2:]))
+
+    for field, value in values.items():
+        # Full values, inner fragments in another case, the under-3-character path and misses
+        for term in (value, value[1:-1].swapcase(), value[:2], value[-1], 'zzq'):
+            for restrict in (None, field):
+                fts5 = matches('fts5', admin_id, term, restrict)
+                assert fts5 == matches('like', admin_id, term, restrict), (term, restrict)
+                assert (payment.payment_id in fts5) == (term != 'zzq')
+
+
+def test_search_route_uses_the_index_and_stays_within_the_admin(client, admin_id):
+    payment = RentPayments.query.filter_by(admin_id=admin_id).first()
+    reference = payment.transaction_reference_number
+    response = client.get(f'/admin/rent-payments/{admin_id}', query_string={'search': reference})
+    found = {p['payment_id'] for p in response.get_json()['payments']}
+    assert payment.payment_id in found
+    assert found == matches('like', admin_id, reference)
+
+
+def test_triggers_keep_the_index_in_sync_with_every_write(admin_id):
+    assert_index_in_sync()
+    lease = Leases.query.filter_by(admin_id=admin_id, lease_status='active').first()
+    today = date.today()
+
+    payment = RentPayments(lease_id=lease.lease_id, tenant_id=lease.tenant_id, admin_id=admin_id, amount=10,
+                           payment_date=today, payment_method='cash', transaction_reference_number='NEWREF',
+                           period_start=today, period_end=today, status='completed')
+    db.session.add(payment)
+    db.session.commit()
+    assert_index_in_sync()
+    assert matches('fts5', admin_id, 'newref') == {payment.payment_id}
+
+    payment.transaction_reference_number = 'CHANGED'
+    db.session.commit()
+    assert_index_in_sync()
+    assert matches('fts5', admin_id, 'newref') == set()
+
+    db.session.get(Tenants, lease.tenant_id).last_name = 'Renamed'
+    db.session.get(Units, lease.unit_id).unit_name = 'Penthouse'
+    db.session.get(Properties, lease.property_id).property_name = 'Skyline Towers'
+    db.session.commit()
+    assert_index_in_sync()
+    assert payment.payment_id in matches('fts5', admin_id, 'penthouse', 'unit_name')
+
+    other_unit = Units.query.filter(Units.admin_id == admin_id, Units.unit_id != lease.unit_id).first()
+    lease.unit_id = other_unit.unit_id
+    db.session.commit()
+    assert_index_in_sync()
+
+    db.session.delete(payment)
+    db.session.commit()
+    assert_index_in_sync()
+    assert matches('fts5', admin_id, 'changed') == set()
+
+
+def test_rebuild_search_index_repopulates_from_scratch(admin_id):
+    db.session.execute(text('DELETE FROM payment_search'))
+    db.session.commit()
+    assert rebuild_search_index() == RentPayments.query.count()
+    assert_index_in_sync()
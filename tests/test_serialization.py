@@ -0,0 +1,14 @@
+BOOKKEEPING = {'updated_at', 'deleted_at'}
+
+
+def test_list_and_detail_json_leave_out_bookkeeping_columns(client, make_tenant):
+    lease_id = make_tenant()['lease_ids'][-1]
+
+    for url in ('/properties', '/leases', '/tenants'):
+        rows = client.get(url).get_json()
+        assert rows
+        assert not BOOKKEEPING & set(rows[0]), url
+
+    lease = client.put(f'/leases/{lease_id}', json={'payment_due_day': 5}).get_json()
+    assert lease['payment_due_day'] == 5
+    assert not BOOKKEEPING & set(lease)
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+
+def _record_payment(client, unit_id, admin_id, reference):
+    today = date.today()
+    return client.post(f'/units/{unit_id}/record-payment', json={
+        'amount': 1000, 'payment_date': today.isoformat(), 'period_start': today.replace(day=1).isoformat(),
+        'period_end': today.isoformat(), 'payment_method': 'mpesa', 'admin_id': admin_id,
+        'transaction_reference': reference,
+    })
+
+
+@pytest.mark.parametrize('path', ['/tenant-leases', '/tenant-dashboard'])
+def test_tenant_route_statements_do_not_grow_with_history(path, make_tenant, tenant_client, count_statements):
+    counts = []
+    for tenant in (make_tenant(leases=1, payments=1), make_tenant(leases=4, payments=12)):
+        response = tenant_client(tenant).get(path)
+        assert response.status_code == 200
+        counts.append(count_statements(response))
+    assert counts[0] == counts[1]
+
+
+def test_tenant_leases_lists_every_lease(make_tenant, tenant_client):
+    tenant = make_tenant(leases=4)
+    assert len(tenant_client(tenant).get('/tenant-leases').get_json()['leases']) == 4
+
+
+def test_unit_statements_do_not_grow_with_payments(client, make_tenant, count_statements):
+    counts = []
+    for payments in (1, 12):
+        unit_id = make_tenant(payments=payments)['unit_ids'][-1]
+        response = client.get(f'/units/{unit_id}')
+        assert response.status_code == 200
+        assert len(response.get_json()['payment_history']) == payments
+        counts.append(count_statements(response))
+    assert counts[0] == counts[1]
+
+
+def test_record_payment_statements_do_not_grow_with_payments(client, admin, make_tenant, count_statements):
+    counts = []
+    for n, payments in enumerate((1, 12)):
+        unit_id = make_tenant(payments=payments)['unit_ids'][-1]
+        response = _record_payment(client, unit_id, admin['admin_id'], f'TEST{n}')
+        assert response.status_code == 200
+        counts.append(count_statements(response))
+    assert counts[0] == counts[1]